@@ -23,6 +23,25 @@ class AttributionRequest(BaseModel):
         None, 
         description="Custom weights for attribution factors (time, quality, account, stage, velocity)"
     )
+    summary_top_k: Optional[int] = Field(None, ge=0, description="Top contributing touchpoints in the summary")
+    summary_quantiles: Optional[List[float]] = Field(
+        None,
+        description="Touchpoint fractions for top/bottom credit shares in the summary, e.g. [0.1, 0.2]"
+    )
+
+
+class ReweightRequest(BaseModel):
+    """Request model for reweighting a previous B2B attribution calculation."""
+    analysis_id: str = Field(..., description="analysis_id from the metadata of a /b2b/calculate response")
+    attribution_weights: Optional[Dict[str, float]] = Field(
+        None,
+        description="Weights for attribution factors (time, quality, account, stage, velocity)"
+    )
+    weight_sets: Optional[List[Dict[str, float]]] = Field(
+        None,
+        description="Several weight sets to compare; returns channel and alignment totals per set"
+    )
+    include_touchpoints: bool = Field(True, description="Include per-touchpoint combined attribution")
 
 
 class ChannelInsightsRequest(BaseModel):
@@ -83,7 +102,9 @@ async def calculate_b2b_attribution(
             account_ids=request.account_ids,
             date_from=date_from,
             date_to=date_to,
-            attribution_weights=request.attribution_weights
+            attribution_weights=request.attribution_weights,
+            summary_top_k=request.summary_top_k,
+            summary_quantiles=request.summary_quantiles
         )
         
         return {
@@ -100,6 +121,41 @@ async def calculate_b2b_attribution(
         )
 
 
+@router.post("/b2b/reweight", response_model=Dict)
+async def reweight_b2b_attribution(request: ReweightRequest):
+    """
+    Re-combine a previous B2B attribution with new factor weights.
+    
+    Uses the factor scores cached by /b2b/calculate, so no data is reloaded
+    and no factor is recomputed. Returns combined attribution, channel
+    performance and sales-marketing alignment for the new weights.
+    """
+    try:
+        results = attribution_api.attribution_service.reweight_b2b_attribution(
+            analysis_id=request.analysis_id,
+            attribution_weights=request.attribution_weights,
+            weight_sets=request.weight_sets,
+            include_touchpoints=request.include_touchpoints
+        )
+        
+        return {
+            "status": "success",
+            "data": results,
+            "message": "B2B attribution reweighted successfully"
+        }
+        
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        attribution_api.logger.error(f"Error reweighting B2B attribution: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to reweight B2B attribution: {str(e)}"
+        )
+
+
 @router.post("/b2b/channel-insights", response_model=Dict)
 async def get_channel_performance_insights(
     request: ChannelInsightsRequest,
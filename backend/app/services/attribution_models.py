@@ -1,20 +1,515 @@
 """
 Attribution models for multi-touch attribution analysis.
 """
+import copy
+import itertools
 import math
+import os
 from abc import ABC, abstractmethod
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
 import numpy as np
 import pandas as pd
 
+from backend.app.services.markov_attribution import MarkovChainAttributionEngine
+from backend.app.services.shapley_attribution import CoalitionStatistics, ShapleyValueEngine
+from backend.app.services.touchpoint_batch import TouchpointBatch
 from backend.app.utils.logging import LoggerMixin, log_attribution_calculation
 from config.settings import get_attribution_settings
 
 
+NANOSECONDS_PER_DAY = 24 * 3600 * 10**9
+
+
+@dataclass
+class JourneyView:
+    """
+    Columnar, time-sorted view over a batch of journeys.
+    
+    Journeys are laid out back to back; journey ``j`` occupies positions
+    ``offsets[j]:offsets[j + 1]``. Per-touchpoint arrays are sorted by
+    timestamp inside each journey (ties keep input order, like ``sorted``),
+    and ``order`` maps every sorted position back to its input position.
+    """
+    offsets: np.ndarray
+    lengths: np.ndarray
+    journey_index: np.ndarray
+    position: np.ndarray
+    order: np.ndarray
+    ids: np.ndarray
+    timestamps: np.ndarray
+    channel_codes: np.ndarray
+    conversion_values: np.ndarray
+    channel_names: Optional[Sequence[str]] = None
+    input_touchpoint_count: Optional[int] = None
+    
+    @property
+    def journey_count(self) -> int:
+        return len(self.lengths)
+    
+    @property
+    def touchpoint_count(self) -> int:
+        return len(self.order)
+    
+    def element_lengths(self) -> np.ndarray:
+        """Journey length for every sorted touchpoint."""
+        return self.lengths[self.journey_index]
+    
+    def element_values(self) -> np.ndarray:
+        """Conversion value for every sorted touchpoint."""
+        return self.conversion_values[self.journey_index]
+    
+    def segment_sum(self, values: np.ndarray) -> np.ndarray:
+        """Sum a per-touchpoint array within each journey."""
+        return np.bincount(
+            self.journey_index, weights=values, minlength=self.journey_count
+        )
+    
+    def scatter(self, sorted_values: np.ndarray) -> np.ndarray:
+        """
+        Map an array in sorted order back to the caller's input order.
+        
+        Input touchpoints cut by a JourneyWindow come back as zeros.
+        """
+        if self.input_touchpoint_count is None:
+            result = np.empty_like(sorted_values)
+        else:
+            result = np.zeros(self.input_touchpoint_count, dtype=sorted_values.dtype)
+        result[self.order] = sorted_values
+        return result
+
+
+def build_journey_view(
+    offsets: np.ndarray,
+    ids: np.ndarray,
+    timestamps: np.ndarray,
+    channel_codes: np.ndarray,
+    conversion_values: Union[float, np.ndarray] = 1.0,
+    channel_names: Optional[Sequence[str]] = None
+) -> JourneyView:
+    """
+    Validate columnar journey inputs and sort every journey by timestamp once.
+    
+    Args:
+        offsets: Journey boundaries, length ``n_journeys + 1``, starting at 0
+        ids: Touchpoint IDs
+        timestamps: Touchpoint times as int64 epoch nanoseconds
+        channel_codes: Integer channel code per touchpoint
+        conversion_values: Scalar or per-journey conversion values
+        channel_names: Channel name for each channel code (data-driven weights)
+        
+    Returns:
+        JourneyView with touchpoints sorted inside each journey
+    """
+    offsets = np.asarray(offsets, dtype=np.int64)
+    ids = np.asarray(ids)
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    channel_codes = np.asarray(channel_codes, dtype=np.int64)
+    
+    if offsets.ndim != 1 or len(offsets) == 0 or offsets[0] != 0:
+        raise ValueError("offsets must be a 1-D array starting at 0")
+    if np.any(np.diff(offsets) < 0):
+        raise ValueError("offsets must be non-decreasing")
+    
+    touchpoint_count = int(offsets[-1])
+    for name, array in (('ids', ids), ('timestamps', timestamps), ('channel_codes', channel_codes)):
+        if len(array) != touchpoint_count:
+            raise ValueError(
+                f"{name} has {len(array)} entries, offsets describe {touchpoint_count}"
+            )
+    
+    lengths = np.diff(offsets)
+    journey_count = len(lengths)
+    
+    values = np.asarray(conversion_values, dtype=np.float64)
+    if values.ndim == 0:
+        values = np.full(journey_count, float(values))
+    elif len(values) != journey_count:
+        raise ValueError(
+            f"conversion_values has {len(values)} entries for {journey_count} journeys"
+        )
+    
+    journey_index = np.repeat(np.arange(journey_count), lengths)
+    # lexsort is stable, so equal timestamps keep their input order
+    order = np.lexsort((timestamps, journey_index))
+    position = np.arange(touchpoint_count) - offsets[:-1][journey_index]
+    
+    return JourneyView(
+        offsets=offsets,
+        lengths=lengths,
+        journey_index=journey_index,
+        position=position,
+        order=order,
+        ids=ids[order],
+        timestamps=timestamps[order],
+        channel_codes=channel_codes[order],
+        conversion_values=values,
+        channel_names=channel_names
+    )
+
+
+TRUNCATION_POLICIES = ('keep_last', 'keep_first', 'keep_first_and_last', 'drop')
+
+
+def segment_searchsorted(
+    values: np.ndarray,
+    lo: np.ndarray,
+    hi: np.ndarray,
+    targets: np.ndarray,
+    side: str = 'left'
+) -> np.ndarray:
+    """
+    Binary search ``targets[j]`` in every sorted segment ``values[lo[j]:hi[j]]`` at once.
+    
+    Returns:
+        Insertion position per segment, like ``np.searchsorted`` offset by ``lo``
+    """
+    lo = np.array(lo, dtype=np.int64)
+    hi = np.array(hi, dtype=np.int64)
+    while True:
+        active = lo < hi
+        if not active.any():
+            return lo
+        mid = (lo + hi) // 2
+        probe = values[np.where(active, mid, 0)]
+        go_right = active & ((probe < targets) if side == 'left' else (probe <= targets))
+        lo = np.where(go_right, mid + 1, lo)
+        hi = np.where(active & ~go_right, mid, hi)
+
+
+@dataclass
+class JourneyWindow:
+    """
+    Lookback/attribution windows and touchpoint caps applied before scoring.
+    
+    Touchpoints older than ``lookback_window_days`` before the conversion
+    (or after it) are cut. A journey whose latest remaining touch is more
+    than ``attribution_window_days`` before the conversion, or that keeps
+    fewer than ``min_touchpoints`` touches, is dropped. Journeys longer than
+    ``max_touchpoints`` are cut according to ``truncation``:
+    
+    - ``keep_last``: the most recent touches
+    - ``keep_first``: the earliest touches
+    - ``keep_first_and_last``: the first touch plus the most recent ones
+    - ``drop``: the whole journey is dropped
+    """
+    lookback_window_days: Optional[float] = None
+    attribution_window_days: Optional[float] = None
+    min_touchpoints: int = 1
+    max_touchpoints: Optional[int] = None
+    truncation: str = 'keep_last'
+    
+    def __post_init__(self):
+        if self.truncation not in TRUNCATION_POLICIES:
+            raise ValueError(
+                f"Unknown truncation policy: {self.truncation}; expected one of {TRUNCATION_POLICIES}"
+            )
+        if self.max_touchpoints is not None and self.max_touchpoints < 1:
+            raise ValueError("max_touchpoints must be at least 1")
+    
+    @classmethod
+    def from_settings(cls, truncation: str = 'keep_last') -> "JourneyWindow":
+        """Window built from the ``AttributionSettings`` limits."""
+        settings = get_attribution_settings()
+        return cls(
+            lookback_window_days=settings.lookback_window_days,
+            attribution_window_days=settings.attribution_window_days,
+            min_touchpoints=settings.min_touchpoints,
+            max_touchpoints=settings.max_touchpoints,
+            truncation=truncation
+        )
+    
+    def apply(
+        self,
+        view: JourneyView,
+        conversion_times: Optional[np.ndarray] = None
+    ) -> JourneyView:
+        """
+        Cut every journey of a sorted view to its window.
+        
+        Window edges are found by binary search over each journey's sorted
+        timestamps, so cost grows with the log of the journey length.
+        
+        Args:
+            view: Sorted journeys, e.g. from ``build_journey_view``
+            conversion_times: Conversion time per journey as int64 epoch
+                nanoseconds; defaults to each journey's last touch
+            
+        Returns:
+            JourneyView with the same journeys (dropped ones empty) that
+            scatters back to the original input positions
+        """
+        if conversion_times is not None:
+            conversion_times = np.asarray(conversion_times, dtype=np.int64)
+            if len(conversion_times) != view.journey_count:
+                raise ValueError(
+                    f"conversion_times has {len(conversion_times)} entries for {view.journey_count} journeys"
+                )
+        if view.touchpoint_count == 0:
+            return view
+        
+        start = view.offsets[:-1].copy()
+        end = view.offsets[1:].copy()
+        
+        if conversion_times is None:
+            conversion_times = view.timestamps[np.maximum(end - 1, 0)]
+        else:
+            end = segment_searchsorted(view.timestamps, start, end, conversion_times, side='right')
+        
+        if self.lookback_window_days is not None:
+            cutoff = conversion_times - int(self.lookback_window_days * NANOSECONDS_PER_DAY)
+            start = segment_searchsorted(view.timestamps, start, end, cutoff, side='left')
+        
+        if self.attribution_window_days is not None:
+            cutoff = conversion_times - int(self.attribution_window_days * NANOSECONDS_PER_DAY)
+            latest = view.timestamps[np.maximum(end - 1, 0)]
+            end = np.where((end > start) & (latest < cutoff), start, end)
+        
+        counts = end - start
+        end = np.where(counts < self.min_touchpoints, start, end)
+        counts = end - start
+        
+        head = start.copy()
+        keep_head = np.zeros(len(start), dtype=bool)
+        if self.max_touchpoints is not None:
+            over = counts > self.max_touchpoints
+            cap = self.max_touchpoints
+            if self.truncation == 'keep_last':
+                start = np.where(over, end - cap, start)
+            elif self.truncation == 'keep_first':
+                end = np.where(over, start + cap, end)
+            elif self.truncation == 'drop':
+                end = np.where(over, start, end)
+            else:
+                # The first touch survives as a one-touch head ahead of the tail
+                keep_head = over
+                start = np.where(over, end - (cap - 1), start)
+        
+        positions = np.arange(view.touchpoint_count)
+        journey_index = view.journey_index
+        keep = (positions >= start[journey_index]) & (positions < end[journey_index])
+        keep |= keep_head[journey_index] & (positions == head[journey_index])
+        kept = np.flatnonzero(keep)
+        
+        lengths = np.bincount(journey_index[kept], minlength=view.journey_count)
+        offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+        kept_journey_index = journey_index[kept]
+        
+        return JourneyView(
+            offsets=offsets,
+            lengths=lengths,
+            journey_index=kept_journey_index,
+            position=np.arange(len(kept)) - offsets[:-1][kept_journey_index],
+            order=view.order[kept],
+            ids=view.ids[kept],
+            timestamps=view.timestamps[kept],
+            channel_codes=view.channel_codes[kept],
+            conversion_values=view.conversion_values,
+            channel_names=view.channel_names,
+            input_touchpoint_count=(
+                view.touchpoint_count if view.input_touchpoint_count is None
+                else view.input_touchpoint_count
+            )
+        )
+
+
+_PATH_HASH_MULTIPLIERS = (np.uint64(0x100000001B3), np.uint64(0x9E3779B97F4A7C15))
+
+
+@dataclass
+class PathSignatureIndex:
+    """
+    Groups the journeys of a JourneyView by their time-ordered channel path.
+    
+    Paths are keyed by two independent 64-bit polynomial hashes plus the
+    path length, so distinct paths colliding is practically impossible.
+    Deduplication pays off for models that score journeys one at a time;
+    the built-in vectorized kernels are usually faster without it.
+    """
+    signatures: np.ndarray
+    representatives: np.ndarray
+    touchpoint_count: int
+    scored_touchpoint_count: int
+    
+    @classmethod
+    def build(cls, view: JourneyView) -> "PathSignatureIndex":
+        """Hash every journey's channel path and pick one journey per distinct path."""
+        hashes = np.zeros((view.journey_count, 2), dtype=np.uint64)
+        lengths = view.lengths.astype(np.uint64)
+        
+        non_empty = view.lengths > 0
+        if view.touchpoint_count:
+            codes = view.channel_codes.astype(np.uint64) + np.uint64(1)
+            max_length = int(view.lengths.max())
+            for column, multiplier in enumerate(_PATH_HASH_MULTIPLIERS):
+                # Unsigned arithmetic wraps modulo 2**64
+                powers = np.cumprod(np.full(max_length, multiplier, dtype=np.uint64))
+                hashes[non_empty, column] = np.add.reduceat(
+                    codes * powers[view.position], view.offsets[:-1][non_empty]
+                )
+        
+        # Group on one 64-bit key, then confirm with the second hash and length
+        key = hashes[:, 0] + lengths * _PATH_HASH_MULTIPLIERS[1]
+        _, representatives, signatures = np.unique(key, return_index=True, return_inverse=True)
+        signatures = signatures.ravel()
+        
+        collided = (
+            np.any(hashes[representatives, 1][signatures] != hashes[:, 1])
+            or np.any(lengths[representatives][signatures] != lengths)
+        )
+        if collided:
+            _, representatives, signatures = np.unique(
+                np.column_stack([hashes, lengths]), axis=0, return_index=True, return_inverse=True
+            )
+            signatures = signatures.ravel()
+        
+        return cls(
+            signatures=signatures,
+            representatives=representatives,
+            touchpoint_count=view.touchpoint_count,
+            scored_touchpoint_count=int(view.lengths[representatives].sum())
+        )
+    
+    @property
+    def journey_count(self) -> int:
+        return len(self.signatures)
+    
+    @property
+    def path_count(self) -> int:
+        return len(self.representatives)
+    
+    @property
+    def hit_rate(self) -> float:
+        """Share of journeys whose credit was reused from an identical path."""
+        if self.journey_count == 0:
+            return 0.0
+        return 1.0 - self.path_count / self.journey_count
+    
+    def statistics(self) -> Dict[str, float]:
+        """Journeys, distinct paths, hit rate and touchpoints actually scored."""
+        return {
+            'journey_count': self.journey_count,
+            'path_count': self.path_count,
+            'hit_rate': self.hit_rate,
+            'touchpoint_count': self.touchpoint_count,
+            'scored_touchpoint_count': self.scored_touchpoint_count
+        }
+    
+    def representative_view(self, view: JourneyView) -> JourneyView:
+        """Sub-view holding one journey per distinct path, each worth 1.0."""
+        lengths = view.lengths[self.representatives]
+        offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+        journey_index = np.repeat(np.arange(self.path_count), lengths)
+        elements = view.offsets[self.representatives][journey_index] + (
+            np.arange(offsets[-1]) - offsets[:-1][journey_index]
+        )
+        return JourneyView(
+            offsets=offsets,
+            lengths=lengths,
+            journey_index=journey_index,
+            position=view.position[elements],
+            order=view.order[elements],
+            ids=view.ids[elements],
+            timestamps=view.timestamps[elements],
+            channel_codes=view.channel_codes[elements],
+            conversion_values=np.ones(self.path_count),
+            channel_names=view.channel_names
+        )
+
+
+def parameter_grid(**axes: Sequence[float]) -> List[Dict[str, float]]:
+    """
+    Cartesian product of parameter values, e.g. for ``AttributionModel.sweep``.
+    
+    Example:
+        ``parameter_grid(half_life_days=[3, 7, 14])`` gives three grid points.
+    """
+    names = list(axes)
+    return [dict(zip(names, values)) for values in itertools.product(*axes.values())]
+
+
+@dataclass
+class ParameterSweep:
+    """
+    Credit of one model under every point of a parameter grid.
+    
+    Row ``p`` of ``credit`` is the per-touchpoint credit (input order) a
+    model configured with ``parameters[p]`` would produce; row ``p`` of
+    ``channel_credit`` is the same credit summed per channel code.
+    """
+    model_name: str
+    parameters: List[Dict[str, float]]
+    credit: np.ndarray
+    channel_credit: np.ndarray
+    channel_names: Optional[Sequence[str]] = None
+    
+    @property
+    def grid_size(self) -> int:
+        return len(self.parameters)
+    
+    def channel_summary(self) -> pd.DataFrame:
+        """One row per grid point: the parameters, then credit per channel."""
+        channel_count = self.channel_credit.shape[1]
+        if self.channel_names is not None and len(self.channel_names) == channel_count:
+            columns = [str(name) for name in self.channel_names]
+        else:
+            columns = [f"channel_{code}" for code in range(channel_count)]
+        
+        summary = pd.DataFrame(self.parameters, index=range(self.grid_size))
+        credit = pd.DataFrame(self.channel_credit, columns=columns, index=range(self.grid_size))
+        return pd.concat([summary, credit], axis=1)
+
+
+def aggregate_sorted_credit(
+    credit: np.ndarray,
+    channel_codes: np.ndarray,
+    campaign_codes: Optional[np.ndarray] = None,
+    channel_count: int = 0,
+    campaign_count: int = 0
+) -> Dict[str, np.ndarray]:
+    """
+    Sum per-touchpoint credit into dense per-channel/per-campaign credit.
+    
+    Totals are accumulated in input order, so the same touchpoint sequence
+    always reduces to bit-identical totals.
+    
+    Args:
+        credit: Credit per touchpoint
+        channel_codes: Integer channel code per touchpoint
+        campaign_codes: Optional campaign code per touchpoint (-1 for none)
+        channel_count: Minimum length of the channel array
+        campaign_count: Minimum length of the campaign array
+        
+    Returns:
+        Dictionary with a ``channel`` credit array and ``channel_touchpoints``
+        count array and, when campaign codes are given, matching ``campaign``
+        and ``campaign_touchpoints`` arrays
+    """
+    aggregates = {
+        'channel': np.bincount(channel_codes, weights=credit, minlength=channel_count),
+        'channel_touchpoints': np.bincount(channel_codes, minlength=channel_count)
+    }
+    if campaign_codes is not None:
+        present = campaign_codes >= 0
+        aggregates['campaign'] = np.bincount(
+            campaign_codes[present], weights=credit[present], minlength=campaign_count
+        )
+        aggregates['campaign_touchpoints'] = np.bincount(campaign_codes[present], minlength=campaign_count)
+    return aggregates
+
+
 class AttributionModel(ABC, LoggerMixin):
     """Abstract base class for attribution models."""
     
+    # True when relative credit depends only on the ordered channel path, so
+    # identical paths can be scored once (see PathSignatureIndex)
+    path_only: bool = False
+    
+    # Constructor parameters that ``sweep`` may vary
+    sweep_parameters: Tuple[str, ...] = ()
+    
     def __init__(self, name: str):
         self.name = name
         self.settings = get_attribution_settings()
@@ -55,9 +550,412 @@ class AttributionModel(ABC, LoggerMixin):
     def _sort_touchpoints(self, touchpoints: List[Dict]) -> List[Dict]:
         """Sort touchpoints by timestamp."""
         return sorted(touchpoints, key=lambda x: x['timestamp'])
+    
+    def calculate_attribution_batch(
+        self,
+        offsets: np.ndarray,
+        ids: np.ndarray,
+        timestamps: np.ndarray,
+        channel_codes: np.ndarray,
+        conversion_values: Union[float, np.ndarray] = 1.0,
+        channel_names: Optional[Sequence[str]] = None,
+        window: Optional[JourneyWindow] = None,
+        conversion_times: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Calculate attribution for many journeys stored in a flat columnar layout.
+        
+        Args:
+            offsets: Journey boundaries, length ``n_journeys + 1``, starting at 0
+            ids: Touchpoint IDs
+            timestamps: Touchpoint times as int64 epoch nanoseconds
+            channel_codes: Integer channel code per touchpoint
+            conversion_values: Scalar or per-journey conversion values
+            channel_names: Channel name for each channel code
+            window: Optional window/cap applied to each journey before scoring
+            conversion_times: Conversion time per journey for ``window``
+            
+        Returns:
+            Credit per touchpoint, aligned to the input arrays (0 for
+            touchpoints outside the window)
+        """
+        view = build_journey_view(
+            offsets, ids, timestamps, channel_codes, conversion_values, channel_names
+        )
+        if window is not None:
+            view = window.apply(view, conversion_times)
+        credit = self.score_view(view)
+        
+        self.logger.info(
+            "Batch attribution calculated",
+            model=self.name,
+            journey_count=view.journey_count,
+            touchpoint_count=view.touchpoint_count
+        )
+        
+        return view.scatter(credit)
+    
+    def calculate_attribution_aggregates(
+        self,
+        offsets: np.ndarray,
+        timestamps: np.ndarray,
+        channel_codes: np.ndarray,
+        conversion_values: Union[float, np.ndarray] = 1.0,
+        channel_names: Optional[Sequence[str]] = None,
+        campaign_codes: Optional[np.ndarray] = None,
+        channel_count: int = 0,
+        campaign_count: int = 0,
+        window: Optional[JourneyWindow] = None,
+        conversion_times: Optional[np.ndarray] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Reduce batch attribution straight into dense per-channel/per-campaign credit.
+        
+        Credit stays in the sorted journey layout and is summed with
+        ``bincount``; no per-touchpoint result is materialized.
+        
+        Args:
+            offsets: Journey boundaries, length ``n_journeys + 1``, starting at 0
+            timestamps: Touchpoint times as int64 epoch nanoseconds
+            channel_codes: Integer channel code per touchpoint
+            conversion_values: Scalar or per-journey conversion values
+            channel_names: Channel name for each channel code
+            campaign_codes: Optional campaign code per touchpoint (-1 for none)
+            channel_count: Minimum length of the channel array
+            campaign_count: Minimum length of the campaign array
+            window: Optional window/cap applied to each journey before scoring
+            conversion_times: Conversion time per journey for ``window``
+            
+        Returns:
+            Dictionary of ``aggregate_sorted_credit`` arrays over the
+            touchpoints kept by ``window``
+        """
+        view = build_journey_view(
+            offsets,
+            np.arange(len(timestamps)),
+            timestamps,
+            channel_codes,
+            conversion_values,
+            channel_names
+        )
+        if window is not None:
+            view = window.apply(view, conversion_times)
+        credit = self.score_view(view)
+        
+        if channel_names is not None:
+            channel_count = max(channel_count, len(channel_names))
+        return aggregate_sorted_credit(
+            credit,
+            view.channel_codes,
+            None if campaign_codes is None else np.asarray(campaign_codes, dtype=np.int64)[view.order],
+            channel_count=channel_count,
+            campaign_count=campaign_count
+        )
+    
+    def calculate_touchpoint_batch(self, batch: TouchpointBatch) -> np.ndarray:
+        """
+        Calculate attribution for a TouchpointBatch.
+        
+        Returns:
+            Credit per batch row; decode row IDs with ``batch.ids()``
+        """
+        return self.calculate_attribution_batch(
+            offsets=batch.offsets,
+            ids=batch.id_codes,
+            timestamps=batch.timestamps,
+            channel_codes=batch.channel_codes,
+            conversion_values=batch.conversion_values,
+            channel_names=batch.channel_names
+        )
+    
+    def aggregate_touchpoint_batch(self, batch: TouchpointBatch) -> Dict[str, np.ndarray]:
+        """
+        Reduce a TouchpointBatch to credit per channel and campaign code.
+        
+        Returns:
+            Dictionary with ``channel`` and ``campaign`` arrays aligned with
+            ``batch.channel_keys`` and ``batch.campaign_keys``
+        """
+        return self.calculate_attribution_aggregates(
+            offsets=batch.offsets,
+            timestamps=batch.timestamps,
+            channel_codes=batch.channel_codes,
+            conversion_values=batch.conversion_values,
+            channel_names=batch.channel_names,
+            campaign_codes=batch.campaign_codes,
+            channel_count=len(batch.channel_keys),
+            campaign_count=len(batch.campaign_keys)
+        )
+    
+    def sweep(
+        self,
+        offsets: np.ndarray,
+        timestamps: np.ndarray,
+        channel_codes: np.ndarray,
+        grid: Iterable[Dict[str, float]],
+        conversion_values: Union[float, np.ndarray] = 1.0,
+        channel_names: Optional[Sequence[str]] = None,
+        channel_count: int = 0,
+        window: Optional[JourneyWindow] = None,
+        conversion_times: Optional[np.ndarray] = None
+    ) -> ParameterSweep:
+        """
+        Calculate batch attribution for every point of a parameter grid at once.
+        
+        Journeys are sorted (and windowed) once; the model then scores all
+        grid points in one pass over the sorted data.
+        
+        Args:
+            offsets: Journey boundaries, length ``n_journeys + 1``, starting at 0
+            timestamps: Touchpoint times as int64 epoch nanoseconds
+            channel_codes: Integer channel code per touchpoint
+            grid: Parameter overrides per grid point, e.g. from ``parameter_grid``;
+                parameters a point leaves out keep this model's values
+            conversion_values: Scalar or per-journey conversion values
+            channel_names: Channel name for each channel code
+            channel_count: Minimum number of channel columns
+            window: Optional window/cap applied to each journey before scoring
+            conversion_times: Conversion time per journey for ``window``
+            
+        Returns:
+            ParameterSweep with (grid points x touchpoints) credit and
+            (grid points x channels) channel credit
+        """
+        grid = [dict(point) for point in grid]
+        variants = [self._with_parameters(point) for point in grid]
+        
+        view = build_journey_view(
+            offsets,
+            np.arange(len(timestamps)),
+            timestamps,
+            channel_codes,
+            conversion_values,
+            channel_names
+        )
+        if window is not None:
+            view = window.apply(view, conversion_times)
+        sorted_credit = self._calculate_sweep_credit(view, variants)
+        
+        if channel_names is not None:
+            channel_count = max(channel_count, len(channel_names))
+        channel_count = max(channel_count, int(view.channel_codes.max(initial=-1)) + 1)
+        # One bincount over all grid points, each in its own block of channels
+        grid_channels = view.channel_codes[None, :] + channel_count * np.arange(len(grid))[:, None]
+        channel_credit = np.bincount(
+            grid_channels.ravel(), weights=sorted_credit.ravel(), minlength=len(grid) * channel_count
+        ).reshape(len(grid), channel_count)
+        
+        input_count = (
+            view.touchpoint_count if view.input_touchpoint_count is None
+            else view.input_touchpoint_count
+        )
+        credit = np.zeros((len(grid), input_count))
+        credit[:, view.order] = sorted_credit
+        
+        self.logger.info(
+            "Parameter sweep calculated",
+            model=self.name,
+            grid_size=len(grid),
+            journey_count=view.journey_count,
+            touchpoint_count=view.touchpoint_count
+        )
+        
+        return ParameterSweep(
+            model_name=self.name,
+            parameters=grid,
+            credit=credit,
+            channel_credit=channel_credit,
+            channel_names=channel_names
+        )
+    
+    def _with_parameters(self, parameters: Dict[str, float]) -> "AttributionModel":
+        """Copy of this model with some sweepable parameters replaced."""
+        unknown = set(parameters) - set(self.sweep_parameters)
+        if unknown:
+            raise ValueError(
+                f"Cannot sweep {sorted(unknown)} on {self.name}; "
+                f"sweepable parameters: {list(self.sweep_parameters)}"
+            )
+        variant = copy.copy(self)
+        for key, value in parameters.items():
+            setattr(variant, key, float(value))
+        return variant
+    
+    def _calculate_sweep_credit(
+        self,
+        view: JourneyView,
+        variants: List["AttributionModel"]
+    ) -> np.ndarray:
+        """
+        Credit in sorted order for each model variant, one row per variant.
+        
+        The default scores the variants one after another; models with
+        sweepable parameters vectorize across the grid.
+        """
+        credit = np.zeros((len(variants), view.touchpoint_count))
+        for row, variant in enumerate(variants):
+            credit[row] = variant._calculate_view_credit(view)
+        return credit
+    
+    @property
+    def deduplicates_paths(self) -> bool:
+        """Whether batch scoring reuses credit across identical channel paths."""
+        return self.path_only and self.settings.path_deduplication
+    
+    def score_view(
+        self,
+        view: JourneyView,
+        path_index: Optional[PathSignatureIndex] = None
+    ) -> np.ndarray:
+        """
+        Credit in sorted order, scoring each distinct path once for path-only models.
+        
+        Args:
+            view: Sorted journeys
+            path_index: Prebuilt index to share across several models
+        """
+        if not self.deduplicates_paths:
+            return self._calculate_view_credit(view)
+        
+        if path_index is None:
+            path_index = PathSignatureIndex.build(view)
+        unit_credit = self._calculate_view_credit(path_index.representative_view(view))
+        
+        representative_offsets = np.concatenate([
+            [0], np.cumsum(view.lengths[path_index.representatives])
+        ])
+        source = representative_offsets[path_index.signatures[view.journey_index]] + view.position
+        
+        self.logger.debug(
+            "Path deduplication applied",
+            model=self.name,
+            **path_index.statistics()
+        )
+        
+        return unit_credit[source] * view.element_values()
+    
+    def _calculate_view_credit(self, view: JourneyView) -> np.ndarray:
+        """
+        Calculate credit for every touchpoint of a JourneyView, in sorted order.
+        
+        The default runs the per-journey path; built-in models override this
+        with vectorized segment operations.
+        """
+        credit = np.zeros(view.touchpoint_count)
+        for j in range(view.journey_count):
+            start, end = view.offsets[j], view.offsets[j + 1]
+            # Sorted positions double as IDs so duplicate IDs cannot collide
+            touchpoints = [
+                {
+                    'id': k,
+                    'timestamp': pd.Timestamp(int(view.timestamps[k])),
+                    'channel_id': int(view.channel_codes[k]),
+                    'channel_name': _channel_name(view, k)
+                }
+                for k in range(start, end)
+            ]
+            if not touchpoints:
+                continue
+            attribution = self.calculate_attribution(touchpoints, view.conversion_values[j])
+            for k, weight in attribution.items():
+                credit[k] = weight
+        return credit
+
+
+def _channel_name(view: JourneyView, k: int) -> str:
+    """Resolve the channel name of sorted touchpoint ``k``."""
+    if view.channel_names is None:
+        return 'unknown'
+    return view.channel_names[view.channel_codes[k]]
+
+
+WEIGHT_TEMPLATE_CACHE_SIZE = 1024
+
+
+@lru_cache(maxsize=WEIGHT_TEMPLATE_CACHE_SIZE)
+def _cached_weight_template(model_class: type, params: Tuple, length: int) -> np.ndarray:
+    """Build and memoize one read-only weight template."""
+    template = model_class._build_weight_template(length, *params)
+    template.setflags(write=False)
+    return template
+
+
+def weight_template_cache_info():
+    """Hit/miss statistics of the shared weight-template cache."""
+    return _cached_weight_template.cache_info()
+
+
+class PositionBasedAttribution(AttributionModel):
+    """
+    Base class for models whose relative credit depends only on position.
+    
+    Relative weights for a journey of a given length are built once per
+    (model, parameters, length) and cached; the batch path then scatters each
+    template into all journeys of that length at once.
+    """
+    
+    path_only = True
+    
+    def _weight_template_params(self) -> Tuple:
+        """Model parameters that the weight template depends on."""
+        return ()
+    
+    @classmethod
+    @abstractmethod
+    def _build_weight_template(cls, length: int, *params: float) -> np.ndarray:
+        """Relative credit for each position of a journey of ``length``."""
+    
+    def weight_template(self, length: int) -> np.ndarray:
+        """Cached relative credit for each position of a journey of ``length``."""
+        return _cached_weight_template(type(self), self._weight_template_params(), int(length))
+    
+    def _calculate_view_credit(self, view: JourneyView) -> np.ndarray:
+        """Scatter cached templates into all journeys of each length in bulk."""
+        credit = np.zeros(view.touchpoint_count)
+        
+        journeys_by_length = np.argsort(view.lengths, kind='stable')
+        sorted_lengths = view.lengths[journeys_by_length]
+        boundaries = np.flatnonzero(np.diff(sorted_lengths)) + 1
+        
+        for group in np.split(journeys_by_length, boundaries):
+            if len(group) == 0:
+                continue
+            length = int(view.lengths[group[0]])
+            if length == 0:
+                continue
+            positions = view.offsets[group][:, None] + np.arange(length)
+            credit[positions] = view.conversion_values[group][:, None] * self.weight_template(length)
+        
+        return credit
+    
+    def _calculate_sweep_credit(
+        self,
+        view: JourneyView,
+        variants: List[AttributionModel]
+    ) -> np.ndarray:
+        """Scatter a (variants x length) stack of templates per journey length."""
+        credit = np.zeros((len(variants), view.touchpoint_count))
+        
+        journeys_by_length = np.argsort(view.lengths, kind='stable')
+        sorted_lengths = view.lengths[journeys_by_length]
+        boundaries = np.flatnonzero(np.diff(sorted_lengths)) + 1
+        
+        for group in np.split(journeys_by_length, boundaries):
+            if len(group) == 0:
+                continue
+            length = int(view.lengths[group[0]])
+            if length == 0:
+                continue
+            templates = np.stack([variant.weight_template(length) for variant in variants])
+            positions = view.offsets[group][:, None] + np.arange(length)
+            credit[:, positions] = (
+                view.conversion_values[group][None, :, None] * templates[:, None, :]
+            )
+        
+        return credit
 
 
-class FirstTouchAttribution(AttributionModel):
+class FirstTouchAttribution(PositionBasedAttribution):
     """First-touch attribution model - gives 100% credit to first touchpoint."""
     
     def __init__(self):
@@ -85,9 +983,15 @@ class FirstTouchAttribution(AttributionModel):
         )
         
         return attribution
+    
+    @classmethod
+    def _build_weight_template(cls, length: int) -> np.ndarray:
+        template = np.zeros(length)
+        template[0] = 1.0
+        return template
 
 
-class LastTouchAttribution(AttributionModel):
+class LastTouchAttribution(PositionBasedAttribution):
     """Last-touch attribution model - gives 100% credit to last touchpoint."""
     
     def __init__(self):
@@ -115,9 +1019,15 @@ class LastTouchAttribution(AttributionModel):
         )
         
         return attribution
+    
+    @classmethod
+    def _build_weight_template(cls, length: int) -> np.ndarray:
+        template = np.zeros(length)
+        template[-1] = 1.0
+        return template
 
 
-class LinearAttribution(AttributionModel):
+class LinearAttribution(PositionBasedAttribution):
     """Linear attribution model - distributes credit equally across all touchpoints."""
     
     def __init__(self):
@@ -142,11 +1052,17 @@ class LinearAttribution(AttributionModel):
         )
         
         return attribution
+    
+    @classmethod
+    def _build_weight_template(cls, length: int) -> np.ndarray:
+        return np.full(length, 1.0 / length)
 
 
 class TimeDecayAttribution(AttributionModel):
     """Time-decay attribution model - gives more credit to touchpoints closer to conversion."""
     
+    sweep_parameters = ('half_life_days',)
+    
     def __init__(self, half_life_days: Optional[int] = None):
         super().__init__("time_decay")
         self.half_life_days = half_life_days or self.settings.time_decay_half_life
@@ -194,14 +1110,65 @@ class TimeDecayAttribution(AttributionModel):
         )
         
         return attribution
+    
+    def _calculate_view_credit(self, view: JourneyView) -> np.ndarray:
+        """Exponential decay against each journey's last touchpoint."""
+        if view.touchpoint_count == 0:
+            return np.zeros(0)
+        
+        last_position = view.offsets[1:] - 1
+        conversion_time = view.timestamps[last_position[view.journey_index]]
+        days_to_conversion = np.maximum(
+            0.0, (conversion_time - view.timestamps) / NANOSECONDS_PER_DAY
+        )
+        weights = np.power(2.0, -days_to_conversion / self.half_life_days)
+        
+        total_weight = view.segment_sum(weights)[view.journey_index]
+        credit = np.zeros(view.touchpoint_count)
+        nonzero = total_weight != 0
+        credit[nonzero] = (
+            weights[nonzero] / total_weight[nonzero]
+        ) * view.element_values()[nonzero]
+        return credit
+    
+    def _calculate_sweep_credit(
+        self,
+        view: JourneyView,
+        variants: List[AttributionModel]
+    ) -> np.ndarray:
+        """Decay weights for every half-life from one days-to-conversion array."""
+        half_lives = np.array([variant.half_life_days for variant in variants], dtype=np.float64)
+        if np.any(half_lives <= 0):
+            raise ValueError("half_life_days must be positive")
+        if view.touchpoint_count == 0:
+            return np.zeros((len(variants), 0))
+        
+        last_position = view.offsets[1:] - 1
+        conversion_time = view.timestamps[last_position[view.journey_index]]
+        days_to_conversion = np.maximum(
+            0.0, (conversion_time - view.timestamps) / NANOSECONDS_PER_DAY
+        )
+        weights = np.power(2.0, -days_to_conversion[None, :] / half_lives[:, None])
+        
+        # Segment sums for all half-lives in one bincount over stacked journeys
+        grid_journeys = view.journey_index[None, :] + view.journey_count * np.arange(len(variants))[:, None]
+        total_weight = np.bincount(
+            grid_journeys.ravel(), weights=weights.ravel(), minlength=len(variants) * view.journey_count
+        ).reshape(len(variants), view.journey_count)[:, view.journey_index]
+        
+        credit = np.zeros_like(weights)
+        np.divide(weights, total_weight, out=credit, where=total_weight != 0)
+        return credit * view.element_values()[None, :]
 
 
-class UShapedAttribution(AttributionModel):
+class UShapedAttribution(PositionBasedAttribution):
     """
     U-shaped attribution model - gives more credit to first and last touchpoints,
     distributes remaining credit equally among middle touchpoints.
     """
     
+    sweep_parameters = ('first_touch_weight', 'last_touch_weight', 'middle_weight')
+    
     def __init__(
         self,
         first_touch_weight: Optional[float] = None,
@@ -257,14 +1224,42 @@ class UShapedAttribution(AttributionModel):
         )
         
         return attribution
+    
+    def _weight_template_params(self) -> Tuple:
+        return (self.first_touch_weight, self.last_touch_weight, self.middle_weight)
+    
+    @classmethod
+    def _build_weight_template(
+        cls,
+        length: int,
+        first_touch_weight: float,
+        last_touch_weight: float,
+        middle_weight: float
+    ) -> np.ndarray:
+        if length == 1:
+            return np.ones(1)
+        if length == 2:
+            return np.full(2, 0.5)
+        
+        template = np.full(length, middle_weight / (length - 2))
+        template[0] = first_touch_weight
+        template[-1] = last_touch_weight
+        return template
 
 
-class WShapedAttribution(AttributionModel):
+class WShapedAttribution(PositionBasedAttribution):
     """
     W-shaped attribution model - gives credit to first touch, lead creation, 
     opportunity creation, and distributes remaining among other touchpoints.
     """
     
+    sweep_parameters = (
+        'first_touch_weight',
+        'lead_creation_weight',
+        'opportunity_creation_weight',
+        'middle_weight'
+    )
+    
     def __init__(
         self,
         first_touch_weight: Optional[float] = None,
@@ -336,16 +1331,59 @@ class WShapedAttribution(AttributionModel):
         )
         
         return attribution
+    
+    def _weight_template_params(self) -> Tuple:
+        return (
+            self.first_touch_weight,
+            self.lead_creation_weight,
+            self.opportunity_creation_weight,
+            self.middle_weight
+        )
+    
+    @classmethod
+    def _build_weight_template(
+        cls,
+        length: int,
+        first_touch_weight: float,
+        lead_creation_weight: float,
+        opportunity_creation_weight: float,
+        middle_weight: float
+    ) -> np.ndarray:
+        """
+        Position weights for one journey length.
+        
+        Assumes touchpoint IDs are unique within a journey, so the key
+        touchpoints are identified by position alone.
+        """
+        # Journeys of one or two touchpoints fall back to U-shaped
+        if length == 1:
+            return np.ones(1)
+        if length == 2:
+            return np.full(2, 0.5)
+        
+        template = np.zeros(length)
+        key_positions = {0, length // 3, length // 2}
+        other_count = length - len(key_positions)
+        if other_count:
+            template[:] = middle_weight / other_count
+        
+        template[0] = first_touch_weight
+        template[length // 3] = lead_creation_weight
+        if length // 2 != length // 3:
+            template[length // 2] = opportunity_creation_weight
+        return template
 
 
-class DataDrivenAttribution(AttributionModel):
+class ChannelWeightedAttribution(AttributionModel):
     """
-    Data-driven attribution model using machine learning to determine optimal weights.
-    This is a simplified implementation using conversion likelihood.
+    Base class for models that weight touchpoints by a per-channel lookup table.
+    
+    Subclasses populate ``channel_weights`` (lower-case channel name to weight);
+    scoring normalizes those weights within each journey.
     """
     
-    def __init__(self):
-        super().__init__("data_driven")
+    path_only = True
+    channel_weights: Dict[str, float] = {}
     
     def calculate_attribution(
         self,
@@ -353,31 +1391,17 @@ class DataDrivenAttribution(AttributionModel):
         conversion_value: float = 1.0
     ) -> Dict[str, float]:
         """
-        Calculate data-driven attribution based on channel performance.
+        Weight each touchpoint by its channel and normalize within the journey.
         
-        This is a simplified implementation that weights channels by their
-        historical conversion rates.
+        Channels missing from ``channel_weights`` get a neutral weight of 1.0.
         """
         if not self._validate_touchpoints(touchpoints):
             return {}
         
-        # For now, use a simplified approach based on channel type
-        # In a real implementation, this would use ML models trained on historical data
-        
-        channel_weights = {
-            'organic_search': 1.2,
-            'paid_search': 1.1,
-            'social': 0.9,
-            'email': 1.0,
-            'direct': 1.3,
-            'referral': 1.0,
-            'display': 0.8
-        }
-        
         weights = []
         for tp in touchpoints:
             channel_name = tp.get('channel_name', 'unknown')
-            weight = channel_weights.get(channel_name.lower(), 1.0)
+            weight = self.channel_weights.get(channel_name.lower(), 1.0)
             weights.append(weight)
         
         # Normalize weights
@@ -390,12 +1414,168 @@ class DataDrivenAttribution(AttributionModel):
             attribution[tp['id']] = (weights[i] / total_weight) * conversion_value
         
         self.logger.info(
-            "Data-driven attribution calculated",
+            "Channel-weighted attribution calculated",
+            model=self.name,
             touchpoint_count=len(touchpoints),
             total_weight=total_weight
         )
         
         return attribution
+    
+    def _calculate_view_credit(self, view: JourneyView) -> np.ndarray:
+        """Normalize channel weights within each journey."""
+        if view.channel_names is None:
+            weights = np.ones(view.touchpoint_count)
+        else:
+            code_weights = np.array([
+                self.channel_weights.get(str(name).lower(), 1.0)
+                for name in view.channel_names
+            ])
+            weights = code_weights[view.channel_codes]
+        
+        total_weight = view.segment_sum(weights)[view.journey_index]
+        credit = np.zeros(view.touchpoint_count)
+        nonzero = total_weight != 0
+        credit[nonzero] = (
+            weights[nonzero] / total_weight[nonzero]
+        ) * view.element_values()[nonzero]
+        return credit
+
+
+MARKOV_MODEL_CACHE_SIZE = 8
+
+
+@lru_cache(maxsize=MARKOV_MODEL_CACHE_SIZE)
+def _cached_markov_engine(path: str, modified_ns: int, size: int) -> MarkovChainAttributionEngine:
+    """Load and memoize a saved Markov engine; a rewritten file gets a new key."""
+    return MarkovChainAttributionEngine.load(path)
+
+
+def _load_markov_engine(path: str) -> MarkovChainAttributionEngine:
+    """Saved Markov engine at ``path``, decompressed once per file version."""
+    stat = os.stat(path)
+    return _cached_markov_engine(os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+
+class DataDrivenAttribution(ChannelWeightedAttribution):
+    """
+    Data-driven attribution model weighting channels by Markov-chain removal effects.
+    
+    Until a transition matrix has been fitted (or loaded from
+    ``data_driven_model_path``), channels fall back to fixed prior weights.
+    Loaded engines are shared between instances, so ``fit`` continues from
+    a copy instead of modifying them.
+    Scoring is a per-channel weight lookup normalized within each journey.
+    """
+    
+    # Prior weights used until a Markov model has been fitted
+    channel_weights = {
+        'organic_search': 1.2,
+        'paid_search': 1.1,
+        'social': 0.9,
+        'email': 1.0,
+        'direct': 1.3,
+        'referral': 1.0,
+        'display': 0.8
+    }
+    
+    def __init__(self, markov_engine: Optional[MarkovChainAttributionEngine] = None):
+        super().__init__("data_driven")
+        
+        if markov_engine is None and self.settings.data_driven_model_path:
+            markov_engine = _load_markov_engine(self.settings.data_driven_model_path)
+        
+        self.markov_engine = markov_engine
+        if markov_engine is not None and markov_engine.is_fitted:
+            self.channel_weights = markov_engine.channel_weights()
+    
+    def fit(
+        self,
+        journey_chunks: Iterable[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]],
+        channel_names: Sequence[str]
+    ) -> "DataDrivenAttribution":
+        """
+        Fit channel weights from historical journeys, one chunk at a time.
+        
+        Args:
+            journey_chunks: Iterable of ``(offsets, timestamps, channel_codes, converted)``
+                chunks in the columnar batch layout
+            channel_names: Channel name for each channel code
+            
+        Returns:
+            The fitted model
+        """
+        engine = (
+            copy.deepcopy(self.markov_engine) if self.markov_engine is not None
+            else MarkovChainAttributionEngine()
+        )
+        engine_codes = engine.channel_codes_for(channel_names)
+        
+        for offsets, timestamps, channel_codes, converted in journey_chunks:
+            view = build_journey_view(
+                offsets, np.arange(len(timestamps)), timestamps, channel_codes
+            )
+            engine.partial_fit(view.offsets, engine_codes[view.channel_codes], converted)
+        
+        engine.solve()
+        self.markov_engine = engine
+        self.channel_weights = engine.channel_weights()
+        return self
+
+
+class ShapleyAttribution(ChannelWeightedAttribution):
+    """
+    Shapley-value attribution over channel coalitions.
+    
+    Coalition statistics are aggregated once per dataset by ``fit``; each
+    channel's Shapley value then serves as its weight for every journey.
+    Negative Shapley values are clipped to zero. Until fitted, all channels
+    weigh the same.
+    """
+    
+    def __init__(self, shapley_engine: Optional[ShapleyValueEngine] = None):
+        super().__init__("shapley")
+        self.shapley_engine = shapley_engine or ShapleyValueEngine(
+            exact_max_channels=self.settings.shapley_exact_max_channels,
+            error_tolerance=self.settings.shapley_error_tolerance,
+            max_permutations=self.settings.shapley_max_permutations,
+            random_seed=self.settings.shapley_random_seed
+        )
+        self.coalition_statistics: Optional[CoalitionStatistics] = None
+        self.shapley_values: Optional[Dict[str, float]] = None
+    
+    def fit(
+        self,
+        journey_chunks: Iterable[Tuple[np.ndarray, np.ndarray, np.ndarray]],
+        channel_names: Sequence[str]
+    ) -> "ShapleyAttribution":
+        """
+        Aggregate coalition statistics and compute channel Shapley values.
+        
+        Args:
+            journey_chunks: Iterable of ``(offsets, channel_codes, converted)`` chunks
+            channel_names: Channel name for each channel code
+            
+        Returns:
+            The fitted model
+        """
+        statistics = CoalitionStatistics(channel_names)
+        for offsets, channel_codes, converted in journey_chunks:
+            statistics.partial_fit(offsets, channel_codes, converted)
+        
+        values = self.shapley_engine.calculate(statistics)
+        
+        self.coalition_statistics = statistics
+        self.shapley_values = dict(zip(statistics.channel_names, values.tolist()))
+        
+        # Scale so the average positive channel weighs 1.0, like unseen channels
+        positive = values[values > 0]
+        scale = positive.mean() if len(positive) else 1.0
+        self.channel_weights = {
+            name: max(0.0, value) / scale
+            for name, value in self.shapley_values.items()
+        }
+        return self
 
 
 class AttributionModelFactory:
@@ -409,8 +1589,13 @@ class AttributionModelFactory:
         'u_shaped': UShapedAttribution,
         'w_shaped': WShapedAttribution,
         'data_driven': DataDrivenAttribution,
+        'shapley': ShapleyAttribution,
     }
     
+    # Weigh every channel equally until fitted (matching ``linear``), so they
+    # are only created on request, not in default model sets
+    _fit_required = {'shapley'}
+    
     @classmethod
     def create_model(cls, model_name: str, **kwargs) -> AttributionModel:
         """Create an attribution model by name."""
@@ -425,10 +1610,127 @@ class AttributionModelFactory:
         """Get list of available attribution models."""
         return list(cls._models.keys())
     
+    @classmethod
+    def get_default_models(cls) -> List[str]:
+        """Get the models usable without fitting, as compared by default."""
+        return [name for name in cls._models if name not in cls._fit_required]
+    
     @classmethod
     def create_all_models(cls) -> Dict[str, AttributionModel]:
-        """Create instances of all available models."""
-        return {name: cls.create_model(name) for name in cls._models.keys()}
+        """Create instances of all models usable without fitting."""
+        return {name: cls.create_model(name) for name in cls.get_default_models()}
+
+
+def touchpoints_to_view(
+    touchpoints: List[Dict],
+    conversion_value: float = 1.0
+) -> JourneyView:
+    """
+    Convert one journey of touchpoint dictionaries into a sorted JourneyView.
+    
+    Channel codes are assigned per distinct ``channel_id``; the first
+    ``channel_name`` seen for a channel becomes its name.
+    """
+    channel_codes = {}
+    channel_names = []
+    codes = np.empty(len(touchpoints), dtype=np.int64)
+    for i, tp in enumerate(touchpoints):
+        channel_id = tp['channel_id']
+        if channel_id not in channel_codes:
+            channel_codes[channel_id] = len(channel_names)
+            channel_names.append(tp.get('channel_name', 'unknown'))
+        codes[i] = channel_codes[channel_id]
+    
+    ids = np.empty(len(touchpoints), dtype=object)
+    ids[:] = [tp['id'] for tp in touchpoints]
+    
+    return build_journey_view(
+        offsets=np.array([0, len(touchpoints)]),
+        ids=ids,
+        timestamps=np.array(
+            [pd.Timestamp(tp['timestamp']).value for tp in touchpoints], dtype=np.int64
+        ),
+        channel_codes=codes,
+        conversion_values=conversion_value,
+        channel_names=channel_names
+    )
+
+
+class MultiModelAttributionEngine(LoggerMixin):
+    """
+    Evaluate several attribution models over one shared, pre-sorted JourneyView.
+    
+    Journeys are validated and sorted once; every model then reads the same
+    view, and results land in a preallocated (touchpoints x models) matrix.
+    """
+    
+    def __init__(self, models: Optional[List[str]] = None):
+        if models is None:
+            models = AttributionModelFactory.get_default_models()
+        
+        self.models: Dict[str, AttributionModel] = {}
+        for model_name in models:
+            try:
+                self.models[model_name] = AttributionModelFactory.create_model(model_name)
+            except ValueError as e:
+                self.logger.warning("Skipping attribution model", model=model_name, error=str(e))
+    
+    @property
+    def model_names(self) -> List[str]:
+        return list(self.models.keys())
+    
+    def calculate_view(self, view: JourneyView) -> Tuple[np.ndarray, List[str]]:
+        """
+        Calculate credit for every model over a JourneyView.
+        
+        Returns:
+            Tuple of (credit matrix in input order, model names per column).
+            Models that fail are logged and left out.
+        """
+        sorted_credit = np.zeros((view.touchpoint_count, len(self.models)))
+        computed = []
+        # One path index serves every path-only model
+        path_index = None
+        if any(model.deduplicates_paths for model in self.models.values()):
+            path_index = PathSignatureIndex.build(view)
+        
+        for model_name, model in self.models.items():
+            try:
+                sorted_credit[:, len(computed)] = model.score_view(view, path_index)
+                computed.append(model_name)
+            except Exception as e:
+                self.logger.error(
+                    "Attribution model failed", model=model_name, error=str(e)
+                )
+        
+        credit = np.empty((view.touchpoint_count, len(computed)))
+        credit[view.order] = sorted_credit[:, :len(computed)]
+        return credit, computed
+    
+    def compare(
+        self,
+        touchpoints: List[Dict],
+        conversion_value: float = 1.0
+    ) -> pd.DataFrame:
+        """Compare all configured models on a single journey."""
+        if not self.models:
+            return pd.DataFrame()
+        
+        validator = next(iter(self.models.values()))
+        if not validator._validate_touchpoints(touchpoints):
+            return pd.DataFrame()
+        
+        view = touchpoints_to_view(touchpoints, conversion_value)
+        credit, model_names = self.calculate_view(view)
+        if not model_names:
+            return pd.DataFrame()
+        
+        df = pd.DataFrame(
+            credit,
+            index=pd.Index(view.scatter(view.ids), name='touchpoint_id'),
+            columns=pd.Index(model_names, name='model')
+        )
+        return df.sort_index(axis=0).sort_index(axis=1)
 
 
 def compare_attribution_models(
@@ -442,33 +1744,10 @@ def compare_attribution_models(
     Args:
         touchpoints: List of touchpoint dictionaries
         conversion_value: Value of the conversion
-        models: List of model names to compare (None for all)
+        models: List of model names to compare (None for all models usable without fitting)
         
     Returns:
         DataFrame with attribution results by model and touchpoint
     """
-    if models is None:
-        models = AttributionModelFactory.get_available_models()
-    
-    results = []
-    
-    for model_name in models:
-        try:
-            model = AttributionModelFactory.create_model(model_name)
-            attribution = model.calculate_attribution(touchpoints, conversion_value)
-            
-            for tp_id, weight in attribution.items():
-                results.append({
-                    'model': model_name,
-                    'touchpoint_id': tp_id,
-                    'attribution_weight': weight
-                })
-        except Exception as e:
-            # Log error but continue with other models
-            pass
-    
-    if not results:
-        return pd.DataFrame()
-    
-    df = pd.DataFrame(results)
-    return df.pivot(index='touchpoint_id', columns='model', values='attribution_weight').fillna(0)
\ No newline at end of file
+    engine = MultiModelAttributionEngine(models)
+    return engine.compare(touchpoints, conversion_value)
@@ -2,6 +2,8 @@
 Attribution service for B2B marketing attribution analysis.
 """
 import asyncio
+import uuid
+from collections import OrderedDict
 from datetime import datetime
 from typing import Dict, List, Optional
 from dataclasses import asdict
@@ -15,6 +17,11 @@ from backend.app.services.b2b_attribution_engine import (
     OpportunityData,
     TouchpointData
 )
+from backend.app.services.columnar_b2b_attribution import (
+    ALIGNMENT_GROUPS,
+    B2BFactorAnalysis,
+    ColumnarB2BAttributionEngine
+)
 from backend.app.models.touchpoint import Touchpoint
 from backend.app.models.customer import Customer
 from backend.app.models.conversion import Conversion
@@ -23,6 +30,7 @@ from backend.app.utils.logging import LoggerMixin
 from backend.app.core.database import AsyncSession
 from sqlalchemy.orm import selectinload
 from sqlalchemy import select
+from config.settings import get_attribution_settings
 
 
 class B2BAttributionService(LoggerMixin):
@@ -34,6 +42,10 @@ class B2BAttributionService(LoggerMixin):
     def __init__(self):
         self.engine = B2BMarketingAttributionEngine()
         self.analyzer = B2BAttributionAnalyzer(self.engine)
+        self.columnar_engine = ColumnarB2BAttributionEngine(self.engine)
+        # Factor matrices of recent analyses, most recently used last
+        self._analyses: "OrderedDict[str, B2BFactorAnalysis]" = OrderedDict()
+        self.analysis_cache_size = get_attribution_settings().b2b_analysis_cache_size
     
     async def calculate_b2b_attribution(
         self,
@@ -41,7 +53,9 @@ class B2BAttributionService(LoggerMixin):
         account_ids: Optional[List[str]] = None,
         date_from: Optional[datetime] = None,
         date_to: Optional[datetime] = None,
-        attribution_weights: Optional[Dict[str, float]] = None
+        attribution_weights: Optional[Dict[str, float]] = None,
+        summary_top_k: Optional[int] = None,
+        summary_quantiles: Optional[List[float]] = None
     ) -> Dict[str, any]:
         """
         Calculate comprehensive B2B attribution for specified accounts and date range.
@@ -52,6 +66,8 @@ class B2BAttributionService(LoggerMixin):
             date_from: Start date for analysis
             date_to: End date for analysis
             attribution_weights: Custom weights for attribution factors
+            summary_top_k: Top contributing touchpoints in the summary
+            summary_quantiles: Touchpoint fractions for the summary's credit shares
             
         Returns:
             Comprehensive B2B attribution results
@@ -72,30 +88,29 @@ class B2BAttributionService(LoggerMixin):
                 date_to=date_to
             )
             
-            # Calculate attribution using B2B engine
-            attribution_results = self.engine.b2b_specific_attribution(
+            # Calculate attribution factors once and keep them for reweighting
+            analysis = self.columnar_engine.analyze(
                 lead_data=lead_data,
                 opportunity_data=opportunity_data,
                 touchpoint_data=touchpoint_data
             )
-            
-            # Add analysis insights
-            channel_analysis = self.analyzer.analyze_channel_performance(
-                attribution_results=attribution_results['combined_b2b_attribution'],
-                touchpoint_data=touchpoint_data
+            analysis_id = self._cache_analysis(analysis)
+            attribution_results = self.columnar_engine.attribution_results(
+                analysis, attribution_weights, top_k=summary_top_k, quantiles=summary_quantiles
             )
             
-            alignment_analysis = self.analyzer.analyze_sales_marketing_alignment(
-                attribution_results=attribution_results['combined_b2b_attribution'],
-                touchpoint_data=touchpoint_data
+            # Add analysis insights
+            insights = self.columnar_engine.reweight(
+                analysis, attribution_weights, include_touchpoints=False
             )
             
             # Combine all results
             comprehensive_results = {
                 **attribution_results,
-                'channel_performance': channel_analysis,
-                'sales_marketing_alignment': alignment_analysis,
+                'channel_performance': insights['channel_performance'],
+                'sales_marketing_alignment': insights['sales_marketing_alignment'],
                 'metadata': {
+                    'analysis_id': analysis_id,
                     'leads_analyzed': len(lead_data),
                     'opportunities_analyzed': len(opportunity_data),
                     'touchpoints_analyzed': len(touchpoint_data),
@@ -118,6 +133,69 @@ class B2BAttributionService(LoggerMixin):
             self.logger.error(f"Error in B2B attribution calculation: {str(e)}")
             raise
     
+    def reweight_b2b_attribution(
+        self,
+        analysis_id: str,
+        attribution_weights: Optional[Dict[str, float]] = None,
+        weight_sets: Optional[List[Dict[str, float]]] = None,
+        include_touchpoints: bool = True
+    ) -> Dict[str, any]:
+        """
+        Re-combine a cached analysis with new factor weights, without reloading data.
+        
+        Args:
+            analysis_id: ``metadata.analysis_id`` of a previous calculation
+            attribution_weights: Weights for the combined attribution
+            weight_sets: Several weight dicts to compare; returns channel and
+                alignment totals for each instead of a single result
+            include_touchpoints: Include per-touchpoint combined attribution
+                for a single weight set
+            
+        Returns:
+            Combined attribution, channel performance and alignment, or per
+            weight set channel and alignment totals for ``weight_sets``
+            
+        Raises:
+            KeyError: ``analysis_id`` is unknown or has been evicted
+            ValueError: A weight set is malformed
+        """
+        analysis = self._analyses.get(analysis_id)
+        if analysis is None:
+            raise KeyError(f"Unknown or expired analysis: {analysis_id}")
+        self._analyses.move_to_end(analysis_id)
+        
+        if weight_sets is not None:
+            batch = analysis.reweight_batch(weight_sets)
+            channels = batch['channels'].tolist()
+            return {
+                'analysis_id': analysis_id,
+                'weight_sets': weight_sets,
+                'channel_attribution': [
+                    dict(zip(channels, row)) for row in batch['channel_attribution'].tolist()
+                ],
+                'alignment_attribution': [
+                    dict(zip(ALIGNMENT_GROUPS, row)) for row in batch['alignment_attribution'].tolist()
+                ]
+            }
+        
+        results = self.columnar_engine.reweight(
+            analysis, attribution_weights, include_touchpoints=include_touchpoints
+        )
+        results['metadata'] = {
+            'analysis_id': analysis_id,
+            'touchpoints_analyzed': analysis.touchpoint_count,
+            'attribution_weights': attribution_weights
+        }
+        return results
+    
+    def _cache_analysis(self, analysis: B2BFactorAnalysis) -> str:
+        """Keep an analysis for reweighting, evicting the least recently used."""
+        analysis_id = uuid.uuid4().hex
+        self._analyses[analysis_id] = analysis
+        while len(self._analyses) > self.analysis_cache_size:
+            self._analyses.popitem(last=False)
+        return analysis_id
+    
     async def _load_b2b_data(
         self,
         db_session: AsyncSession,
@@ -377,18 +455,14 @@ class B2BAttributionService(LoggerMixin):
         if not touchpoint_data:
             return {'channels': {}, 'insights': 'No touchpoint data available for analysis'}
         
-        # Calculate attribution
-        attribution_results = self.engine.b2b_specific_attribution(
+        # Calculate attribution factors and reduce them by channel in one
+        # grouped pass; no per-touchpoint dictionaries are built
+        analysis = self.columnar_engine.analyze(
             lead_data=lead_data,
             opportunity_data=opportunity_data,
             touchpoint_data=touchpoint_data
         )
-        
-        # Analyze channel performance
-        channel_analysis = self.analyzer.analyze_channel_performance(
-            attribution_results=attribution_results['combined_b2b_attribution'],
-            touchpoint_data=touchpoint_data
-        )
+        channel_analysis = self.columnar_engine.reweight(analysis, include_touchpoints=False)['channel_performance']
         
         # Generate insights
         insights = self._generate_channel_insights(channel_analysis)
@@ -411,20 +485,17 @@ class B2BAttributionService(LoggerMixin):
         if not channel_analysis:
             return ["No channel data available for analysis"]
         
-        # Find best and worst performing channels
-        channels_by_roi = sorted(
-            channel_analysis.items(), 
-            key=lambda x: x[1]['roi'], 
-            reverse=True
-        )
-        
-        if channels_by_roi:
-            best_channel = channels_by_roi[0]
+        # Find best and worst performing channels; only the extremes are needed,
+        # so select them in one pass (first best, last worst on ties, as a
+        # stable descending sort would)
+        channel_items = list(channel_analysis.items())
+        if channel_items:
+            best_channel = max(channel_items, key=lambda x: x[1]['roi'])
+            worst_channel = min(reversed(channel_items), key=lambda x: x[1]['roi'])
             insights.append(
                 f"Best performing channel: {best_channel[0]} with ROI of {best_channel[1]['roi']:.2f}"
             )
             
-            worst_channel = channels_by_roi[-1]
             if worst_channel[1]['roi'] < 0:
                 insights.append(
                     f"Consider optimizing {worst_channel[0]} channel - currently showing negative ROI of {worst_channel[1]['roi']:.2f}"
@@ -470,18 +541,16 @@ class B2BAttributionService(LoggerMixin):
                 'recommendations': ['No touchpoint data available for analysis']
             }
         
-        # Calculate attribution
-        attribution_results = self.engine.b2b_specific_attribution(
+        # Calculate attribution factors and the sales/marketing split in one
+        # grouped pass; no per-touchpoint dictionaries are built
+        analysis = self.columnar_engine.analyze(
             lead_data=lead_data,
             opportunity_data=opportunity_data,
             touchpoint_data=touchpoint_data
         )
-        
-        # Analyze alignment
-        alignment_analysis = self.analyzer.analyze_sales_marketing_alignment(
-            attribution_results=attribution_results['combined_b2b_attribution'],
-            touchpoint_data=touchpoint_data
-        )
+        alignment_analysis = self.columnar_engine.reweight(
+            analysis, include_touchpoints=False
+        )['sales_marketing_alignment']
         
         # Generate recommendations
         recommendations = self._generate_alignment_recommendations(alignment_analysis)
@@ -0,0 +1,129 @@
+"""
+Attribution summaries by partial selection.
+
+A summary only needs the K largest credits and the sums of the largest and
+smallest quantile of credits, so nothing is fully sorted: top-K and
+quantile sums use ``np.partition`` (linear time), and
+only the K reported touchpoints are ordered. Ties are broken by input
+order, which is what a stable descending sort of the credits would give.
+"""
+from typing import Any, Dict, Sequence
+import numpy as np
+
+
+def top_k_indices(values: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the ``k`` largest values, largest first, ties in input order.
+    
+    Args:
+        values: 1-D array of credits
+        k: Number of indices to return (at most ``len(values)``)
+    """
+    values = np.asarray(values, dtype=np.float64)
+    k = min(k, len(values))
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    
+    threshold = np.partition(values, len(values) - k)[len(values) - k]
+    above = np.flatnonzero(values > threshold)
+    # Fill the remaining places with the earliest values equal to the threshold
+    tied = np.flatnonzero(values == threshold)[:k - len(above)]
+    selected = np.concatenate([above, tied])
+    return selected[np.lexsort((selected, -values[selected]))]
+
+
+def extreme_sums(values: np.ndarray, count: int) -> Dict[str, float]:
+    """Sums of the ``count`` largest and ``count`` smallest values."""
+    values = np.asarray(values, dtype=np.float64)
+    count = min(count, len(values))
+    if count <= 0:
+        return {'top': 0.0, 'bottom': 0.0}
+    n = len(values)
+    return {
+        'top': float(np.partition(values, n - count)[n - count:].sum()),
+        'bottom': float(np.partition(values, count - 1)[:count].sum())
+    }
+
+
+def quantile_label(quantile: float) -> str:
+    """'20' for 0.2, used in keys such as ``top_20_percent``."""
+    return f"{quantile * 100:g}"
+
+
+def quantile_count(touchpoint_count: int, quantile: float) -> int:
+    """
+    Touchpoints in a top/bottom ``quantile`` share, at least one.
+    
+    A small epsilon keeps float error from rounding exact products down,
+    e.g. ``100 * 0.29`` is 28.999... but counts 29 touchpoints.
+    """
+    return max(1, int(np.floor(touchpoint_count * quantile + 1e-9)))
+
+
+def summarize_attribution(
+    touchpoint_ids: Sequence[Any],
+    credit: np.ndarray,
+    top_k: int = 5,
+    quantiles: Sequence[float] = (0.2,)
+) -> Dict[str, Any]:
+    """
+    Summary of per-touchpoint credit in linear time.
+    
+    Args:
+        touchpoint_ids: Touchpoint ID per credit
+        credit: Attribution credit per touchpoint
+        top_k: Number of top contributing touchpoints to report
+        quantiles: Fractions of touchpoints whose top and bottom credit
+            shares are reported (each in (0, 1])
+    
+    Returns:
+        Totals, the ``top_k`` contributing touchpoints, top/bottom sums per
+        quantile (``attribution_distribution``) and their shares of the total
+        (``quantile_shares``), and the Herfindahl concentration index of
+        credit shares (1 when one touchpoint holds all credit, 1/n when
+        credit is spread evenly)
+    """
+    credit = np.asarray(credit, dtype=np.float64)
+    if len(credit) != len(touchpoint_ids):
+        raise ValueError(f"Got {len(credit)} credits for {len(touchpoint_ids)} touchpoints")
+    if top_k < 0:
+        raise ValueError("top_k must not be negative")
+    for quantile in quantiles:
+        if not 0 < quantile <= 1:
+            raise ValueError(f"Quantiles must be in (0, 1], got {quantile}")
+    
+    touchpoint_count = len(credit)
+    if touchpoint_count == 0:
+        return {}
+    
+    total_attribution = float(credit.sum())
+    
+    def share(value: float) -> float:
+        return value / total_attribution if total_attribution else 0.0
+    
+    top = top_k_indices(credit, top_k)
+    distribution = {}
+    quantile_shares = {}
+    for quantile in quantiles:
+        label = quantile_label(quantile)
+        sums = extreme_sums(credit, quantile_count(touchpoint_count, quantile))
+        distribution[f'top_{label}_percent'] = sums['top']
+        distribution[f'bottom_{label}_percent'] = sums['bottom']
+        quantile_shares[label] = {'top': share(sums['top']), 'bottom': share(sums['bottom'])}
+    
+    return {
+        'total_attribution_value': total_attribution,
+        'touchpoint_count': touchpoint_count,
+        'average_attribution_per_touchpoint': total_attribution / touchpoint_count,
+        'top_contributing_touchpoints': [
+            {
+                'touchpoint_id': touchpoint_ids[index],
+                'attribution_value': float(credit[index]),
+                'percentage': share(float(credit[index])) * 100
+            }
+            for index in top.tolist()
+        ],
+        'attribution_distribution': distribution,
+        'quantile_shares': quantile_shares,
+        'concentration_index': float(np.square(credit / total_attribution).sum()) if total_attribution else 0.0
+    }
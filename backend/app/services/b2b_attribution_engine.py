@@ -8,10 +8,17 @@ import math
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 from dataclasses import dataclass
 from enum import Enum
 
+from backend.app.services.attribution_models import (
+    NANOSECONDS_PER_DAY,
+    JourneyWindow,
+    build_journey_view,
+    segment_searchsorted
+)
+from backend.app.services.attribution_summary import summarize_attribution
 from backend.app.utils.logging import LoggerMixin, log_attribution_calculation
 from config.settings import get_attribution_settings
 
@@ -91,6 +98,280 @@ class TouchpointData:
     sales_rep_id: Optional[str]
 
 
+@dataclass
+class AccountTouchpointIndex:
+    """
+    Touchpoint rows grouped by account, built once per attribution run.
+    
+    Account ``a`` owns ``rows[offsets[a]:offsets[a + 1]]`` in input order,
+    and the same rows in time order in ``sorted_rows`` with their times in
+    ``sorted_timestamps`` (int64 epoch nanoseconds) for range lookups.
+    """
+    account_ids: List[str]
+    account_positions: Dict[str, int]
+    offsets: np.ndarray
+    rows: np.ndarray
+    sorted_rows: np.ndarray
+    sorted_timestamps: np.ndarray
+    timestamps: np.ndarray
+    
+    @classmethod
+    def build(cls, touchpoint_data: List[TouchpointData]) -> "AccountTouchpointIndex":
+        """Group touchpoints by account with one stable sort."""
+        account_codes, account_ids = pd.factorize(
+            np.array([tp.account_id for tp in touchpoint_data], dtype=object)
+        )
+        timestamps = np.array(
+            [pd.Timestamp(tp.timestamp).value for tp in touchpoint_data], dtype=np.int64
+        )
+        
+        rows = np.argsort(account_codes, kind='stable')
+        sorted_rows = np.lexsort((timestamps, account_codes))
+        counts = np.bincount(account_codes, minlength=len(account_ids))
+        
+        return cls(
+            account_ids=list(account_ids),
+            account_positions={account_id: i for i, account_id in enumerate(account_ids)},
+            offsets=np.concatenate([[0], np.cumsum(counts)]).astype(np.int64),
+            rows=rows,
+            sorted_rows=sorted_rows,
+            sorted_timestamps=timestamps[sorted_rows],
+            timestamps=timestamps
+        )
+    
+    @property
+    def touchpoint_count(self) -> int:
+        return len(self.timestamps)
+    
+    def account_bounds(self, account_id: str) -> Tuple[int, int]:
+        """Start and end of an account's rows; empty for unknown accounts."""
+        position = self.account_positions.get(account_id)
+        if position is None:
+            return 0, 0
+        return int(self.offsets[position]), int(self.offsets[position + 1])
+    
+    def rows_for(self, account_id: str) -> np.ndarray:
+        """Touchpoint rows of an account, in input order."""
+        start, end = self.account_bounds(account_id)
+        return self.rows[start:end]
+    
+    def rows_between(
+        self,
+        account_id: str,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None
+    ) -> np.ndarray:
+        """Touchpoint rows of an account within ``[start_time, end_time]``, in time order."""
+        start, end = self.account_bounds(account_id)
+        times = self.sorted_timestamps[start:end]
+        low = 0 if start_time is None else np.searchsorted(times, pd.Timestamp(start_time).value, side='left')
+        high = len(times) if end_time is None else np.searchsorted(times, pd.Timestamp(end_time).value, side='right')
+        return self.sorted_rows[start + low:start + high]
+    
+    def check(self, touchpoint_data: List[TouchpointData]) -> None:
+        """Raise if the index was built over a different touchpoint list."""
+        if self.touchpoint_count != len(touchpoint_data):
+            raise ValueError(
+                f"Account index covers {self.touchpoint_count} touchpoints, got {len(touchpoint_data)}"
+            )
+
+
+OPEN_INTERVAL_END = np.iinfo(np.int64).max
+
+OPPORTUNITY_ASSIGNMENTS = ('lifetime', 'next_conversion')
+
+
+@dataclass
+class OpportunityIntervalIndex:
+    """
+    Opportunity intervals per account, for assigning touchpoints to opportunities.
+    
+    A conversion is an opportunity's close date, or its creation date while
+    open. With the ``'lifetime'`` assignment each opportunity covers its
+    account's history up to and including its close date, touchpoints before
+    its creation included, and open opportunities cover the whole history;
+    with ``window_days`` it instead covers the ``window_days`` up to its
+    conversion. With ``'next_conversion'`` it
+    covers the time after the previous conversion of its account up to and
+    including its own, so every touchpoint counts toward the next conversion
+    at or after it (the first in input order among simultaneous ones), and
+    ``window_days`` further limits the gap to that conversion.
+    
+    Every account's interval edges are sorted into ``boundaries``
+    (``boundaries[boundary_offsets[a]:boundary_offsets[a + 1]]`` for account
+    ``a``). Between two consecutive edges the set of covering opportunities
+    is fixed: segment ``k`` starting at ``boundaries[k]`` is covered by
+    ``segment_opportunities[segment_offsets[k]:segment_offsets[k + 1]]``. A
+    touchpoint finds its segment by binary search, so assignment costs
+    O(touchpoints log opportunities) plus the pairs produced.
+    """
+    account_positions: Dict[str, int]
+    boundary_offsets: np.ndarray
+    boundaries: np.ndarray
+    segment_offsets: np.ndarray
+    segment_opportunities: np.ndarray
+    opportunity_count: int
+    
+    @classmethod
+    def build(
+        cls,
+        opportunity_data: List[OpportunityData],
+        window_days: Optional[float] = None,
+        assignment: str = 'lifetime'
+    ) -> "OpportunityIntervalIndex":
+        """Index the intervals of ``opportunity_data``."""
+        created_times = np.array(
+            [pd.Timestamp(opp.created_date).value for opp in opportunity_data], dtype=np.int64
+        )
+        close_times = np.array(
+            [
+                OPEN_INTERVAL_END if opp.close_date is None else pd.Timestamp(opp.close_date).value
+                for opp in opportunity_data
+            ],
+            dtype=np.int64
+        )
+        return cls.from_columns(
+            [opp.account_id for opp in opportunity_data], created_times, close_times, window_days, assignment
+        )
+    
+    @classmethod
+    def from_columns(
+        cls,
+        account_ids: Sequence[str],
+        created_times: np.ndarray,
+        close_times: np.ndarray,
+        window_days: Optional[float] = None,
+        assignment: str = 'lifetime'
+    ) -> "OpportunityIntervalIndex":
+        """
+        Index opportunities given as columns.
+        
+        Args:
+            account_ids: Account ID per opportunity
+            created_times: Creation times as int64 epoch nanoseconds
+            close_times: Close times as int64 epoch nanoseconds,
+                ``OPEN_INTERVAL_END`` for open opportunities
+            window_days: Cover only this many days up to each conversion
+            assignment: One of ``OPPORTUNITY_ASSIGNMENTS``
+        """
+        if assignment not in OPPORTUNITY_ASSIGNMENTS:
+            raise ValueError(
+                f"Unknown opportunity assignment: {assignment}; expected one of {OPPORTUNITY_ASSIGNMENTS}"
+            )
+        if window_days is not None and window_days < 0:
+            raise ValueError(f"window_days must not be negative, got {window_days}")
+        created_times = np.asarray(created_times, dtype=np.int64)
+        close_times = np.asarray(close_times, dtype=np.int64)
+        conversion_times = np.where(close_times == OPEN_INTERVAL_END, created_times, close_times)
+        
+        if assignment == 'next_conversion':
+            # Each conversion takes the time since the previous one of its account
+            account_codes, _ = pd.factorize(np.array(account_ids, dtype=object))
+            order = np.lexsort((conversion_times, account_codes))
+            previous = np.full(len(order), np.iinfo(np.int64).min, dtype=np.int64)
+            same_account = account_codes[order][1:] == account_codes[order][:-1]
+            previous[order[1:][same_account]] = conversion_times[order[:-1][same_account]]
+            starts, ends = np.where(previous == np.iinfo(np.int64).min, previous, previous + 1), conversion_times
+            if window_days is not None:
+                starts = np.maximum(starts, ends - int(window_days * NANOSECONDS_PER_DAY))
+        elif window_days is None:
+            starts, ends = np.full(len(close_times), np.iinfo(np.int64).min, dtype=np.int64), close_times
+        else:
+            ends = conversion_times
+            starts = ends - int(window_days * NANOSECONDS_PER_DAY)
+        return cls.from_intervals(account_ids, starts, ends)
+    
+    @classmethod
+    def from_intervals(
+        cls,
+        account_ids: Sequence[str],
+        starts: np.ndarray,
+        ends: np.ndarray
+    ) -> "OpportunityIntervalIndex":
+        """Index inclusive ``[starts, ends]`` intervals; intervals with ``starts > ends`` cover nothing."""
+        account_codes, unique_accounts = pd.factorize(np.array(account_ids, dtype=object))
+        starts = np.asarray(starts, dtype=np.int64)
+        # Half-open stops; open intervals never stop
+        stops = np.where(ends == OPEN_INTERVAL_END, OPEN_INTERVAL_END, np.asarray(ends, dtype=np.int64) + 1)
+        rows = np.flatnonzero(starts < stops)
+        codes = account_codes[rows]
+        
+        edge_codes = np.concatenate([codes, codes])
+        edge_times = np.concatenate([starts[rows], stops[rows]])
+        order = np.lexsort((edge_times, edge_codes))
+        edge_codes, edge_times = edge_codes[order], edge_times[order]
+        distinct = np.ones(len(order), dtype=bool)
+        distinct[1:] = (edge_codes[1:] != edge_codes[:-1]) | (edge_times[1:] != edge_times[:-1])
+        boundaries = edge_times[distinct]
+        boundary_offsets = np.concatenate([
+            [0], np.cumsum(np.bincount(edge_codes[distinct], minlength=len(unique_accounts)))
+        ]).astype(np.int64)
+        
+        # An opportunity covers the contiguous segments from its start to its stop
+        low, high = boundary_offsets[codes], boundary_offsets[codes + 1]
+        first = segment_searchsorted(boundaries, low, high, starts[rows], side='left')
+        last = segment_searchsorted(boundaries, low, high, stops[rows], side='left')
+        spans = last - first
+        span_offsets = np.concatenate([[0], np.cumsum(spans)]).astype(np.int64)
+        owner = np.repeat(np.arange(len(rows)), spans)
+        segments = first[owner] + np.arange(span_offsets[-1]) - span_offsets[:-1][owner]
+        opportunities = rows[owner]
+        grouping = np.lexsort((opportunities, segments))
+        
+        return cls(
+            account_positions={account_id: i for i, account_id in enumerate(unique_accounts)},
+            boundary_offsets=boundary_offsets,
+            boundaries=boundaries,
+            segment_offsets=np.concatenate([
+                [0], np.cumsum(np.bincount(segments, minlength=len(boundaries)))
+            ]).astype(np.int64),
+            segment_opportunities=opportunities[grouping],
+            opportunity_count=len(account_codes)
+        )
+    
+    def pairs(
+        self,
+        touchpoint_accounts: Sequence[str],
+        touchpoint_times: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Every (opportunity, touchpoint) pair whose interval contains the touchpoint.
+        
+        Args:
+            touchpoint_accounts: Account ID per touchpoint
+            touchpoint_times: Epoch-nanosecond time per touchpoint
+        
+        Returns:
+            Opportunity rows and touchpoint rows of the pairs, ordered by
+            opportunity and then touchpoint row
+        """
+        times = np.asarray(touchpoint_times, dtype=np.int64)
+        if not len(self.segment_opportunities):
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        
+        positions = np.array(
+            [self.account_positions.get(account_id, -1) for account_id in touchpoint_accounts],
+            dtype=np.int64
+        )
+        known = positions >= 0
+        low = np.where(known, self.boundary_offsets[np.maximum(positions, 0)], 0)
+        high = np.where(known, self.boundary_offsets[np.maximum(positions, 0) + 1], 0)
+        
+        # Last account edge at or before the touchpoint
+        segment = segment_searchsorted(self.boundaries, low, high, times, side='right') - 1
+        inside = segment >= low
+        segment = np.where(inside, segment, 0)
+        counts = np.where(inside, self.segment_offsets[segment + 1] - self.segment_offsets[segment], 0)
+        
+        touchpoint_rows = np.repeat(np.arange(len(times)), counts)
+        pair_offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        within = np.arange(pair_offsets[-1]) - pair_offsets[:-1][touchpoint_rows]
+        opportunity_rows = self.segment_opportunities[self.segment_offsets[segment][touchpoint_rows] + within]
+        
+        order = np.lexsort((touchpoint_rows, opportunity_rows))
+        return opportunity_rows[order], touchpoint_rows[order]
+
+
 class B2BMarketingAttributionEngine(LoggerMixin):
     """
     Specifically designed for B2B marketing workflows with complex attribution models
@@ -134,7 +415,11 @@ class B2BMarketingAttributionEngine(LoggerMixin):
         self,
         lead_data: List[LeadData],
         opportunity_data: List[OpportunityData],
-        touchpoint_data: List[TouchpointData]
+        touchpoint_data: List[TouchpointData],
+        window: Optional[JourneyWindow] = None,
+        fused: bool = False,
+        opportunity_window_days: Optional[float] = None,
+        opportunity_assignment: Optional[str] = None
     ) -> Dict[str, any]:
         """
         Master attribution model specifically for B2B sales cycles.
@@ -143,10 +428,36 @@ class B2BMarketingAttributionEngine(LoggerMixin):
             lead_data: List of lead information
             opportunity_data: List of opportunity/deal information  
             touchpoint_data: List of touchpoint interactions
+            window: Optional lookback/attribution window and touchpoint caps,
+                e.g. ``JourneyWindow.from_settings()``
+            fused: Compute all five factors in one columnar pass into a
+                (touchpoints x 5) matrix and combine them with one
+                matrix-vector product; same results, no per-factor walks
+            opportunity_window_days: Credit each opportunity to touchpoints
+                within this many days before its conversion instead of all
+                those up to its close; defaults to
+                ``settings.b2b_opportunity_window_days``
+            opportunity_assignment: ``'lifetime'`` or ``'next_conversion'``
+                (each touchpoint counts only toward its account's next
+                conversion), see OpportunityIntervalIndex; defaults to
+                ``settings.b2b_opportunity_assignment``
             
         Returns:
             Comprehensive B2B attribution results
         """
+        if opportunity_window_days is None:
+            opportunity_window_days = self.settings.b2b_opportunity_window_days
+        if opportunity_assignment is None:
+            opportunity_assignment = self.settings.b2b_opportunity_assignment
+        
+        if fused:
+            from backend.app.services.columnar_b2b_attribution import ColumnarB2BAttributionEngine
+            return ColumnarB2BAttributionEngine(self).b2b_specific_attribution(
+                lead_data, opportunity_data, touchpoint_data, window=window,
+                opportunity_window_days=opportunity_window_days,
+                opportunity_assignment=opportunity_assignment
+            )
+        
         self.logger.info(
             "Starting B2B attribution calculation",
             leads_count=len(lead_data),
@@ -154,12 +465,32 @@ class B2BMarketingAttributionEngine(LoggerMixin):
             touchpoints_count=len(touchpoint_data)
         )
         
-        # Calculate different attribution perspectives
-        time_weighted = self.calculate_b2b_time_decay(touchpoint_data, opportunity_data)
+        account_index = AccountTouchpointIndex.build(touchpoint_data)
+        if window is not None:
+            touchpoint_data = self.apply_attribution_window(
+                touchpoint_data, opportunity_data, window, account_index=account_index
+            )
+            account_index = AccountTouchpointIndex.build(touchpoint_data)
+        opportunity_index = OpportunityIntervalIndex.build(
+            opportunity_data, opportunity_window_days, opportunity_assignment
+        )
+        
+        # Calculate different attribution perspectives; the account-driven
+        # factors share one account index and one opportunity interval index
+        # instead of rescanning touchpoints
+        time_weighted = self.calculate_b2b_time_decay(
+            touchpoint_data, opportunity_data, account_index=account_index,
+            opportunity_index=opportunity_index
+        )
         quality_weighted = self.calculate_lead_quality_impact(lead_data, touchpoint_data)
-        account_based = self.calculate_account_level_attribution(opportunity_data, touchpoint_data)
+        account_based = self.calculate_account_level_attribution(
+            opportunity_data, touchpoint_data, account_index=account_index,
+            opportunity_index=opportunity_index
+        )
         stage_weighted = self.calculate_stage_progression_attribution(touchpoint_data)
-        velocity_impact = self.calculate_pipeline_velocity_impact(opportunity_data, touchpoint_data)
+        velocity_impact = self.calculate_pipeline_velocity_impact(
+            opportunity_data, touchpoint_data, account_index=account_index
+        )
         
         # Combine all factors for comprehensive B2B attribution
         combined_attribution = self.combine_b2b_attribution_factors(
@@ -180,26 +511,101 @@ class B2BMarketingAttributionEngine(LoggerMixin):
             'attribution_summary': self.generate_attribution_summary(combined_attribution)
         }
 
+    def apply_attribution_window(
+        self,
+        touchpoint_data: List[TouchpointData],
+        opportunity_data: List[OpportunityData],
+        window: Optional[JourneyWindow] = None,
+        account_index: Optional[AccountTouchpointIndex] = None
+    ) -> List[TouchpointData]:
+        """
+        Keep only touchpoints inside the window of some opportunity of their account.
+        
+        Each opportunity's journey is its account's touchpoints, converting at
+        the close date (or creation date while open). Window edges are found by
+        binary search over the sorted journey, and journeys over
+        ``max_touchpoints`` are cut by the window's truncation policy.
+        
+        Args:
+            touchpoint_data: List of touchpoint interactions
+            opportunity_data: List of opportunity/deal information
+            window: Window to apply; defaults to ``JourneyWindow.from_settings()``
+            account_index: Prebuilt index over ``touchpoint_data``
+            
+        Returns:
+            Touchpoints kept by at least one opportunity, in input order
+        """
+        window = window or JourneyWindow.from_settings()
+        if account_index is None:
+            account_index = AccountTouchpointIndex.build(touchpoint_data)
+        account_index.check(touchpoint_data)
+        
+        opp_rows = [account_index.rows_for(opp.account_id) for opp in opportunity_data]
+        conversion_times = [
+            pd.Timestamp(opp.close_date or opp.created_date).value for opp in opportunity_data
+        ]
+        
+        rows = np.concatenate(opp_rows).astype(np.int64) if opp_rows else np.zeros(0, dtype=np.int64)
+        view = build_journey_view(
+            offsets=np.concatenate([[0], np.cumsum([len(r) for r in opp_rows], dtype=np.int64)]),
+            ids=rows,
+            timestamps=account_index.timestamps[rows],
+            channel_codes=np.zeros(len(rows), dtype=np.int64)
+        )
+        windowed = window.apply(view, np.array(conversion_times, dtype=np.int64))
+        kept = np.unique(windowed.ids)
+        
+        self.logger.info(
+            "Attribution window applied",
+            touchpoints_count=len(touchpoint_data),
+            kept_count=len(kept),
+            lookback_window_days=window.lookback_window_days,
+            max_touchpoints=window.max_touchpoints
+        )
+        
+        return [touchpoint_data[i] for i in kept]
+
     def calculate_b2b_time_decay(
         self,
         touchpoint_data: List[TouchpointData],
         opportunity_data: List[OpportunityData],
-        avg_sales_cycle_days: int = 180
+        avg_sales_cycle_days: int = 180,
+        account_index: Optional[AccountTouchpointIndex] = None,
+        opportunity_window_days: Optional[float] = None,
+        opportunity_index: Optional[OpportunityIntervalIndex] = None,
+        opportunity_assignment: Optional[str] = None
     ) -> Dict[str, float]:
         """
         Calculate time decay attribution accounting for long B2B sales cycles.
         
         B2B sales cycles are typically 3-18 months, requiring different decay rates
         than B2C attribution models.
+        
+        Each opportunity is credited to the touchpoints of its account up to
+        its close, including those before its creation (open opportunities to
+        all of them), or with
+        ``opportunity_window_days`` within that many days before its
+        conversion. With the ``'next_conversion'`` ``opportunity_assignment``
+        each touchpoint instead counts only toward the next conversion of its
+        account. A touchpoint inside several opportunities' intervals sums
+        their credit. Both options default to their ``settings.b2b_*`` values.
+        
+        ``account_index`` is a prebuilt AccountTouchpointIndex over
+        ``touchpoint_data``, shared with the other account-level factors;
+        ``opportunity_index`` a prebuilt OpportunityIntervalIndex over
+        ``opportunity_data`` that takes precedence over both options.
         """
         attribution_weights = {}
+        if account_index is None:
+            account_index = AccountTouchpointIndex.build(touchpoint_data)
+        account_index.check(touchpoint_data)
         
-        for opportunity in opportunity_data:
-            opp_touchpoints = [
-                tp for tp in touchpoint_data 
-                if tp.account_id == opportunity.account_id
-            ]
-            
+        assigned_touchpoints = self._assigned_opportunity_touchpoints(
+            opportunity_data, touchpoint_data, account_index,
+            opportunity_window_days, opportunity_index, opportunity_assignment
+        )
+        
+        for opportunity, opp_touchpoints in zip(opportunity_data, assigned_touchpoints):
             if not opp_touchpoints:
                 continue
                 
@@ -230,7 +636,9 @@ class B2BMarketingAttributionEngine(LoggerMixin):
             # Normalize weights for this opportunity
             if total_weight > 0:
                 for tp_id, weight in touchpoint_weights.items():
-                    attribution_weights[tp_id] = (weight / total_weight) * opportunity.amount
+                    attribution_weights[tp_id] = (
+                        attribution_weights.get(tp_id, 0.0) + (weight / total_weight) * opportunity.amount
+                    )
         
         return attribution_weights
 
@@ -280,26 +688,32 @@ class B2BMarketingAttributionEngine(LoggerMixin):
     def calculate_account_level_attribution(
         self,
         opportunity_data: List[OpportunityData],
-        touchpoint_data: List[TouchpointData]
+        touchpoint_data: List[TouchpointData],
+        account_index: Optional[AccountTouchpointIndex] = None,
+        opportunity_window_days: Optional[float] = None,
+        opportunity_index: Optional[OpportunityIntervalIndex] = None,
+        opportunity_assignment: Optional[str] = None
     ) -> Dict[str, float]:
         """
         Account-based attribution for enterprise deals with multiple stakeholders.
         
         Considers buying committee size, deal size, and account complexity.
+        Touchpoints are assigned to opportunities, and credit summed over
+        them, as in ``calculate_b2b_time_decay``.
         """
         attribution_weights = {}
         
         # Group touchpoints by account
-        account_touchpoints = {}
-        for touchpoint in touchpoint_data:
-            if touchpoint.account_id not in account_touchpoints:
-                account_touchpoints[touchpoint.account_id] = []
-            account_touchpoints[touchpoint.account_id].append(touchpoint)
+        if account_index is None:
+            account_index = AccountTouchpointIndex.build(touchpoint_data)
+        account_index.check(touchpoint_data)
         
-        for opportunity in opportunity_data:
-            account_id = opportunity.account_id
-            touchpoints = account_touchpoints.get(account_id, [])
-            
+        assigned_touchpoints = self._assigned_opportunity_touchpoints(
+            opportunity_data, touchpoint_data, account_index,
+            opportunity_window_days, opportunity_index, opportunity_assignment
+        )
+        
+        for opportunity, touchpoints in zip(opportunity_data, assigned_touchpoints):
             if not touchpoints:
                 continue
             
@@ -344,7 +758,9 @@ class B2BMarketingAttributionEngine(LoggerMixin):
             # Normalize and assign final attribution
             if total_account_weight > 0:
                 for tp_id, weight in touchpoint_weights.items():
-                    attribution_weights[tp_id] = (weight / total_account_weight) * opportunity.amount
+                    attribution_weights[tp_id] = (
+                        attribution_weights.get(tp_id, 0.0) + (weight / total_account_weight) * opportunity.amount
+                    )
         
         return attribution_weights
 
@@ -382,7 +798,8 @@ class B2BMarketingAttributionEngine(LoggerMixin):
     def calculate_pipeline_velocity_impact(
         self,
         opportunity_data: List[OpportunityData],
-        touchpoint_data: List[TouchpointData]
+        touchpoint_data: List[TouchpointData],
+        account_index: Optional[AccountTouchpointIndex] = None
     ) -> Dict[str, float]:
         """
         Calculate how touchpoints impact pipeline velocity and deal acceleration.
@@ -390,11 +807,13 @@ class B2BMarketingAttributionEngine(LoggerMixin):
         Touchpoints that accelerate deals through the pipeline get higher attribution.
         """
         attribution_weights = {}
+        if account_index is None:
+            account_index = AccountTouchpointIndex.build(touchpoint_data)
+        account_index.check(touchpoint_data)
         
         for opportunity in opportunity_data:
             opp_touchpoints = [
-                tp for tp in touchpoint_data 
-                if tp.account_id == opportunity.account_id
+                touchpoint_data[row] for row in account_index.rows_for(opportunity.account_id)
             ]
             
             if not opp_touchpoints:
@@ -470,37 +889,65 @@ class B2BMarketingAttributionEngine(LoggerMixin):
 
     def generate_attribution_summary(
         self,
-        attribution_results: Dict[str, float]
+        attribution_results: Dict[str, float],
+        top_k: Optional[int] = None,
+        quantiles: Optional[List[float]] = None
     ) -> Dict[str, any]:
-        """Generate a summary of attribution results with insights."""
+        """
+        Generate a summary of attribution results with insights.
+        
+        Uses partial selection instead of sorting all touchpoints; see
+        ``summarize_attribution``.
+        
+        Args:
+            attribution_results: Attribution by touchpoint ID
+            top_k: Number of top contributing touchpoints (default from settings)
+            quantiles: Touchpoint fractions for the top/bottom credit shares
+                (default from settings, i.e. top/bottom 20%)
+        """
         if not attribution_results:
             return {}
         
-        total_attribution = sum(attribution_results.values())
-        touchpoint_count = len(attribution_results)
-        
-        # Top contributing touchpoints
-        sorted_touchpoints = sorted(
-            attribution_results.items(),
-            key=lambda x: x[1],
-            reverse=True
+        return summarize_attribution(
+            list(attribution_results.keys()),
+            np.fromiter(attribution_results.values(), dtype=np.float64, count=len(attribution_results)),
+            top_k=self.settings.summary_top_k if top_k is None else top_k,
+            quantiles=self.settings.summary_quantiles if quantiles is None else quantiles
         )
+
+    def _assigned_opportunity_touchpoints(
+        self,
+        opportunity_data: List[OpportunityData],
+        touchpoint_data: List[TouchpointData],
+        account_index: AccountTouchpointIndex,
+        opportunity_window_days: Optional[float] = None,
+        opportunity_index: Optional[OpportunityIntervalIndex] = None,
+        opportunity_assignment: Optional[str] = None
+    ) -> List[List[TouchpointData]]:
+        """Touchpoints inside each opportunity's interval, in input order."""
+        if opportunity_index is None:
+            if opportunity_window_days is None:
+                opportunity_window_days = self.settings.b2b_opportunity_window_days
+            if opportunity_assignment is None:
+                opportunity_assignment = self.settings.b2b_opportunity_assignment
+            opportunity_index = OpportunityIntervalIndex.build(
+                opportunity_data, opportunity_window_days, opportunity_assignment
+            )
+        if opportunity_index.opportunity_count != len(opportunity_data):
+            raise ValueError(
+                f"Opportunity index covers {opportunity_index.opportunity_count} opportunities, "
+                f"got {len(opportunity_data)}"
+            )
         
-        top_touchpoints = sorted_touchpoints[:5]
-        
-        return {
-            'total_attribution_value': total_attribution,
-            'touchpoint_count': touchpoint_count,
-            'average_attribution_per_touchpoint': total_attribution / touchpoint_count if touchpoint_count > 0 else 0,
-            'top_contributing_touchpoints': [
-                {'touchpoint_id': tp_id, 'attribution_value': value, 'percentage': (value/total_attribution)*100}
-                for tp_id, value in top_touchpoints
-            ],
-            'attribution_distribution': {
-                'top_20_percent': sum(dict(sorted_touchpoints[:max(1, touchpoint_count//5)]).values()),
-                'bottom_20_percent': sum(dict(sorted_touchpoints[-max(1, touchpoint_count//5):]).values())
-            }
-        }
+        opportunity_rows, touchpoint_rows = opportunity_index.pairs(
+            [tp.account_id for tp in touchpoint_data], account_index.timestamps
+        )
+        counts = np.bincount(opportunity_rows, minlength=len(opportunity_data))
+        offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        return [
+            [touchpoint_data[row] for row in touchpoint_rows[start:end]]
+            for start, end in zip(offsets[:-1], offsets[1:])
+        ]
 
     def _calculate_account_complexity(self, opportunity: OpportunityData) -> float:
         """Calculate account complexity multiplier based on deal characteristics."""
@@ -582,17 +1029,175 @@ class B2BAttributionAnalyzer:
         
         # Calculate ROI and efficiency metrics
         for channel, metrics in channel_performance.items():
-            if metrics['total_cost'] > 0:
-                metrics['roi'] = (metrics['total_attribution'] - metrics['total_cost']) / metrics['total_cost']
-                metrics['cost_per_attribution'] = metrics['total_cost'] / metrics['total_attribution']
-            else:
-                metrics['roi'] = float('inf') if metrics['total_attribution'] > 0 else 0
-                metrics['cost_per_attribution'] = 0
-            
+            self.add_efficiency_metrics(metrics)
             metrics['touchpoint_types'] = list(metrics['touchpoint_types'])
         
         return channel_performance
     
+    def add_efficiency_metrics(self, metrics: Dict[str, any]) -> None:
+        """
+        Add ROI and cost per attribution to one channel's totals, in place.
+        
+        Shared by every producer of ``channel_performance`` (sharded, incremental
+        and columnar runs) so merged totals get the same metrics.
+        """
+        if metrics['total_cost'] > 0:
+            metrics['roi'] = (metrics['total_attribution'] - metrics['total_cost']) / metrics['total_cost']
+            metrics['cost_per_attribution'] = metrics['total_cost'] / metrics['total_attribution']
+        else:
+            metrics['roi'] = float('inf') if metrics['total_attribution'] > 0 else 0
+            metrics['cost_per_attribution'] = 0
+    
+    def aggregate_attribution(
+        self,
+        attribution_results: Union[Dict[str, float], np.ndarray],
+        touchpoint_data: List[TouchpointData],
+        group_by: str = 'channel'
+    ) -> Dict[str, np.ndarray]:
+        """
+        Reduce attribution into dense per-group arrays without per-group dicts.
+        
+        Args:
+            attribution_results: Attribution by touchpoint ID, or a credit array
+                aligned with ``touchpoint_data``
+            touchpoint_data: Touchpoints defining the group of each credit
+            group_by: TouchpointData attribute to group by (e.g. 'channel', 'campaign_id')
+            
+        Returns:
+            Dictionary of ``groups`` (group keys) and aligned ``total_attribution``,
+            ``total_cost`` and ``touchpoint_count`` arrays. Touchpoints without
+            attribution or without a group key are skipped.
+        """
+        if isinstance(attribution_results, dict):
+            credit = np.array([
+                attribution_results.get(tp.touchpoint_id, np.nan) for tp in touchpoint_data
+            ], dtype=np.float64)
+        else:
+            credit = np.asarray(attribution_results, dtype=np.float64)
+        
+        group_codes, groups = pd.factorize(
+            np.array([getattr(tp, group_by) for tp in touchpoint_data], dtype=object)
+        )
+        cost = np.array([tp.cost for tp in touchpoint_data], dtype=np.float64)
+        
+        included = (group_codes >= 0) & ~np.isnan(credit)
+        codes = group_codes[included]
+        
+        return {
+            'groups': np.asarray(groups, dtype=object),
+            'total_attribution': np.bincount(codes, weights=credit[included], minlength=len(groups)),
+            'total_cost': np.bincount(codes, weights=cost[included], minlength=len(groups)),
+            'touchpoint_count': np.bincount(codes, minlength=len(groups))
+        }
+    
+    def analyze_attribution(
+        self,
+        attribution_results: Union[Dict[str, float], np.ndarray],
+        touchpoint_data: List[TouchpointData]
+    ) -> Dict[str, Dict[str, any]]:
+        """
+        Channel performance and sales-marketing alignment in one pass.
+        
+        Gives the results of ``analyze_channel_performance`` and
+        ``analyze_sales_marketing_alignment`` (for unique touchpoint IDs),
+        reading each touchpoint once and reducing by group.
+        
+        Args:
+            attribution_results: Attribution by touchpoint ID, or a credit array
+                aligned with ``touchpoint_data`` (NaN for unattributed touchpoints)
+            touchpoint_data: Touchpoints the attribution refers to
+            
+        Returns:
+            Dictionary with ``channel_performance`` and ``sales_marketing_alignment``
+        """
+        if isinstance(attribution_results, dict):
+            rows = [
+                (attribution_results.get(tp.touchpoint_id, np.nan), tp.channel, tp.touchpoint_type.value,
+                 tp.cost, tp.is_sales_touch, tp.is_marketing_touch)
+                for tp in touchpoint_data
+            ]
+        else:
+            rows = [
+                (credit, tp.channel, tp.touchpoint_type.value, tp.cost, tp.is_sales_touch, tp.is_marketing_touch)
+                for credit, tp in zip(np.asarray(attribution_results, dtype=np.float64).tolist(), touchpoint_data)
+            ]
+        credit, channels, touchpoint_types, costs, is_sales_touch, is_marketing_touch = (
+            zip(*rows) if rows else ((),) * 6
+        )
+        
+        return self.analyze_attribution_columns(
+            credit=np.array(credit, dtype=np.float64),
+            channels=np.array(channels, dtype=object),
+            touchpoint_types=np.array(touchpoint_types, dtype=object),
+            costs=np.array(costs, dtype=np.float64),
+            is_sales_touch=np.array(is_sales_touch, dtype=bool),
+            is_marketing_touch=np.array(is_marketing_touch, dtype=bool)
+        )
+    
+    def analyze_attribution_columns(
+        self,
+        credit: np.ndarray,
+        channels: np.ndarray,
+        touchpoint_types: np.ndarray,
+        costs: np.ndarray,
+        is_sales_touch: np.ndarray,
+        is_marketing_touch: np.ndarray
+    ) -> Dict[str, Dict[str, any]]:
+        """
+        ``analyze_attribution`` over touchpoint columns, e.g. columnar engine output.
+        
+        Args:
+            credit: Attribution per touchpoint, NaN where unattributed
+            channels: Channel per touchpoint
+            touchpoint_types: Touchpoint type value per touchpoint
+            costs: Cost per touchpoint
+            is_sales_touch: Sales flag per touchpoint
+            is_marketing_touch: Marketing flag per touchpoint
+        """
+        credit = np.asarray(credit, dtype=np.float64)
+        included = ~np.isnan(credit)
+        credit = credit[included]
+        sales = np.asarray(is_sales_touch, dtype=bool)[included]
+        marketing = np.asarray(is_marketing_touch, dtype=bool)[included]
+        
+        channel_codes, channel_names = pd.factorize(
+            np.asarray(channels, dtype=object)[included], use_na_sentinel=False
+        )
+        type_codes, type_names = pd.factorize(
+            np.asarray(touchpoint_types, dtype=object)[included], use_na_sentinel=False
+        )
+        channel_count = len(channel_names)
+        type_count = max(len(type_names), 1)
+        
+        total_attribution = np.bincount(channel_codes, weights=credit, minlength=channel_count)
+        total_cost = np.bincount(
+            channel_codes, weights=np.asarray(costs, dtype=np.float64)[included], minlength=channel_count
+        )
+        touchpoint_count = np.bincount(channel_codes, minlength=channel_count)
+        channel_types: List[List[str]] = [[] for _ in range(channel_count)]
+        for pair in np.unique(channel_codes * type_count + type_codes).tolist():
+            channel_types[pair // type_count].append(type_names[pair % type_count])
+        
+        channel_performance = {}
+        for code, channel in enumerate(channel_names.tolist()):
+            metrics = {
+                'total_attribution': float(total_attribution[code]),
+                'touchpoint_count': int(touchpoint_count[code]),
+                'total_cost': float(total_cost[code]),
+                'touchpoint_types': channel_types[code]
+            }
+            self.add_efficiency_metrics(metrics)
+            channel_performance[channel] = metrics
+        
+        return {
+            'channel_performance': channel_performance,
+            'sales_marketing_alignment': self.alignment_report(
+                float(credit[sales & ~marketing].sum()),
+                float(credit[marketing & ~sales].sum()),
+                float(credit[sales & marketing].sum())
+            )
+        }
+    
     def analyze_sales_marketing_alignment(
         self,
         attribution_results: Dict[str, float],
@@ -617,6 +1222,19 @@ class B2BAttributionAnalyzer:
             elif touchpoint.is_marketing_touch:
                 marketing_attribution += attribution_value
         
+        return self.alignment_report(sales_attribution, marketing_attribution, joint_attribution)
+    
+    def alignment_report(
+        self,
+        sales_attribution: float,
+        marketing_attribution: float,
+        joint_attribution: float
+    ) -> Dict[str, any]:
+        """
+        Sales-marketing alignment report from sales, marketing and joint attribution totals.
+        
+        Used for reports built from totals summed elsewhere, e.g. across shards.
+        """
         total_attribution = sales_attribution + marketing_attribution + joint_attribution
         
         return {
@@ -0,0 +1,249 @@
+"""
+Bootstrap confidence intervals for channel credit.
+
+A journey's credit to each channel is fixed once the model has scored it,
+so resampling customers does not require re-running the model: a bootstrap
+replicate is just a weighted sum of per-journey channel credit rows. Draws
+are made as (resamples x journeys) weight matrices - Poisson(1) counts or
+multinomial counts - and reduced with one matrix product per batch.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Union
+import numpy as np
+import pandas as pd
+
+from backend.app.services.attribution_models import AttributionModel, JourneyWindow
+from backend.app.utils.logging import LoggerMixin
+from config.settings import get_attribution_settings
+
+
+RESAMPLING_METHODS = ('poisson', 'multinomial')
+
+
+def journey_channel_credit(
+    model: AttributionModel,
+    offsets: np.ndarray,
+    timestamps: np.ndarray,
+    channel_codes: np.ndarray,
+    conversion_values: Union[float, np.ndarray] = 1.0,
+    channel_names: Optional[Sequence[str]] = None,
+    channel_count: int = 0,
+    window: Optional[JourneyWindow] = None,
+    conversion_times: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Score journeys once and fold the credit into a (journeys x channels) matrix.
+    
+    Args:
+        model: Any attribution model, e.g. from ``AttributionModelFactory``
+        offsets: Journey boundaries, length ``n_journeys + 1``, starting at 0
+        timestamps: Touchpoint times as int64 epoch nanoseconds
+        channel_codes: Integer channel code per touchpoint
+        conversion_values: Scalar or per-journey conversion values
+        channel_names: Channel name for each channel code
+        channel_count: Minimum number of channel columns
+        window: Optional window/cap applied to each journey before scoring
+        conversion_times: Conversion time per journey for ``window``
+    """
+    offsets = np.asarray(offsets, dtype=np.int64)
+    channel_codes = np.asarray(channel_codes, dtype=np.int64)
+    journey_count = len(offsets) - 1
+    
+    credit = model.calculate_attribution_batch(
+        offsets=offsets,
+        ids=np.arange(len(channel_codes)),
+        timestamps=timestamps,
+        channel_codes=channel_codes,
+        conversion_values=conversion_values,
+        channel_names=channel_names,
+        window=window,
+        conversion_times=conversion_times
+    )
+    
+    if channel_names is not None:
+        channel_count = max(channel_count, len(channel_names))
+    channel_count = max(channel_count, int(channel_codes.max(initial=-1)) + 1)
+    journey_index = np.repeat(np.arange(journey_count), np.diff(offsets))
+    return np.bincount(
+        journey_index * channel_count + channel_codes,
+        weights=credit,
+        minlength=journey_count * channel_count
+    ).reshape(journey_count, channel_count)
+
+
+@dataclass
+class BootstrapResult:
+    """Point estimate, percentile interval and replicates of channel credit."""
+    estimate: np.ndarray
+    lower: np.ndarray
+    upper: np.ndarray
+    replicates: np.ndarray
+    confidence_level: float
+    method: str
+    channel_names: Optional[Sequence[str]] = None
+    
+    @property
+    def resample_count(self) -> int:
+        return len(self.replicates)
+    
+    def standard_error(self) -> np.ndarray:
+        """Bootstrap standard error per channel."""
+        if self.resample_count < 2:
+            return np.zeros_like(self.estimate)
+        return self.replicates.std(axis=0, ddof=1)
+    
+    def to_dataframe(self) -> pd.DataFrame:
+        """One row per channel with estimate, interval bounds and standard error."""
+        channel_count = len(self.estimate)
+        if self.channel_names is not None and len(self.channel_names) == channel_count:
+            index = [str(name) for name in self.channel_names]
+        else:
+            index = [f"channel_{code}" for code in range(channel_count)]
+        
+        return pd.DataFrame(
+            {
+                'estimate': self.estimate,
+                'lower': self.lower,
+                'upper': self.upper,
+                'standard_error': self.standard_error()
+            },
+            index=pd.Index(index, name='channel')
+        )
+
+
+class BootstrapAttributionEngine(LoggerMixin):
+    """
+    Percentile bootstrap over journeys for per-channel credit.
+    
+    Resamples are drawn in batches, each from its own child of one seed
+    sequence, so results depend only on the seed and batch size - never on
+    the number of workers. Workers are threads: weight generation and the
+    matrix products run in NumPy without holding the GIL.
+    """
+    
+    def __init__(
+        self,
+        resample_count: Optional[int] = None,
+        method: Optional[str] = None,
+        confidence_level: Optional[float] = None,
+        random_seed: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        max_workers: Optional[int] = None
+    ):
+        settings = get_attribution_settings()
+        self.resample_count = resample_count or settings.bootstrap_resample_count
+        self.method = method or settings.bootstrap_method
+        self.confidence_level = confidence_level or settings.bootstrap_confidence_level
+        self.random_seed = settings.bootstrap_random_seed if random_seed is None else random_seed
+        self.batch_size = batch_size or settings.bootstrap_batch_size
+        self.max_workers = max_workers or 1
+        
+        if self.method not in RESAMPLING_METHODS:
+            raise ValueError(f"Unknown resampling method: {self.method}; expected one of {RESAMPLING_METHODS}")
+        if not 0 < self.confidence_level < 1:
+            raise ValueError("confidence_level must be between 0 and 1")
+        if self.resample_count <= 0 or self.batch_size <= 0:
+            raise ValueError("resample_count and batch_size must be positive")
+    
+    def resample_weights(self, journey_count: int, size: int, rng: np.random.Generator) -> np.ndarray:
+        """Draw a (size x journeys) matrix of journey weights."""
+        if self.method == 'poisson':
+            return rng.poisson(1.0, size=(size, journey_count)).astype(np.float64)
+        return rng.multinomial(
+            journey_count, np.full(journey_count, 1.0 / journey_count), size=size
+        ).astype(np.float64)
+    
+    def replicates(self, journey_credit: np.ndarray) -> np.ndarray:
+        """
+        Bootstrap replicates of total channel credit.
+        
+        Args:
+            journey_credit: (journeys x channels) credit, e.g. from ``journey_channel_credit``
+        
+        Returns:
+            (resamples x channels) array of resampled channel totals
+        """
+        journey_credit = np.asarray(journey_credit, dtype=np.float64)
+        if journey_credit.ndim != 2:
+            raise ValueError("journey_credit must be a (journeys x channels) matrix")
+        journey_count = journey_credit.shape[0]
+        if journey_count == 0:
+            return np.zeros((self.resample_count, journey_credit.shape[1]))
+        
+        batch_sizes = [
+            min(self.batch_size, self.resample_count - start)
+            for start in range(0, self.resample_count, self.batch_size)
+        ]
+        seeds = np.random.SeedSequence(self.random_seed).spawn(len(batch_sizes))
+        
+        def run_batch(batch: int) -> np.ndarray:
+            rng = np.random.default_rng(seeds[batch])
+            return self.resample_weights(journey_count, batch_sizes[batch], rng) @ journey_credit
+        
+        if self.max_workers == 1 or len(batch_sizes) == 1:
+            results: List[np.ndarray] = [run_batch(batch) for batch in range(len(batch_sizes))]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(batch_sizes))) as pool:
+                results = list(pool.map(run_batch, range(len(batch_sizes))))
+        return np.vstack(results)
+    
+    def confidence_intervals(
+        self,
+        journey_credit: np.ndarray,
+        channel_names: Optional[Sequence[str]] = None
+    ) -> BootstrapResult:
+        """
+        Percentile intervals of total credit per channel.
+        
+        Args:
+            journey_credit: (journeys x channels) credit, e.g. from ``journey_channel_credit``
+            channel_names: Channel name for each column
+        """
+        journey_credit = np.asarray(journey_credit, dtype=np.float64)
+        replicates = self.replicates(journey_credit)
+        tail = (1.0 - self.confidence_level) / 2.0
+        lower, upper = np.quantile(replicates, [tail, 1.0 - tail], axis=0)
+        
+        self.logger.info(
+            "Bootstrap intervals calculated",
+            method=self.method,
+            resample_count=self.resample_count,
+            journey_count=journey_credit.shape[0],
+            channel_count=journey_credit.shape[1],
+            confidence_level=self.confidence_level
+        )
+        
+        return BootstrapResult(
+            estimate=journey_credit.sum(axis=0),
+            lower=lower,
+            upper=upper,
+            replicates=replicates,
+            confidence_level=self.confidence_level,
+            method=self.method,
+            channel_names=channel_names
+        )
+    
+    def run(
+        self,
+        model: AttributionModel,
+        offsets: np.ndarray,
+        timestamps: np.ndarray,
+        channel_codes: np.ndarray,
+        conversion_values: Union[float, np.ndarray] = 1.0,
+        channel_names: Optional[Sequence[str]] = None,
+        window: Optional[JourneyWindow] = None,
+        conversion_times: Optional[np.ndarray] = None
+    ) -> BootstrapResult:
+        """Score journeys with ``model`` once, then bootstrap channel credit."""
+        journey_credit = journey_channel_credit(
+            model,
+            offsets,
+            timestamps,
+            channel_codes,
+            conversion_values=conversion_values,
+            channel_names=channel_names,
+            window=window,
+            conversion_times=conversion_times
+        )
+        return self.confidence_intervals(journey_credit, channel_names)
@@ -0,0 +1,900 @@
+"""
+Columnar B2B attribution over struct-of-arrays inputs.
+
+Leads, opportunities and touchpoints are held as NumPy columns, with enum
+fields stored as ordinal codes and every weight table turned into a lookup
+array. The five factors of ``B2BMarketingAttributionEngine`` are computed
+with vectorized group operations over (opportunity, touchpoint) pairs and
+reproduce its numbers: a touchpoint is paired with every opportunity of its
+account whose interval (history up to close, a window before conversion, or
+the time since the account's previous conversion) contains it and sums the
+time-decay and account credit of those pairs.
+
+Combined attribution is linear in the factor weights, so an analysis keeps
+its factor matrix and per-group factor totals and can be reweighted without
+recomputing any factor.
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+import numpy as np
+import pandas as pd
+
+from backend.app.services.attribution_models import NANOSECONDS_PER_DAY, JourneyWindow, build_journey_view
+from backend.app.services.attribution_summary import summarize_attribution
+from backend.app.services.b2b_attribution_engine import (
+    B2BAttributionAnalyzer,
+    B2BMarketingAttributionEngine,
+    B2BStageType,
+    LeadData,
+    OpportunityData,
+    OPEN_INTERVAL_END,
+    OpportunityIntervalIndex,
+    TouchpointData,
+    TouchpointType
+)
+from backend.app.utils.logging import LoggerMixin
+
+
+TOUCHPOINT_TYPES = list(TouchpointType)
+TOUCHPOINT_TYPE_VALUES = np.array([touchpoint_type.value for touchpoint_type in TOUCHPOINT_TYPES], dtype=object)
+STAGE_TYPES = list(B2BStageType)
+
+FACTOR_NAMES = ('time', 'quality', 'account', 'stage', 'velocity')
+
+ALIGNMENT_GROUPS = ('sales', 'marketing', 'joint')
+
+DEFAULT_FACTOR_WEIGHTS = {
+    'time': 0.25,
+    'quality': 0.25,
+    'account': 0.25,
+    'stage': 0.15,
+    'velocity': 0.10
+}
+
+
+def factor_weight_vector(weights: Optional[Dict[str, float]] = None) -> np.ndarray:
+    """Factor weights as a vector in ``FACTOR_NAMES`` order."""
+    weights = DEFAULT_FACTOR_WEIGHTS if weights is None else weights
+    missing = [name for name in FACTOR_NAMES if name not in weights]
+    if missing:
+        raise ValueError(f"Missing factor weights: {missing}")
+    unknown = [name for name in weights if name not in FACTOR_NAMES]
+    if unknown:
+        raise ValueError(f"Unknown factor weights: {unknown}; expected {list(FACTOR_NAMES)}")
+    return np.array([weights[name] for name in FACTOR_NAMES], dtype=np.float64)
+
+
+def factor_weight_matrix(
+    weight_sets: Union[None, Dict[str, float], Sequence[Dict[str, float]], np.ndarray]
+) -> np.ndarray:
+    """
+    (weight sets x factors) matrix from one weight dict, a list of them or an array.
+    
+    Array rows are in ``FACTOR_NAMES`` order; None means the default weights.
+    """
+    if weight_sets is None or isinstance(weight_sets, dict):
+        return factor_weight_vector(weight_sets)[np.newaxis, :]
+    if not isinstance(weight_sets, np.ndarray) and len(weight_sets) and all(
+        weights is None or isinstance(weights, dict) for weights in weight_sets
+    ):
+        return np.vstack([factor_weight_vector(weights) for weights in weight_sets])
+    
+    matrix = np.asarray(weight_sets, dtype=np.float64)
+    if matrix.ndim == 1:
+        matrix = matrix[np.newaxis, :]
+    if matrix.ndim != 2 or matrix.shape[1] != len(FACTOR_NAMES):
+        raise ValueError(
+            f"Weight matrix must have {len(FACTOR_NAMES)} columns, got shape {matrix.shape}"
+        )
+    return matrix
+
+
+def _enum_codes(values: Sequence[Any], enum_class: type) -> np.ndarray:
+    """Ordinal code per value; values may be enum members or their raw values."""
+    members = list(enum_class)
+    lookup = {member: code for code, member in enumerate(members)}
+    lookup.update({member.value: code for code, member in enumerate(members)})
+    try:
+        return np.array([lookup[value] for value in values], dtype=np.int8)
+    except KeyError as exc:
+        raise ValueError(f"Unknown {enum_class.__name__}: {exc.args[0]}") from None
+
+
+def _epoch_nanoseconds(values: Sequence[Any]) -> np.ndarray:
+    """int64 epoch nanoseconds of datetime-like values (NaT for missing)."""
+    return np.array(
+        [np.iinfo(np.int64).min if value is None else pd.Timestamp(value).value for value in values],
+        dtype=np.int64
+    )
+
+
+def _object_column(values: Sequence[Any]) -> np.ndarray:
+    column = np.empty(len(values), dtype=object)
+    column[:] = list(values)
+    return column
+
+
+@dataclass
+class TouchpointColumns:
+    """Touchpoints as columns; enum fields are ordinal codes into TOUCHPOINT_TYPES / STAGE_TYPES."""
+    touchpoint_ids: np.ndarray
+    lead_ids: np.ndarray
+    account_ids: np.ndarray
+    timestamps: np.ndarray
+    type_codes: np.ndarray
+    channels: np.ndarray
+    campaign_ids: np.ndarray
+    engagement_scores: np.ndarray
+    stage_codes: np.ndarray
+    costs: np.ndarray
+    is_sales_touch: np.ndarray
+    is_marketing_touch: np.ndarray
+    
+    def __len__(self) -> int:
+        return len(self.touchpoint_ids)
+    
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> "TouchpointColumns":
+        """Build from a frame whose columns are named like the TouchpointData fields."""
+        return cls(
+            touchpoint_ids=_object_column(df['touchpoint_id']),
+            lead_ids=_object_column(df['lead_id']),
+            account_ids=_object_column(df['account_id']),
+            timestamps=_epoch_nanoseconds(df['timestamp']),
+            type_codes=_enum_codes(df['touchpoint_type'], TouchpointType),
+            channels=_object_column(df['channel']),
+            campaign_ids=_object_column(df['campaign_id']),
+            engagement_scores=df['engagement_score'].to_numpy(dtype=np.float64),
+            stage_codes=_enum_codes(df['stage_influence'], B2BStageType),
+            costs=df['cost'].to_numpy(dtype=np.float64),
+            is_sales_touch=df['is_sales_touch'].to_numpy(dtype=bool),
+            is_marketing_touch=df['is_marketing_touch'].to_numpy(dtype=bool)
+        )
+    
+    @classmethod
+    def from_records(cls, touchpoint_data: List[TouchpointData]) -> "TouchpointColumns":
+        """Adapter for existing ``TouchpointData`` lists."""
+        return cls.from_dataframe(_records_frame(touchpoint_data, TouchpointData))
+    
+    def take(self, rows: np.ndarray) -> "TouchpointColumns":
+        """Subset of touchpoints, in the order of ``rows``."""
+        return TouchpointColumns(**{name: column[rows] for name, column in vars(self).items()})
+
+
+@dataclass
+class LeadColumns:
+    """Leads as columns."""
+    lead_ids: np.ndarray
+    lead_scores: np.ndarray
+    demographic_scores: np.ndarray
+    firmographic_scores: np.ndarray
+    quality_tiers: np.ndarray
+    
+    def __len__(self) -> int:
+        return len(self.lead_ids)
+    
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> "LeadColumns":
+        """Build from a frame whose columns are named like the LeadData fields."""
+        return cls(
+            lead_ids=_object_column(df['lead_id']),
+            lead_scores=df['lead_score'].to_numpy(dtype=np.float64),
+            demographic_scores=df['demographic_score'].to_numpy(dtype=np.float64),
+            firmographic_scores=df['firmographic_score'].to_numpy(dtype=np.float64),
+            quality_tiers=_object_column(df['lead_quality_tier'])
+        )
+    
+    @classmethod
+    def from_records(cls, lead_data: List[LeadData]) -> "LeadColumns":
+        """Adapter for existing ``LeadData`` lists."""
+        return cls.from_dataframe(_records_frame(lead_data, LeadData))
+
+
+@dataclass
+class OpportunityColumns:
+    """
+    Opportunities as columns; a conversion is the close date, else the creation date.
+    
+    ``close_times`` holds ``OPEN_INTERVAL_END`` for open opportunities.
+    """
+    opportunity_ids: np.ndarray
+    account_ids: np.ndarray
+    amounts: np.ndarray
+    created_times: np.ndarray
+    close_times: np.ndarray
+    conversion_times: np.ndarray
+    sales_cycle_days: np.ndarray
+    deal_size_tiers: np.ndarray
+    decision_makers_count: np.ndarray
+    influencers_count: np.ndarray
+    
+    def __len__(self) -> int:
+        return len(self.opportunity_ids)
+    
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> "OpportunityColumns":
+        """Build from a frame whose columns are named like the OpportunityData fields."""
+        close_times = _epoch_nanoseconds(df['close_date'].where(df['close_date'].notna(), None))
+        is_open = close_times == np.iinfo(np.int64).min
+        created_times = _epoch_nanoseconds(df['created_date'])
+        return cls(
+            opportunity_ids=_object_column(df['opportunity_id']),
+            account_ids=_object_column(df['account_id']),
+            amounts=df['amount'].to_numpy(dtype=np.float64),
+            created_times=created_times,
+            close_times=np.where(is_open, OPEN_INTERVAL_END, close_times),
+            conversion_times=np.where(is_open, created_times, close_times),
+            sales_cycle_days=df['sales_cycle_days'].to_numpy(dtype=np.float64),
+            deal_size_tiers=_object_column(df['deal_size_tier']),
+            decision_makers_count=df['decision_makers_count'].to_numpy(dtype=np.float64),
+            influencers_count=df['influencers_count'].to_numpy(dtype=np.float64)
+        )
+    
+    @classmethod
+    def from_records(cls, opportunity_data: List[OpportunityData]) -> "OpportunityColumns":
+        """Adapter for existing ``OpportunityData`` lists."""
+        return cls.from_dataframe(_records_frame(opportunity_data, OpportunityData))
+
+
+def _account_codes(
+    opportunities: OpportunityColumns,
+    touchpoints: TouchpointColumns
+) -> Tuple[np.ndarray, np.ndarray, int]:
+    """Account codes of touchpoints and opportunities in one code space, and the account count."""
+    codes, _ = pd.factorize(
+        np.concatenate([touchpoints.account_ids, opportunities.account_ids]), use_na_sentinel=False
+    )
+    account_count = int(codes.max()) + 1 if len(codes) else 0
+    return codes[:len(touchpoints)], codes[len(touchpoints):], account_count
+
+
+def _records_frame(records: List[Any], record_class: type) -> pd.DataFrame:
+    """Frame of dataclass records, keeping enum members and None as objects."""
+    columns = list(record_class.__dataclass_fields__)
+    return pd.DataFrame(
+        {name: _object_column([getattr(record, name) for record in records]) for name in columns},
+        columns=columns
+    )
+
+
+@dataclass
+class OpportunityPairs:
+    """
+    (opportunity, touchpoint of its account) pairs, grouped by opportunity.
+    
+    Pairs of one opportunity are contiguous and keep touchpoint input order,
+    so per-opportunity sums accumulate in the same order as a Python loop.
+    """
+    opportunity: np.ndarray
+    row: np.ndarray
+    opportunity_count: int
+    touchpoint_count: int
+    
+    @classmethod
+    def build(cls, opportunities: OpportunityColumns, touchpoints: TouchpointColumns) -> "OpportunityPairs":
+        """Every opportunity paired with every touchpoint of its account."""
+        touch_accounts, opp_accounts, account_count = _account_codes(opportunities, touchpoints)
+        
+        counts = np.bincount(touch_accounts, minlength=account_count)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]]).astype(np.int64)
+        rows = np.argsort(touch_accounts, kind='stable')
+        
+        opp_lengths = counts[opp_accounts] if len(opp_accounts) else np.zeros(0, dtype=np.int64)
+        pair_opportunity = np.repeat(np.arange(len(opportunities)), opp_lengths)
+        pair_offsets = np.concatenate([[0], np.cumsum(opp_lengths)]).astype(np.int64)
+        within = np.arange(pair_offsets[-1]) - pair_offsets[:-1][pair_opportunity]
+        pair_row = rows[starts[opp_accounts][pair_opportunity] + within] if len(within) else within
+        
+        return cls(
+            opportunity=pair_opportunity,
+            row=pair_row,
+            opportunity_count=len(opportunities),
+            touchpoint_count=len(touchpoints)
+        )
+    
+    @classmethod
+    def build_assigned(
+        cls,
+        opportunities: OpportunityColumns,
+        touchpoints: TouchpointColumns,
+        window_days: Optional[float] = None,
+        assignment: str = 'lifetime'
+    ) -> "OpportunityPairs":
+        """Pairs whose opportunity interval contains the touchpoint, see ``OpportunityIntervalIndex``."""
+        index = OpportunityIntervalIndex.from_columns(
+            opportunities.account_ids, opportunities.created_times, opportunities.close_times,
+            window_days, assignment
+        )
+        pair_opportunity, pair_row = index.pairs(touchpoints.account_ids, touchpoints.timestamps)
+        return cls(
+            opportunity=pair_opportunity,
+            row=pair_row,
+            opportunity_count=len(opportunities),
+            touchpoint_count=len(touchpoints)
+        )
+    
+    def opportunity_sum(self, values: np.ndarray) -> np.ndarray:
+        """Sum a per-pair array within each opportunity."""
+        return np.bincount(self.opportunity, weights=values, minlength=self.opportunity_count)
+
+
+@dataclass
+class B2BFactorMatrix:
+    """
+    Scores of the five B2B factors for every touchpoint.
+    
+    Column ``k`` of ``scores`` holds factor ``FACTOR_NAMES[k]``; cells the
+    row-wise engine would leave out of a factor are 0 in ``scores`` and
+    False in ``scored``, so combining factors is a matrix-vector product.
+    """
+    touchpoint_ids: np.ndarray
+    scores: np.ndarray
+    scored: np.ndarray
+    
+    def factor(self, name: str) -> np.ndarray:
+        """One factor's scores, NaN where unscored."""
+        column = FACTOR_NAMES.index(name)
+        return np.where(self.scored[:, column], self.scores[:, column], np.nan)
+    
+    def combine(self, weights: Optional[Dict[str, float]] = None) -> np.ndarray:
+        """Combined attribution per touchpoint for one set of factor weights."""
+        return self.scores @ factor_weight_vector(weights)
+    
+    def to_dict(self, values: np.ndarray) -> Dict[str, float]:
+        """Values by touchpoint ID, skipping NaN."""
+        kept = np.flatnonzero(~np.isnan(values))
+        return dict(zip(self.touchpoint_ids[kept].tolist(), values[kept].tolist()))
+
+
+@dataclass
+class B2BFactorAnalysis:
+    """
+    Factor matrix of one analysis with its per-group factor totals.
+    
+    Row ``g`` of ``channel_factor_totals`` (and of ``alignment_factor_totals``,
+    in ``ALIGNMENT_GROUPS`` order) is the factor-wise sum over the group's
+    touchpoints, so group attribution for any weights is a (groups x 5)
+    product; only per-touchpoint output reads the full matrix.
+    """
+    matrix: B2BFactorMatrix
+    channels: np.ndarray
+    channel_factor_totals: np.ndarray
+    channel_costs: np.ndarray
+    channel_touchpoint_counts: np.ndarray
+    channel_touchpoint_types: List[List[str]]
+    alignment_factor_totals: np.ndarray
+    
+    @property
+    def touchpoint_count(self) -> int:
+        return len(self.matrix.touchpoint_ids)
+    
+    @classmethod
+    def build(cls, matrix: B2BFactorMatrix, touchpoints: TouchpointColumns) -> "B2BFactorAnalysis":
+        """Fold the factor matrix into channel and sales/marketing totals."""
+        channel_codes, channels = pd.factorize(touchpoints.channels, use_na_sentinel=False)
+        channel_count = len(channels)
+        
+        type_count = len(TOUCHPOINT_TYPES)
+        channel_touchpoint_types: List[List[str]] = [[] for _ in range(channel_count)]
+        for pair in np.unique(channel_codes * type_count + touchpoints.type_codes).tolist():
+            channel_touchpoint_types[pair // type_count].append(TOUCHPOINT_TYPES[pair % type_count].value)
+        
+        sales = touchpoints.is_sales_touch
+        marketing = touchpoints.is_marketing_touch
+        groups = np.select(
+            [sales & marketing, sales, marketing],
+            [ALIGNMENT_GROUPS.index(name) for name in ('joint', 'sales', 'marketing')],
+            -1
+        )
+        aligned = groups >= 0
+        
+        return cls(
+            matrix=matrix,
+            channels=np.asarray(channels, dtype=object),
+            channel_factor_totals=cls._group_factor_totals(channel_codes, matrix.scores, channel_count),
+            channel_costs=np.bincount(channel_codes, weights=touchpoints.costs, minlength=channel_count),
+            channel_touchpoint_counts=np.bincount(channel_codes, minlength=channel_count),
+            channel_touchpoint_types=channel_touchpoint_types,
+            alignment_factor_totals=cls._group_factor_totals(
+                groups[aligned], matrix.scores[aligned], len(ALIGNMENT_GROUPS)
+            )
+        )
+    
+    def reweight_batch(
+        self,
+        weight_sets: Union[None, Dict[str, float], Sequence[Dict[str, float]], np.ndarray],
+        include_touchpoints: bool = False
+    ) -> Dict[str, np.ndarray]:
+        """
+        Group attribution for many weight sets at once.
+        
+        Args:
+            weight_sets: Anything ``factor_weight_matrix`` accepts
+            include_touchpoints: Also return per-touchpoint combined attribution
+        
+        Returns:
+            ``weights`` (k x 5), ``channels``, ``channel_attribution`` (k x channels),
+            ``alignment_attribution`` (k x 3, ``ALIGNMENT_GROUPS`` order) and, if
+            requested, ``combined_attribution`` (k x touchpoints)
+        """
+        weights = factor_weight_matrix(weight_sets)
+        result = {
+            'weights': weights,
+            'channels': self.channels,
+            'channel_attribution': weights @ self.channel_factor_totals.T,
+            'alignment_attribution': weights @ self.alignment_factor_totals.T
+        }
+        if include_touchpoints:
+            result['combined_attribution'] = weights @ self.matrix.scores.T
+        return result
+    
+    @staticmethod
+    def _group_factor_totals(codes: np.ndarray, scores: np.ndarray, group_count: int) -> np.ndarray:
+        """(groups x factors) sums of ``scores`` rows by group code."""
+        totals = np.zeros((group_count, len(FACTOR_NAMES)))
+        for column in range(len(FACTOR_NAMES)):
+            totals[:, column] = np.bincount(codes, weights=scores[:, column], minlength=group_count)
+        return totals
+
+
+class ColumnarB2BAttributionEngine(LoggerMixin):
+    """
+    Vectorized counterpart of ``B2BMarketingAttributionEngine``.
+    
+    Weight tables are read from the wrapped engine, so customizing its
+    ``touchpoint_type_weights`` and friends applies here too. Factor scores
+    are arrays aligned with the touchpoint columns, NaN where the original
+    engine would leave a touchpoint out of that factor's dictionary.
+    Touchpoint IDs are assumed unique.
+    """
+    
+    def __init__(self, engine: Optional[B2BMarketingAttributionEngine] = None):
+        self.engine = engine or B2BMarketingAttributionEngine()
+        self.analyzer = B2BAttributionAnalyzer(self.engine)
+    
+    def _type_weights(self) -> np.ndarray:
+        return np.array([self.engine.touchpoint_type_weights.get(t, 1.0) for t in TOUCHPOINT_TYPES])
+    
+    def _stage_weights(self) -> np.ndarray:
+        return np.array([self.engine.stage_progression_weights.get(s, 1.0) for s in STAGE_TYPES])
+    
+    def calculate_b2b_time_decay(
+        self,
+        touchpoints: TouchpointColumns,
+        opportunities: OpportunityColumns,
+        avg_sales_cycle_days: int = 180,
+        pairs: Optional[OpportunityPairs] = None,
+        out: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Time-decay credit per touchpoint, as in the row-wise engine."""
+        pairs = pairs or OpportunityPairs.build_assigned(
+            opportunities, touchpoints, self.engine.settings.b2b_opportunity_window_days,
+            self.engine.settings.b2b_opportunity_assignment
+        )
+        
+        # ``sales_cycle_days or avg_sales_cycle_days``
+        reported = opportunities.sales_cycle_days
+        cycle_days = np.where((reported != 0) & ~np.isnan(reported), reported, avg_sales_cycle_days)
+        half_life_days = np.maximum(cycle_days * 0.3, 14)
+        
+        # Whole days, floored like timedelta.days
+        gap = opportunities.conversion_times[pairs.opportunity] - touchpoints.timestamps[pairs.row]
+        days_to_conversion = np.maximum(0, gap // NANOSECONDS_PER_DAY)
+        weight = np.exp(-days_to_conversion / half_life_days[pairs.opportunity])
+        weight *= self._type_weights()[touchpoints.type_codes[pairs.row]]
+        
+        total_weight = pairs.opportunity_sum(weight)
+        valid = total_weight[pairs.opportunity] > 0
+        pair_credit = np.zeros(len(weight))
+        pair_credit[valid] = (
+            weight[valid] / total_weight[pairs.opportunity[valid]]
+        ) * opportunities.amounts[pairs.opportunity[valid]]
+        return self._opportunity_credit(pairs, pair_credit, valid, out)
+    
+    def calculate_lead_quality_impact(
+        self,
+        leads: LeadColumns,
+        touchpoints: TouchpointColumns,
+        out: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Lead-quality credit per touchpoint; NaN for touchpoints without a known lead."""
+        # A later lead with the same ID replaces an earlier one, like a dict lookup
+        lead_ids = pd.Index(leads.lead_ids)
+        last_occurrence = ~lead_ids.duplicated(keep='last')
+        lead_rows = np.flatnonzero(last_occurrence)
+        lead_position = lead_ids[last_occurrence].get_indexer(pd.Index(touchpoints.lead_ids))
+        known = lead_position >= 0
+        lead = lead_rows[lead_position[known]]
+        
+        quality_multiplier = np.array([
+            self.engine.lead_quality_multipliers.get(tier, 1.0) for tier in leads.quality_tiers
+        ], dtype=np.float64)
+        
+        credit = np.empty(len(touchpoints)) if out is None else out
+        credit[~known] = np.nan
+        credit[known] = (
+            touchpoints.engagement_scores[known] / 100.0 *
+            quality_multiplier[lead] *
+            np.minimum(leads.lead_scores[lead] / 100.0, 2.0) *
+            (1 + leads.demographic_scores[lead] / 1000.0) *
+            (1 + leads.firmographic_scores[lead] / 1000.0)
+        )
+        return credit
+    
+    def calculate_account_level_attribution(
+        self,
+        opportunities: OpportunityColumns,
+        touchpoints: TouchpointColumns,
+        pairs: Optional[OpportunityPairs] = None,
+        out: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Account-level credit per touchpoint, as in the row-wise engine."""
+        pairs = pairs or OpportunityPairs.build_assigned(
+            opportunities, touchpoints, self.engine.settings.b2b_opportunity_window_days,
+            self.engine.settings.b2b_opportunity_assignment
+        )
+        
+        base_weight = (
+            self._type_weights()[touchpoints.type_codes] * (touchpoints.engagement_scores / 100.0)
+        )
+        base_weight = np.where(touchpoints.is_sales_touch, base_weight * 1.3, base_weight)
+        
+        committee_size = opportunities.decision_makers_count + opportunities.influencers_count
+        deal_size_multiplier = self._tier_lookup(
+            opportunities.deal_size_tiers, self.engine._get_deal_size_multiplier
+        )
+        
+        opp = pairs.opportunity
+        weight = (
+            base_weight[pairs.row] *
+            self._account_complexity(opportunities)[opp] *
+            (1 + committee_size * 0.1)[opp] *
+            deal_size_multiplier[opp]
+        )
+        total_weight = pairs.opportunity_sum(weight)
+        valid = total_weight[opp] > 0
+        pair_credit = np.zeros(len(weight))
+        pair_credit[valid] = (
+            weight[valid] / total_weight[opp[valid]]
+        ) * opportunities.amounts[opp[valid]]
+        return self._opportunity_credit(pairs, pair_credit, valid, out)
+    
+    def calculate_stage_progression_attribution(
+        self,
+        touchpoints: TouchpointColumns,
+        out: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Stage-progression credit per touchpoint."""
+        credit = np.empty(len(touchpoints)) if out is None else out
+        credit[:] = (
+            touchpoints.engagement_scores / 100.0 *
+            self._stage_weights()[touchpoints.stage_codes] *
+            self._type_weights()[touchpoints.type_codes]
+        )
+        return credit
+    
+    def calculate_pipeline_velocity_impact(
+        self,
+        opportunities: OpportunityColumns,
+        touchpoints: TouchpointColumns,
+        out: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Pipeline-velocity credit per touchpoint, as in the row-wise engine.
+        
+        A touchpoint takes the velocity of the last opportunity of its account
+        in input order, so no pairs are needed; NaN for touchpoints of
+        accounts without opportunities.
+        """
+        actual_cycle = opportunities.sales_cycle_days
+        expected_cycle = self._tier_lookup(
+            opportunities.deal_size_tiers, self.engine._get_expected_cycle_days
+        )
+        velocity_bonus = np.where(
+            actual_cycle < expected_cycle,
+            1 + ((expected_cycle - actual_cycle) / expected_cycle) * 0.5,
+            np.maximum(0.5, 1 - ((actual_cycle - expected_cycle) / expected_cycle) * 0.3)
+        )
+        
+        high_impact = np.isin(touchpoints.type_codes, [
+            TOUCHPOINT_TYPES.index(TouchpointType.DEMO_REQUEST),
+            TOUCHPOINT_TYPES.index(TouchpointType.SALES_CALL)
+        ])
+        
+        touch_accounts, opp_accounts, account_count = _account_codes(opportunities, touchpoints)
+        latest = np.full(account_count, -1, dtype=np.int64)
+        np.maximum.at(latest, opp_accounts, np.arange(len(opportunities)))
+        opportunity = latest[touch_accounts]
+        known = opportunity >= 0
+        
+        row_bonus = velocity_bonus[opportunity[known]]
+        velocity_impact = np.where(high_impact[known], row_bonus * 1.2, row_bonus)
+        credit = np.empty(len(touchpoints)) if out is None else out
+        credit[~known] = np.nan
+        credit[known] = touchpoints.engagement_scores[known] / 100.0 * velocity_impact
+        return credit
+    
+    def factor_matrix(
+        self,
+        leads: LeadColumns,
+        opportunities: OpportunityColumns,
+        touchpoints: TouchpointColumns,
+        avg_sales_cycle_days: int = 180,
+        opportunity_window_days: Optional[float] = None,
+        opportunity_assignment: str = 'lifetime'
+    ) -> B2BFactorMatrix:
+        """
+        Compute all five factors into one preallocated matrix.
+        
+        The (opportunity, touchpoint) pairs assigned by
+        ``opportunity_assignment`` and ``opportunity_window_days`` (see
+        OpportunityIntervalIndex) are built once and shared by the time and
+        account factors; the other factors need no pairs. Every factor writes
+        its column in place; no per-factor dictionary is built.
+        """
+        pairs = OpportunityPairs.build_assigned(
+            opportunities, touchpoints, opportunity_window_days, opportunity_assignment
+        )
+        scores = np.empty((len(touchpoints), len(FACTOR_NAMES)))
+        column = {name: scores[:, k] for k, name in enumerate(FACTOR_NAMES)}
+        
+        self.calculate_b2b_time_decay(
+            touchpoints, opportunities, avg_sales_cycle_days, pairs=pairs, out=column['time']
+        )
+        self.calculate_lead_quality_impact(leads, touchpoints, out=column['quality'])
+        self.calculate_account_level_attribution(
+            opportunities, touchpoints, pairs=pairs, out=column['account']
+        )
+        self.calculate_stage_progression_attribution(touchpoints, out=column['stage'])
+        self.calculate_pipeline_velocity_impact(
+            opportunities, touchpoints, out=column['velocity']
+        )
+        
+        scored = ~np.isnan(scores)
+        scores[~scored] = 0.0
+        return B2BFactorMatrix(
+            touchpoint_ids=touchpoints.touchpoint_ids,
+            scores=scores,
+            scored=scored
+        )
+    
+    def calculate_factor_scores(
+        self,
+        leads: LeadColumns,
+        opportunities: OpportunityColumns,
+        touchpoints: TouchpointColumns
+    ) -> Dict[str, np.ndarray]:
+        """All five factors keyed by ``FACTOR_NAMES``, NaN where unscored."""
+        matrix = self.factor_matrix(leads, opportunities, touchpoints)
+        return {name: matrix.factor(name) for name in FACTOR_NAMES}
+    
+    def combine_b2b_attribution_factors(
+        self,
+        factor_scores: Dict[str, np.ndarray],
+        weights: Optional[Dict[str, float]] = None
+    ) -> np.ndarray:
+        """Weighted sum of the factor scores; a missing score counts as 0."""
+        stacked = np.column_stack([np.nan_to_num(factor_scores[name]) for name in FACTOR_NAMES])
+        return stacked @ factor_weight_vector(weights)
+    
+    def apply_attribution_window(
+        self,
+        touchpoints: TouchpointColumns,
+        opportunities: OpportunityColumns,
+        window: Optional[JourneyWindow] = None
+    ) -> TouchpointColumns:
+        """Keep touchpoints inside the window of some opportunity of their account."""
+        window = window or JourneyWindow.from_settings()
+        pairs = OpportunityPairs.build(opportunities, touchpoints)
+        
+        lengths = np.bincount(pairs.opportunity, minlength=len(opportunities))
+        view = build_journey_view(
+            offsets=np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64),
+            ids=pairs.row,
+            timestamps=touchpoints.timestamps[pairs.row],
+            channel_codes=np.zeros(len(pairs.row), dtype=np.int64)
+        )
+        windowed = window.apply(view, opportunities.conversion_times)
+        return touchpoints.take(np.unique(windowed.ids))
+    
+    def analyze(
+        self,
+        lead_data: Union[LeadColumns, List[LeadData]],
+        opportunity_data: Union[OpportunityColumns, List[OpportunityData]],
+        touchpoint_data: Union[TouchpointColumns, List[TouchpointData]],
+        window: Optional[JourneyWindow] = None,
+        opportunity_window_days: Optional[float] = None,
+        opportunity_assignment: Optional[str] = None
+    ) -> B2BFactorAnalysis:
+        """
+        Compute the factor matrix once and keep it for reweighting.
+        
+        Accepts column tables or the engine's dataclass lists.
+        ``opportunity_window_days`` and ``opportunity_assignment`` default to
+        ``settings.b2b_opportunity_window_days`` and
+        ``settings.b2b_opportunity_assignment``.
+        """
+        if opportunity_window_days is None:
+            opportunity_window_days = self.engine.settings.b2b_opportunity_window_days
+        if opportunity_assignment is None:
+            opportunity_assignment = self.engine.settings.b2b_opportunity_assignment
+        
+        leads = lead_data if isinstance(lead_data, LeadColumns) else LeadColumns.from_records(lead_data)
+        opportunities = (
+            opportunity_data if isinstance(opportunity_data, OpportunityColumns)
+            else OpportunityColumns.from_records(opportunity_data)
+        )
+        touchpoints = (
+            touchpoint_data if isinstance(touchpoint_data, TouchpointColumns)
+            else TouchpointColumns.from_records(touchpoint_data)
+        )
+        
+        self.logger.info(
+            "Starting columnar B2B attribution calculation",
+            leads_count=len(leads),
+            opportunities_count=len(opportunities),
+            touchpoints_count=len(touchpoints)
+        )
+        
+        if window is not None:
+            touchpoints = self.apply_attribution_window(touchpoints, opportunities, window)
+        
+        matrix = self.factor_matrix(
+            leads, opportunities, touchpoints, opportunity_window_days=opportunity_window_days,
+            opportunity_assignment=opportunity_assignment
+        )
+        return B2BFactorAnalysis.build(matrix, touchpoints)
+    
+    def b2b_specific_attribution(
+        self,
+        lead_data: Union[LeadColumns, List[LeadData]],
+        opportunity_data: Union[OpportunityColumns, List[OpportunityData]],
+        touchpoint_data: Union[TouchpointColumns, List[TouchpointData]],
+        window: Optional[JourneyWindow] = None,
+        weights: Optional[Dict[str, float]] = None,
+        opportunity_window_days: Optional[float] = None,
+        opportunity_assignment: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Columnar ``b2b_specific_attribution`` with the same result layout.
+        
+        Accepts column tables or the engine's dataclass lists.
+        """
+        analysis = self.analyze(
+            lead_data, opportunity_data, touchpoint_data, window,
+            opportunity_window_days, opportunity_assignment
+        )
+        return self.attribution_results(analysis, weights)
+    
+    def attribution_results(
+        self,
+        analysis: B2BFactorAnalysis,
+        weights: Optional[Dict[str, float]] = None,
+        top_k: Optional[int] = None,
+        quantiles: Optional[List[float]] = None
+    ) -> Dict[str, Any]:
+        """Per-factor and combined attribution dictionaries of an analysis."""
+        matrix = analysis.matrix
+        credit = matrix.combine(weights)
+        
+        return {
+            'time_weighted_attribution': matrix.to_dict(matrix.factor('time')),
+            'quality_weighted_attribution': matrix.to_dict(matrix.factor('quality')),
+            'account_based_attribution': matrix.to_dict(matrix.factor('account')),
+            'stage_progression_attribution': matrix.to_dict(matrix.factor('stage')),
+            'pipeline_velocity_attribution': matrix.to_dict(matrix.factor('velocity')),
+            'combined_b2b_attribution': matrix.to_dict(credit),
+            'attribution_summary': self.summarize(matrix, credit, top_k, quantiles)
+        }
+    
+    def reweight(
+        self,
+        analysis: B2BFactorAnalysis,
+        weights: Optional[Dict[str, float]] = None,
+        include_touchpoints: bool = True,
+        top_k: Optional[int] = None,
+        quantiles: Optional[List[float]] = None
+    ) -> Dict[str, Any]:
+        """
+        Combined attribution, channel performance and alignment for new weights.
+        
+        Channel performance and alignment match ``B2BAttributionAnalyzer`` on
+        the combined attribution, but come from the cached group totals.
+        
+        Args:
+            analysis: Result of ``analyze``
+            weights: Factor weights (default weights if None)
+            include_touchpoints: Also rebuild the per-touchpoint combined
+                attribution and its summary
+            top_k: Top contributing touchpoints in the summary
+            quantiles: Touchpoint fractions for the summary's credit shares
+        """
+        batch = analysis.reweight_batch(weights)
+        
+        channel_performance = {}
+        for code, channel in enumerate(analysis.channels.tolist()):
+            metrics = {
+                'total_attribution': float(batch['channel_attribution'][0, code]),
+                'touchpoint_count': int(analysis.channel_touchpoint_counts[code]),
+                'total_cost': float(analysis.channel_costs[code]),
+                'touchpoint_types': list(analysis.channel_touchpoint_types[code])
+            }
+            self.analyzer.add_efficiency_metrics(metrics)
+            channel_performance[channel] = metrics
+        
+        sales, marketing, joint = batch['alignment_attribution'][0].tolist()
+        result = {
+            'channel_performance': channel_performance,
+            'sales_marketing_alignment': self.analyzer.alignment_report(sales, marketing, joint)
+        }
+        if include_touchpoints:
+            credit = analysis.matrix.combine(weights)
+            result['combined_b2b_attribution'] = analysis.matrix.to_dict(credit)
+            result['attribution_summary'] = self.summarize(analysis.matrix, credit, top_k, quantiles)
+        return result
+    
+    def analyze_attribution(self, credit: np.ndarray, touchpoints: TouchpointColumns) -> Dict[str, Any]:
+        """
+        Channel performance and alignment of any per-touchpoint credit array.
+        
+        One grouped pass via ``B2BAttributionAnalyzer.analyze_attribution_columns``;
+        NaN credit marks unattributed touchpoints.
+        """
+        return self.analyzer.analyze_attribution_columns(
+            credit=credit,
+            channels=touchpoints.channels,
+            touchpoint_types=TOUCHPOINT_TYPE_VALUES[touchpoints.type_codes],
+            costs=touchpoints.costs,
+            is_sales_touch=touchpoints.is_sales_touch,
+            is_marketing_touch=touchpoints.is_marketing_touch
+        )
+    
+    def summarize(
+        self,
+        matrix: B2BFactorMatrix,
+        credit: np.ndarray,
+        top_k: Optional[int] = None,
+        quantiles: Optional[List[float]] = None
+    ) -> Dict[str, Any]:
+        """``generate_attribution_summary`` straight from a credit array."""
+        settings = self.engine.settings
+        return summarize_attribution(
+            matrix.touchpoint_ids,
+            credit,
+            top_k=settings.summary_top_k if top_k is None else top_k,
+            quantiles=settings.summary_quantiles if quantiles is None else quantiles
+        )
+    
+    def _opportunity_credit(
+        self,
+        pairs: OpportunityPairs,
+        pair_credit: np.ndarray,
+        valid: np.ndarray,
+        out: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Per-touchpoint credit summed over its valid pairs; NaN if it has none."""
+        credit = np.empty(pairs.touchpoint_count) if out is None else out
+        credit[:] = np.bincount(
+            pairs.row[valid], weights=pair_credit[valid], minlength=pairs.touchpoint_count
+        )
+        assigned = np.bincount(pairs.row[valid], minlength=pairs.touchpoint_count) > 0
+        credit[~assigned] = np.nan
+        return credit
+    
+    def _account_complexity(self, opportunities: OpportunityColumns) -> np.ndarray:
+        """Vectorized ``_calculate_account_complexity``."""
+        tiers = opportunities.deal_size_tiers
+        stakeholders = opportunities.decision_makers_count + opportunities.influencers_count
+        cycle = opportunities.sales_cycle_days
+        
+        complexity = np.ones(len(opportunities))
+        complexity += np.select([tiers == 'enterprise', tiers == 'mid-market'], [0.3, 0.15], 0.0)
+        complexity += np.select([stakeholders > 5, stakeholders > 3], [0.2, 0.1], 0.0)
+        complexity += np.select([cycle > 365, cycle > 180], [0.25, 0.15], 0.0)
+        return complexity
+    
+    @staticmethod
+    def _tier_lookup(tiers: np.ndarray, lookup) -> np.ndarray:
+        """Apply a per-tier engine lookup once per distinct tier."""
+        codes, unique_tiers = pd.factorize(tiers, use_na_sentinel=False)
+        return np.array([lookup(tier) for tier in unique_tiers], dtype=np.float64)[codes]
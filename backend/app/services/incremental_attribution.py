@@ -0,0 +1,197 @@
+"""
+Incremental time-decay attribution for journeys that keep growing.
+
+Time-decay credit for touch ``i`` of a journey converting at its last
+touch ``T`` is ``2^((t_i - T) / h) / S`` with ``S = sum_j 2^((t_j - T) / h)``.
+Keeping ``T`` (the anchor) and ``S`` per journey makes an append O(1):
+a later touch rescales ``S`` by ``2^((T_old - T_new) / h)`` and adds 1, an
+earlier one just adds its own weight. Credit for any touch is then one
+exponential and one division, with no pass over the rest of the journey.
+"""
+from typing import Dict, Hashable, Iterable, List, Optional, Union
+import numpy as np
+
+from backend.app.services.attribution_models import NANOSECONDS_PER_DAY
+from backend.app.utils.logging import LoggerMixin
+from config.settings import get_attribution_settings
+
+
+class IncrementalTimeDecayScorer(LoggerMixin):
+    """
+    Per-journey running time-decay state with O(1) appends.
+    
+    Matches ``TimeDecayAttribution`` exactly: every journey converts at its
+    latest touch. Journey keys are stored as strings.
+    """
+    
+    def __init__(self, half_life_days: Optional[float] = None, initial_capacity: int = 1024):
+        self.half_life_days = half_life_days or get_attribution_settings().time_decay_half_life
+        self.journey_rows: Dict[str, int] = {}
+        self.journey_keys: List[str] = []
+        self.anchor = np.zeros(initial_capacity, dtype=np.int64)
+        self.weight_sum = np.zeros(initial_capacity)
+        self.touch_count = np.zeros(initial_capacity, dtype=np.int64)
+    
+    @property
+    def journey_count(self) -> int:
+        return len(self.journey_keys)
+    
+    @property
+    def _half_life_ns(self) -> float:
+        return self.half_life_days * NANOSECONDS_PER_DAY
+    
+    def append(self, journey_key: Hashable, timestamp: int) -> float:
+        """
+        Add one touch (int64 epoch nanoseconds) to a journey.
+        
+        Returns:
+            The journey's new unnormalized weight sum
+        """
+        row = self._row(journey_key)
+        timestamp = int(timestamp)
+        
+        if self.touch_count[row] == 0:
+            self.anchor[row] = timestamp
+            self.weight_sum[row] = 1.0
+        elif timestamp > self.anchor[row]:
+            shift = (self.anchor[row] - timestamp) / self._half_life_ns
+            self.weight_sum[row] = self.weight_sum[row] * 2.0 ** shift + 1.0
+            self.anchor[row] = timestamp
+        else:
+            self.weight_sum[row] += 2.0 ** ((timestamp - self.anchor[row]) / self._half_life_ns)
+        
+        self.touch_count[row] += 1
+        return float(self.weight_sum[row])
+    
+    def append_batch(self, journey_keys: Iterable[Hashable], timestamps: np.ndarray) -> None:
+        """
+        Add many touches at once, e.g. one ingest batch.
+        
+        Args:
+            journey_keys: Journey key per touch
+            timestamps: Touch times as int64 epoch nanoseconds
+        """
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        rows = np.array([self._row(key) for key in journey_keys], dtype=np.int64)
+        if len(rows) != len(timestamps):
+            raise ValueError(
+                f"{len(rows)} journey keys for {len(timestamps)} timestamps"
+            )
+        if not len(rows):
+            return
+        
+        touched, local = np.unique(rows, return_inverse=True)
+        batch_latest = np.full(len(touched), np.iinfo(np.int64).min)
+        np.maximum.at(batch_latest, local, timestamps)
+        
+        had_touches = self.touch_count[touched] > 0
+        old_anchor = self.anchor[touched]
+        new_anchor = np.where(had_touches, np.maximum(old_anchor, batch_latest), batch_latest)
+        
+        rescale = np.zeros(len(touched))
+        rescale[had_touches] = np.power(
+            2.0, (old_anchor[had_touches] - new_anchor[had_touches]) / self._half_life_ns
+        )
+        added = np.bincount(
+            local,
+            weights=np.power(2.0, (timestamps - new_anchor[local]) / self._half_life_ns),
+            minlength=len(touched)
+        )
+        
+        self.weight_sum[touched] = self.weight_sum[touched] * rescale + added
+        self.anchor[touched] = new_anchor
+        self.touch_count[touched] += np.bincount(local, minlength=len(touched))
+    
+    def credit(
+        self,
+        journey_keys: Iterable[Hashable],
+        timestamps: np.ndarray,
+        conversion_values: Union[float, np.ndarray] = 1.0
+    ) -> np.ndarray:
+        """
+        Current credit of touches already appended to their journeys.
+        
+        Args:
+            journey_keys: Journey key per touch
+            timestamps: Touch times as int64 epoch nanoseconds
+            conversion_values: Scalar or per-touch conversion value of the journey
+        
+        Returns:
+            Credit per touch; unknown journeys get 0
+        """
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        rows = np.array(
+            [self.journey_rows.get(str(key), -1) for key in journey_keys], dtype=np.int64
+        )
+        known = rows >= 0
+        
+        credit = np.zeros(len(rows))
+        known_rows = rows[known]
+        weights = np.power(
+            2.0,
+            np.minimum(0.0, (timestamps[known] - self.anchor[known_rows]) / self._half_life_ns)
+        )
+        credit[known] = weights / self.weight_sum[known_rows]
+        return credit * conversion_values
+    
+    def journey_state(self, journey_key: Hashable) -> Dict[str, float]:
+        """Anchor, weight sum and touch count of one journey."""
+        row = self.journey_rows[str(journey_key)]
+        return {
+            'anchor': int(self.anchor[row]),
+            'weight_sum': float(self.weight_sum[row]),
+            'touch_count': int(self.touch_count[row])
+        }
+    
+    def save(self, path: str) -> None:
+        """Persist all journey states to an ``.npz`` file."""
+        count = self.journey_count
+        np.savez_compressed(
+            path,
+            half_life_days=self.half_life_days,
+            journey_keys=np.array(self.journey_keys, dtype=str),
+            anchor=self.anchor[:count],
+            weight_sum=self.weight_sum[:count],
+            touch_count=self.touch_count[:count]
+        )
+    
+    @classmethod
+    def load(cls, path: str) -> "IncrementalTimeDecayScorer":
+        """Load a scorer written by ``save``."""
+        with np.load(path) as data:
+            keys = data['journey_keys'].tolist()
+            scorer = cls(
+                half_life_days=float(data['half_life_days']),
+                initial_capacity=max(len(keys), 1)
+            )
+            scorer.journey_keys = keys
+            scorer.journey_rows = {key: row for row, key in enumerate(keys)}
+            scorer.anchor[:len(keys)] = data['anchor']
+            scorer.weight_sum[:len(keys)] = data['weight_sum']
+            scorer.touch_count[:len(keys)] = data['touch_count']
+        
+        scorer.logger.info(
+            "Incremental time-decay state loaded",
+            journey_count=scorer.journey_count,
+            half_life_days=scorer.half_life_days
+        )
+        return scorer
+    
+    def _row(self, journey_key: Hashable) -> int:
+        """Row of a journey, registering it (and growing the arrays) if new."""
+        key = str(journey_key)
+        row = self.journey_rows.get(key)
+        if row is not None:
+            return row
+        
+        row = len(self.journey_keys)
+        self.journey_rows[key] = row
+        self.journey_keys.append(key)
+        if row >= len(self.anchor):
+            capacity = max(2 * len(self.anchor), 1)
+            self.anchor = np.resize(self.anchor, capacity)
+            self.weight_sum = np.resize(self.weight_sum, capacity)
+            self.touch_count = np.resize(self.touch_count, capacity)
+            self.weight_sum[row:] = 0.0
+            self.touch_count[row:] = 0
+        return row
@@ -0,0 +1,163 @@
+"""
+Split customer touchpoint histories into one journey per conversion.
+
+Every touchpoint is joined to the first conversion of the same customer at
+or after it (an as-of join), provided that conversion falls within the
+attribution window. Conversions are sorted once per customer and each
+touchpoint finds its conversion by binary search, so a customer with
+hundreds of conversions costs O(n log n) instead of touches x conversions.
+"""
+from dataclasses import dataclass
+from typing import Optional, Sequence, Union
+import numpy as np
+import pandas as pd
+
+from backend.app.services.attribution_models import (
+    NANOSECONDS_PER_DAY,
+    AttributionModel,
+    segment_searchsorted
+)
+
+
+@dataclass
+class ConversionJourneys:
+    """
+    Journeys keyed by conversion, in the columnar layout the models accept.
+    
+    Journey ``j`` ends in input conversion ``j`` and holds the touchpoint
+    rows ``touchpoint_rows[offsets[j]:offsets[j + 1]]``, sorted by time.
+    Touchpoints with no following conversion in the window belong to no
+    journey.
+    """
+    offsets: np.ndarray
+    touchpoint_rows: np.ndarray
+    conversion_times: np.ndarray
+    conversion_values: np.ndarray
+    touchpoint_count: int
+    
+    @property
+    def journey_count(self) -> int:
+        return len(self.conversion_times)
+    
+    def assigned_conversion(self) -> np.ndarray:
+        """Conversion row per input touchpoint, -1 where unassigned."""
+        assigned = np.full(self.touchpoint_count, -1, dtype=np.int64)
+        assigned[self.touchpoint_rows] = np.repeat(np.arange(self.journey_count), np.diff(self.offsets))
+        return assigned
+    
+    def attribute(
+        self,
+        model: AttributionModel,
+        timestamps: np.ndarray,
+        channel_codes: np.ndarray,
+        channel_names: Optional[Sequence[str]] = None
+    ) -> np.ndarray:
+        """
+        Attribute every conversion separately with any attribution model.
+        
+        Args:
+            model: Attribution model to run
+            timestamps: Touchpoint times as int64 epoch nanoseconds, input order
+            channel_codes: Channel code per touchpoint, input order
+            channel_names: Channel name for each channel code
+        
+        Returns:
+            Credit per input touchpoint (0 for unassigned touchpoints)
+        """
+        rows = self.touchpoint_rows
+        credit = model.calculate_attribution_batch(
+            offsets=self.offsets,
+            ids=rows,
+            timestamps=np.asarray(timestamps, dtype=np.int64)[rows],
+            channel_codes=np.asarray(channel_codes, dtype=np.int64)[rows],
+            conversion_values=self.conversion_values,
+            channel_names=channel_names
+        )
+        result = np.zeros(self.touchpoint_count)
+        result[rows] = credit
+        return result
+
+
+def split_journeys_by_conversion(
+    touchpoint_customers: np.ndarray,
+    touchpoint_times: np.ndarray,
+    conversion_customers: np.ndarray,
+    conversion_times: np.ndarray,
+    conversion_values: Union[float, np.ndarray] = 1.0,
+    attribution_window_days: Optional[float] = None
+) -> ConversionJourneys:
+    """
+    Join touchpoints to the next conversion of their customer.
+    
+    A touchpoint at the same instant as a conversion counts toward it.
+    
+    Args:
+        touchpoint_customers: Customer key per touchpoint
+        touchpoint_times: Touchpoint times as int64 epoch nanoseconds
+        conversion_customers: Customer key per conversion
+        conversion_times: Conversion times as int64 epoch nanoseconds
+        conversion_values: Scalar or per-conversion values
+        attribution_window_days: Maximum days from a touchpoint to its conversion
+    
+    Returns:
+        ConversionJourneys with one journey per conversion, in conversion order
+    """
+    touchpoint_times = np.asarray(touchpoint_times, dtype=np.int64)
+    conversion_times = np.asarray(conversion_times, dtype=np.int64)
+    if len(touchpoint_customers) != len(touchpoint_times):
+        raise ValueError("touchpoint_customers and touchpoint_times differ in length")
+    if len(conversion_customers) != len(conversion_times):
+        raise ValueError("conversion_customers and conversion_times differ in length")
+    
+    values = np.asarray(conversion_values, dtype=np.float64)
+    if values.ndim == 0:
+        values = np.full(len(conversion_times), float(values))
+    elif len(values) != len(conversion_times):
+        raise ValueError(
+            f"conversion_values has {len(values)} entries for {len(conversion_times)} conversions"
+        )
+    
+    # One code space for customers on both sides of the join
+    codes, _ = pd.factorize(
+        np.concatenate([
+            np.asarray(touchpoint_customers, dtype=object),
+            np.asarray(conversion_customers, dtype=object)
+        ]),
+        use_na_sentinel=False
+    )
+    touch_codes = codes[:len(touchpoint_times)]
+    conversion_codes = codes[len(touchpoint_times):]
+    customer_count = int(codes.max()) + 1 if len(codes) else 0
+    
+    conversion_order = np.lexsort((conversion_times, conversion_codes))
+    sorted_conversion_times = conversion_times[conversion_order]
+    conversion_bounds = np.concatenate([
+        [0], np.cumsum(np.bincount(conversion_codes, minlength=customer_count))
+    ])
+    
+    position = segment_searchsorted(
+        sorted_conversion_times,
+        conversion_bounds[touch_codes],
+        conversion_bounds[touch_codes + 1],
+        touchpoint_times,
+        side='left'
+    )
+    touch_rows = np.flatnonzero(position < conversion_bounds[touch_codes + 1])
+    if attribution_window_days is not None:
+        window = int(attribution_window_days * NANOSECONDS_PER_DAY)
+        gap = sorted_conversion_times[position[touch_rows]] - touchpoint_times[touch_rows]
+        touch_rows = touch_rows[gap <= window]
+    
+    touch_conversions = conversion_order[position[touch_rows]]
+    # Group by conversion (in conversion order), then by time
+    grouping = np.lexsort((touchpoint_times[touch_rows], touch_conversions))
+    touch_rows = touch_rows[grouping]
+    lengths = np.bincount(touch_conversions[grouping], minlength=len(conversion_times))
+    
+    return ConversionJourneys(
+        offsets=np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64),
+        touchpoint_rows=touch_rows,
+        conversion_times=conversion_times,
+        conversion_values=values,
+        touchpoint_count=len(touchpoint_times)
+    )
@@ -0,0 +1,246 @@
+"""
+Markov-chain removal-effect attribution.
+
+Journeys are modelled as paths through an absorbing Markov chain with a
+start state, one state per channel, and conversion/null absorbing states.
+Channel importance is the removal effect: the relative drop in conversion
+probability when every transition into that channel is redirected to null.
+"""
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import spsolve
+
+from backend.app.utils.logging import LoggerMixin
+
+
+START_STATE = 0
+CONVERSION_STATE = 1
+NULL_STATE = 2
+CHANNEL_STATE_OFFSET = 3
+
+
+class MarkovChainAttributionEngine(LoggerMixin):
+    """
+    Fits a sparse channel transition matrix and solves for removal effects.
+    
+    Transition counts are accumulated chunk by chunk with ``partial_fit``, so
+    memory is bounded by the chunk size plus the number of distinct
+    transitions rather than by the number of journeys.
+    """
+    
+    def __init__(self, channel_names: Optional[Sequence[str]] = None):
+        self.channel_names: List[str] = []
+        self._channel_index: Dict[str, int] = {}
+        self.transition_counts = sparse.csr_matrix(
+            (CHANNEL_STATE_OFFSET, CHANNEL_STATE_OFFSET), dtype=np.int64
+        )
+        self.journey_count = 0
+        self.conversion_count = 0
+        self.conversion_probability: Optional[float] = None
+        self.removal_effects: Optional[np.ndarray] = None
+        
+        if channel_names is not None:
+            self.channel_codes_for(channel_names)
+    
+    @property
+    def state_count(self) -> int:
+        return len(self.channel_names) + CHANNEL_STATE_OFFSET
+    
+    @property
+    def is_fitted(self) -> bool:
+        return self.removal_effects is not None
+    
+    def channel_codes_for(self, channel_names: Sequence[str]) -> np.ndarray:
+        """
+        Map channel names to engine channel codes, registering unseen names.
+        
+        Returns:
+            Engine channel code for each name
+        """
+        codes = np.empty(len(channel_names), dtype=np.int64)
+        for i, name in enumerate(channel_names):
+            key = str(name).lower()
+            if key not in self._channel_index:
+                self._channel_index[key] = len(self.channel_names)
+                self.channel_names.append(key)
+            codes[i] = self._channel_index[key]
+        
+        if self.transition_counts.shape[0] != self.state_count:
+            self.transition_counts.resize((self.state_count, self.state_count))
+        return codes
+    
+    def partial_fit(
+        self,
+        offsets: np.ndarray,
+        channel_codes: np.ndarray,
+        converted: np.ndarray
+    ) -> "MarkovChainAttributionEngine":
+        """
+        Accumulate transition counts from one chunk of journeys.
+        
+        Args:
+            offsets: Journey boundaries, length ``n_journeys + 1``, starting at 0
+            channel_codes: Engine channel codes, time-sorted within each journey
+            converted: Whether each journey ended in a conversion
+        """
+        offsets = np.asarray(offsets, dtype=np.int64)
+        channel_codes = np.asarray(channel_codes, dtype=np.int64)
+        converted = np.asarray(converted, dtype=bool)
+        
+        lengths = np.diff(offsets)
+        non_empty = lengths > 0
+        first = offsets[:-1][non_empty]
+        last = offsets[1:][non_empty] - 1
+        
+        states = channel_codes + CHANNEL_STATE_OFFSET
+        
+        # Consecutive touchpoints inside a journey
+        is_last = np.zeros(len(states), dtype=bool)
+        is_last[last] = True
+        inner = np.flatnonzero(~is_last[:-1]) if len(states) > 1 else np.zeros(0, dtype=np.int64)
+        
+        end_states = np.where(converted[non_empty], CONVERSION_STATE, NULL_STATE)
+        from_states = np.concatenate([
+            np.full(len(first), START_STATE), states[inner], states[last]
+        ])
+        to_states = np.concatenate([states[first], states[inner + 1], end_states])
+        
+        chunk_counts = sparse.coo_matrix(
+            (np.ones(len(from_states), dtype=np.int64), (from_states, to_states)),
+            shape=(self.state_count, self.state_count)
+        ).tocsr()
+        self.transition_counts = self.transition_counts + chunk_counts
+        
+        self.journey_count += int(non_empty.sum())
+        self.conversion_count += int(converted[non_empty].sum())
+        return self
+    
+    def fit(
+        self,
+        chunks: Iterable[Tuple[np.ndarray, np.ndarray, np.ndarray]]
+    ) -> "MarkovChainAttributionEngine":
+        """Accumulate every ``(offsets, channel_codes, converted)`` chunk and solve."""
+        for offsets, channel_codes, converted in chunks:
+            self.partial_fit(offsets, channel_codes, converted)
+        self.solve()
+        return self
+    
+    def transition_matrix(self) -> sparse.csr_matrix:
+        """Row-normalized transition probabilities."""
+        counts = self.transition_counts.astype(np.float64)
+        row_totals = np.asarray(counts.sum(axis=1)).ravel()
+        inverse = np.divide(1.0, row_totals, out=np.zeros_like(row_totals), where=row_totals > 0)
+        return sparse.diags(inverse) @ counts
+    
+    def solve(self) -> np.ndarray:
+        """
+        Compute the conversion probability and every channel's removal effect.
+        
+        Returns:
+            Removal effect per channel code
+        """
+        transitions = self.transition_matrix().tocsr()
+        transient = np.concatenate([
+            [START_STATE], np.arange(CHANNEL_STATE_OFFSET, self.state_count)
+        ])
+        
+        q = transitions[transient][:, transient]
+        r = np.asarray(transitions[transient][:, [CONVERSION_STATE]].todense()).ravel()
+        identity = sparse.identity(len(transient), format='csc')
+        
+        base = self._absorption_probability(identity, q, r)
+        self.conversion_probability = base
+        
+        removal_effects = np.zeros(len(self.channel_names))
+        if base > 0:
+            for code in range(len(self.channel_names)):
+                keep = np.ones(len(transient))
+                keep[code + 1] = 0.0
+                mask = sparse.diags(keep)
+                removed = self._absorption_probability(identity, mask @ q @ mask, r * keep)
+                removal_effects[code] = max(0.0, 1.0 - removed / base)
+        
+        self.removal_effects = removal_effects
+        
+        self.logger.info(
+            "Markov removal effects calculated",
+            journey_count=self.journey_count,
+            channel_count=len(self.channel_names),
+            conversion_probability=base
+        )
+        
+        return removal_effects
+    
+    def _absorption_probability(
+        self,
+        identity: sparse.spmatrix,
+        q: sparse.spmatrix,
+        r: np.ndarray
+    ) -> float:
+        """Probability of reaching conversion from the start state."""
+        if not r.any():
+            return 0.0
+        absorption = spsolve((identity - q).tocsc(), r)
+        return float(np.atleast_1d(absorption)[0])
+    
+    def channel_weights(self) -> Dict[str, float]:
+        """
+        Removal effects scaled so the average observed channel weighs 1.0.
+        
+        Keeping the scale around 1.0 lets unseen channels fall back to a
+        neutral default weight.
+        """
+        if self.removal_effects is None:
+            raise ValueError("Markov engine has not been fitted")
+        
+        positive = self.removal_effects[self.removal_effects > 0]
+        scale = positive.mean() if len(positive) else 1.0
+        return {
+            name: float(effect / scale)
+            for name, effect in zip(self.channel_names, self.removal_effects)
+        }
+    
+    def save(self, path: str) -> None:
+        """
+        Persist the fitted transition counts and removal effects in ``.npz`` format.
+        
+        The archive is written to ``path`` exactly as given, without the
+        ``.npz`` suffix ``np.savez_compressed`` would append, so ``load``
+        reads the same path back.
+        """
+        counts = self.transition_counts.tocoo()
+        with open(path, 'wb') as file:
+            np.savez_compressed(
+                file,
+                channel_names=np.array(self.channel_names, dtype=str),
+                rows=counts.row,
+                cols=counts.col,
+                counts=counts.data,
+                journey_count=self.journey_count,
+                conversion_count=self.conversion_count,
+                removal_effects=(
+                    self.removal_effects if self.removal_effects is not None else np.zeros(0)
+                ),
+                conversion_probability=(
+                    self.conversion_probability if self.conversion_probability is not None else np.nan
+                )
+            )
+    
+    @classmethod
+    def load(cls, path: str) -> "MarkovChainAttributionEngine":
+        """Load an engine written by ``save``."""
+        with np.load(path) as data:
+            engine = cls(channel_names=data['channel_names'].tolist())
+            engine.transition_counts = sparse.coo_matrix(
+                (data['counts'], (data['rows'], data['cols'])),
+                shape=(engine.state_count, engine.state_count)
+            ).tocsr()
+            engine.journey_count = int(data['journey_count'])
+            engine.conversion_count = int(data['conversion_count'])
+            
+            removal_effects = data['removal_effects']
+            if len(removal_effects) == len(engine.channel_names):
+                engine.removal_effects = removal_effects
+                engine.conversion_probability = float(data['conversion_probability'])
+        return engine
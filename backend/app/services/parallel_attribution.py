@@ -0,0 +1,305 @@
+"""
+Process-pool execution of attribution models across journey shards.
+
+Journeys are independent, so a columnar batch is cut into shards at journey
+boundaries. The input columns are placed in shared memory once; each worker
+attaches to them, scores its shard with every requested model and writes
+the credit, in sorted journey order, into shared output columns at the
+shard's position. Because journeys are sorted independently, the shards
+laid end to end match a single-process view; the parent reduces them with
+one pass over that layout, so results are bit-identical to a single-process
+run for any worker count, chunk size or scheduling.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+import numpy as np
+
+from backend.app.services.attribution_models import (
+    AttributionModel,
+    AttributionModelFactory,
+    JourneyWindow,
+    PathSignatureIndex,
+    aggregate_sorted_credit,
+    build_journey_view
+)
+from backend.app.utils.logging import LoggerMixin
+from config.settings import get_attribution_settings
+
+
+@dataclass
+class SharedArray:
+    """Picklable handle to a numpy array stored in shared memory."""
+    name: str
+    shape: Tuple[int, ...]
+    dtype: str
+    
+    @classmethod
+    def create(cls, array: np.ndarray) -> Tuple["SharedArray", shared_memory.SharedMemory]:
+        """Copy ``array`` into a new shared memory block."""
+        array = np.ascontiguousarray(array)
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+        return cls(name=block.name, shape=array.shape, dtype=array.dtype.str), block
+    
+    def attach(self) -> Tuple[np.ndarray, shared_memory.SharedMemory]:
+        """Map the shared block as an array; close the block when done."""
+        block = shared_memory.SharedMemory(name=self.name)
+        return np.ndarray(self.shape, dtype=np.dtype(self.dtype), buffer=block.buf), block
+
+
+@dataclass
+class AttributionShard:
+    """A contiguous range of journeys assigned to one worker."""
+    journey_start: int
+    journey_end: int
+
+
+def _attribute_shard(
+    models: Dict[str, AttributionModel],
+    columns: Dict[str, SharedArray],
+    outputs: Dict[str, SharedArray],
+    shard: AttributionShard,
+    channel_names: Optional[Sequence[str]],
+    window: Optional[JourneyWindow]
+) -> int:
+    """
+    Score one shard with every model into the shared outputs; runs inside a worker process.
+    
+    Returns:
+        Number of touchpoints written at the shard's first touchpoint
+        position (fewer than the shard holds when ``window`` cuts journeys)
+    """
+    arrays = {}
+    blocks = []
+    try:
+        for key, handle in {**columns, **outputs}.items():
+            arrays[key], block = handle.attach()
+            blocks.append(block)
+        
+        start = int(arrays['offsets'][shard.journey_start])
+        end = int(arrays['offsets'][shard.journey_end])
+        # Copy the inputs so no view outlives the shared blocks
+        view = build_journey_view(
+            offsets=arrays['offsets'][shard.journey_start:shard.journey_end + 1] - start,
+            ids=np.arange(end - start),
+            timestamps=arrays['timestamps'][start:end].copy(),
+            channel_codes=arrays['channel_codes'][start:end].copy(),
+            conversion_values=arrays['conversion_values'][shard.journey_start:shard.journey_end].copy(),
+            channel_names=channel_names
+        )
+        if window is not None:
+            view = window.apply(view)
+        written = view.touchpoint_count
+        
+        path_index = None
+        if any(model.deduplicates_paths for model in models.values()):
+            path_index = PathSignatureIndex.build(view)
+        for row, model in enumerate(models.values()):
+            arrays['credit'][row, start:start + written] = model.score_view(view, path_index)
+        arrays['sorted_channel_codes'][start:start + written] = view.channel_codes
+        if 'campaign_codes' in arrays:
+            arrays['sorted_campaign_codes'][start:start + written] = (
+                arrays['campaign_codes'][start:end][view.order]
+            )
+        return written
+    finally:
+        arrays.clear()
+        for block in blocks:
+            block.close()
+
+
+class ParallelAttributionExecutor(LoggerMixin):
+    """
+    Run attribution models over columnar journeys in a process pool.
+    
+    Each shard holds whole journeys and roughly ``chunk_size`` touchpoints;
+    an optional JourneyWindow is applied to every journey inside its shard.
+    Shards return sorted per-touchpoint credit through shared memory (one
+    float per touchpoint and model) and the parent sums it in single-process
+    order, so channel and campaign credit are bit-identical to
+    ``calculate_attribution_aggregates`` over the whole batch.
+    """
+    
+    def __init__(
+        self,
+        models: Optional[Union[List[str], Dict[str, AttributionModel]]] = None,
+        max_workers: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+        window: Optional[JourneyWindow] = None
+    ):
+        settings = get_attribution_settings()
+        
+        if models is None:
+            models = settings.default_models
+        if isinstance(models, dict):
+            self.models: Dict[str, AttributionModel] = dict(models)
+        else:
+            self.models = {
+                model_name: AttributionModelFactory.create_model(model_name)
+                for model_name in models
+            }
+        
+        self.max_workers = max_workers or settings.parallel_max_workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size or settings.parallel_chunk_size
+        if self.chunk_size <= 0:
+            raise ValueError("chunk_size must be positive")
+        self.window = window
+    
+    def plan_shards(self, offsets: np.ndarray) -> List[AttributionShard]:
+        """Cut journeys into shards of about ``chunk_size`` touchpoints."""
+        offsets = np.asarray(offsets, dtype=np.int64)
+        journey_count = len(offsets) - 1
+        if journey_count <= 0:
+            return []
+        
+        targets = np.arange(self.chunk_size, int(offsets[-1]), self.chunk_size)
+        # First journey boundary at or past each target; every shard is non-empty
+        cuts = np.unique(np.concatenate([
+            [0], np.searchsorted(offsets, targets, side='left'), [journey_count]
+        ]))
+        cuts = cuts[cuts <= journey_count]
+        
+        return [
+            AttributionShard(journey_start=int(start), journey_end=int(end))
+            for start, end in zip(cuts[:-1], cuts[1:])
+        ]
+    
+    def run(
+        self,
+        offsets: np.ndarray,
+        timestamps: np.ndarray,
+        channel_codes: np.ndarray,
+        conversion_values: Union[float, np.ndarray] = 1.0,
+        channel_names: Optional[Sequence[str]] = None,
+        campaign_codes: Optional[np.ndarray] = None
+    ) -> Dict[str, Dict[str, np.ndarray]]:
+        """
+        Attribute every journey with every model and merge channel aggregates.
+        
+        Args:
+            offsets: Journey boundaries, length ``n_journeys + 1``, starting at 0
+            timestamps: Touchpoint times as int64 epoch nanoseconds
+            channel_codes: Integer channel code per touchpoint
+            conversion_values: Scalar or per-journey conversion values
+            channel_names: Channel name for each channel code
+            campaign_codes: Optional campaign code per touchpoint (-1 for none)
+        
+        Returns:
+            Dictionary of model name to ``calculate_attribution_aggregates`` output
+        """
+        offsets = np.asarray(offsets, dtype=np.int64)
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        channel_codes = np.asarray(channel_codes, dtype=np.int64)
+        journey_count = len(offsets) - 1
+        
+        if offsets.ndim != 1 or journey_count < 0 or offsets[0] != 0:
+            raise ValueError("offsets must be a 1-D array starting at 0")
+        
+        values = np.asarray(conversion_values, dtype=np.float64)
+        if values.ndim == 0:
+            values = np.full(journey_count, float(values))
+        
+        columns = {
+            'offsets': offsets,
+            'timestamps': timestamps,
+            'channel_codes': channel_codes,
+            'conversion_values': values
+        }
+        channel_count = int(channel_codes.max()) + 1 if len(channel_codes) else 0
+        if channel_names is not None:
+            channel_count = max(channel_count, len(channel_names))
+        campaign_count = 0
+        if campaign_codes is not None:
+            columns['campaign_codes'] = np.asarray(campaign_codes, dtype=np.int64)
+            campaign_count = int(columns['campaign_codes'].max(initial=-1)) + 1
+        
+        shards = self.plan_shards(offsets)
+        sorted_columns = self._execute(shards, columns, channel_names)
+        
+        merged = {
+            model_name: aggregate_sorted_credit(
+                sorted_columns['credit'][row],
+                sorted_columns['sorted_channel_codes'],
+                sorted_columns.get('sorted_campaign_codes'),
+                channel_count=channel_count,
+                campaign_count=campaign_count
+            )
+            for row, model_name in enumerate(self.models)
+        }
+        
+        self.logger.info(
+            "Parallel attribution completed",
+            models=list(self.models),
+            shard_count=len(shards),
+            max_workers=self.max_workers,
+            journey_count=journey_count,
+            touchpoint_count=int(offsets[-1])
+        )
+        
+        return merged
+    
+    def _execute(
+        self,
+        shards: List[AttributionShard],
+        columns: Dict[str, np.ndarray],
+        channel_names: Optional[Sequence[str]]
+    ) -> Dict[str, np.ndarray]:
+        """
+        Run every shard, in-process for one worker or shard, else in a pool.
+        
+        Returns:
+            Credit per model (one row each) with channel and campaign codes,
+            in sorted journey order over all shards
+        """
+        touchpoint_count = int(columns['offsets'][-1])
+        outputs = {
+            'credit': np.zeros((len(self.models), touchpoint_count)),
+            'sorted_channel_codes': np.zeros(touchpoint_count, dtype=np.int64)
+        }
+        if 'campaign_codes' in columns:
+            outputs['sorted_campaign_codes'] = np.zeros(touchpoint_count, dtype=np.int64)
+        
+        handles = {}
+        output_handles = {}
+        blocks = []
+        try:
+            for key, array in columns.items():
+                handles[key], block = SharedArray.create(array)
+                blocks.append(block)
+            for key, array in outputs.items():
+                output_handles[key], block = SharedArray.create(array)
+                blocks.append(block)
+            
+            args = (self.models, handles, output_handles)
+            if self.max_workers == 1 or len(shards) <= 1:
+                written = [_attribute_shard(*args, shard, channel_names, self.window) for shard in shards]
+            else:
+                with ProcessPoolExecutor(max_workers=min(self.max_workers, len(shards))) as pool:
+                    futures = [
+                        pool.submit(_attribute_shard, *args, shard, channel_names, self.window)
+                        for shard in shards
+                    ]
+                    written = [future.result() for future in futures]
+            
+            # Windowed shards leave gaps; keep each shard's written prefix
+            keep = np.zeros(touchpoint_count, dtype=bool)
+            for shard, count in zip(shards, written):
+                start = int(columns['offsets'][shard.journey_start])
+                keep[start:start + count] = True
+            
+            result = {}
+            for key, handle in output_handles.items():
+                array, block = handle.attach()
+                try:
+                    result[key] = array[..., keep]
+                finally:
+                    del array
+                    block.close()
+            return result
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
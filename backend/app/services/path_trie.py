@@ -0,0 +1,303 @@
+"""
+Prefix tree over channel paths for top-path analytics.
+
+Each node is a channel path prefix. Nodes live in flat arrays (parent,
+channel, depth and the statistics of journeys whose full path ends at the
+node); prefix totals are rolled up from those terminal statistics on
+demand. Journeys are inserted depth by depth over columnar chunks, so a
+single streaming pass builds the tree and queries never touch journeys again.
+"""
+from typing import Dict, List, Optional, Sequence, Union
+import numpy as np
+
+from backend.app.utils.logging import LoggerMixin
+
+
+class ConversionPathTrie(LoggerMixin):
+    """Journey counts, conversions and conversion value per channel path prefix."""
+    
+    STATISTICS = ('journeys', 'conversions', 'value')
+    
+    def __init__(self, channel_names: Optional[Sequence[str]] = None, initial_capacity: int = 1024):
+        self.channel_names: List[str] = []
+        self._channel_codes: Dict[str, int] = {}
+        self._children: Dict[tuple, int] = {}
+        self._node_count = 1
+        self._totals: Optional[Dict[str, np.ndarray]] = None
+        
+        capacity = max(initial_capacity, 1)
+        self.parent = np.full(capacity, -1, dtype=np.int64)
+        self.channel = np.full(capacity, -1, dtype=np.int64)
+        self.depth = np.zeros(capacity, dtype=np.int64)
+        self.end_journeys = np.zeros(capacity)
+        self.end_conversions = np.zeros(capacity)
+        self.end_value = np.zeros(capacity)
+        
+        if channel_names is not None:
+            self.channel_codes_for(channel_names)
+    
+    @property
+    def node_count(self) -> int:
+        return self._node_count
+    
+    @property
+    def journey_count(self) -> int:
+        return int(self.end_journeys[:self._node_count].sum())
+    
+    def channel_codes_for(self, names: Sequence[str]) -> np.ndarray:
+        """Trie channel codes for channel names, registering unseen names."""
+        codes = np.empty(len(names), dtype=np.int64)
+        for i, name in enumerate(names):
+            name = str(name)
+            if name not in self._channel_codes:
+                self._channel_codes[name] = len(self.channel_names)
+                self.channel_names.append(name)
+            codes[i] = self._channel_codes[name]
+        return codes
+    
+    def add_journeys(
+        self,
+        offsets: np.ndarray,
+        channel_codes: np.ndarray,
+        channel_names: Sequence[str],
+        converted: Optional[np.ndarray] = None,
+        conversion_values: Union[float, np.ndarray, None] = None,
+        timestamps: Optional[np.ndarray] = None
+    ) -> "ConversionPathTrie":
+        """
+        Insert one chunk of journeys.
+        
+        Args:
+            offsets: Journey boundaries, length ``n_journeys + 1``, starting at 0
+            channel_codes: Channel code per touchpoint, indexing ``channel_names``
+            channel_names: Channel name for each channel code
+            converted: Whether each journey converted (default: all converted)
+            conversion_values: Scalar or per-journey conversion value
+            timestamps: Optional touchpoint times; without them touchpoints
+                are taken to be in time order within each journey
+        """
+        offsets = np.asarray(offsets, dtype=np.int64)
+        channel_codes = np.asarray(channel_codes, dtype=np.int64)
+        lengths = np.diff(offsets)
+        journey_count = len(lengths)
+        
+        if timestamps is not None:
+            journey_index = np.repeat(np.arange(journey_count), lengths)
+            channel_codes = channel_codes[np.lexsort((np.asarray(timestamps), journey_index))]
+        
+        codes = self.channel_codes_for(channel_names)[channel_codes] if len(channel_codes) else channel_codes
+        converted = (
+            np.ones(journey_count) if converted is None
+            else np.asarray(converted, dtype=np.float64)
+        )
+        values = np.broadcast_to(
+            np.asarray(0.0 if conversion_values is None else conversion_values, dtype=np.float64),
+            (journey_count,)
+        )
+        
+        node = np.zeros(journey_count, dtype=np.int64)
+        stride = max(len(self.channel_names), 1)
+        for depth in range(int(lengths.max()) if journey_count else 0):
+            active = np.flatnonzero(lengths > depth)
+            keys = node[active] * stride + codes[offsets[active] + depth]
+            # Only distinct (parent, channel) steps go through the child lookup
+            unique_keys, inverse = np.unique(keys, return_inverse=True)
+            children = np.array(
+                [self._child(int(key // stride), int(key % stride)) for key in unique_keys],
+                dtype=np.int64
+            )
+            node[active] = children[inverse.ravel()]
+        
+        np.add.at(self.end_journeys, node, 1.0)
+        np.add.at(self.end_conversions, node, converted)
+        np.add.at(self.end_value, node, values)
+        self._totals = None
+        
+        return self
+    
+    def find(self, prefix: Sequence[str]) -> Optional[int]:
+        """Node of a channel path prefix, or None if no journey starts with it."""
+        node = 0
+        for name in prefix:
+            code = self._channel_codes.get(str(name))
+            if code is None:
+                return None
+            node = self._children.get((node, code))
+            if node is None:
+                return None
+        return node
+    
+    def path(self, node: int) -> List[str]:
+        """Channel names from the root to ``node``."""
+        names = []
+        while node > 0:
+            names.append(self.channel_names[self.channel[node]])
+            node = int(self.parent[node])
+        return names[::-1]
+    
+    def prefix_statistics(self, prefix: Sequence[str] = ()) -> Dict[str, float]:
+        """Totals over all journeys starting with ``prefix``."""
+        node = self.find(prefix)
+        if node is None:
+            return {'journeys': 0.0, 'conversions': 0.0, 'value': 0.0, 'conversion_rate': 0.0}
+        return self._describe(node, self._subtree_totals())
+    
+    def top_paths(
+        self,
+        k: int = 10,
+        by: str = 'journeys',
+        prefix: Sequence[str] = ()
+    ) -> List[Dict[str, Union[List[str], float]]]:
+        """
+        Most frequent or most valuable complete paths, optionally under a prefix.
+        
+        Args:
+            k: Number of paths to return
+            by: 'journeys', 'conversions' or 'value'
+            prefix: Only consider paths starting with these channels
+        """
+        terminal = self._terminal_statistic(by)
+        candidates = self._subtree_nodes(prefix)
+        # The root stands for the empty path, which is not reported
+        candidates = candidates[(candidates > 0) & (terminal[candidates] > 0)]
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-terminal[candidates], k - 1)[:k]]
+        candidates = candidates[np.argsort(-terminal[candidates], kind='stable')]
+        
+        terminal_totals = {
+            'journeys': self.end_journeys,
+            'conversions': self.end_conversions,
+            'value': self.end_value
+        }
+        return [self._describe(int(node), terminal_totals) for node in candidates]
+    
+    def drill_down(
+        self,
+        prefix: Sequence[str] = (),
+        by: str = 'journeys'
+    ) -> List[Dict[str, Union[List[str], float]]]:
+        """Totals for every one-channel extension of ``prefix``, largest first."""
+        node = self.find(prefix)
+        if node is None:
+            return []
+        totals = self._subtree_totals()
+        children = np.flatnonzero(self.parent[:self._node_count] == node)
+        children = children[np.argsort(-totals[self._check_statistic(by)][children], kind='stable')]
+        return [self._describe(int(child), totals) for child in children]
+    
+    def length_distribution(self, prefix: Sequence[str] = ()) -> np.ndarray:
+        """Journey count by path length for journeys starting with ``prefix``."""
+        nodes = self._subtree_nodes(prefix)
+        if not len(nodes):
+            return np.zeros(0)
+        return np.bincount(self.depth[nodes], weights=self.end_journeys[nodes])
+    
+    def save(self, path: str) -> None:
+        """Persist the trie to an ``.npz`` file."""
+        n = self._node_count
+        np.savez_compressed(
+            path,
+            channel_names=np.array(self.channel_names, dtype=str),
+            parent=self.parent[:n],
+            channel=self.channel[:n],
+            depth=self.depth[:n],
+            end_journeys=self.end_journeys[:n],
+            end_conversions=self.end_conversions[:n],
+            end_value=self.end_value[:n]
+        )
+    
+    @classmethod
+    def load(cls, path: str) -> "ConversionPathTrie":
+        """Load a trie written by ``save``."""
+        with np.load(path) as data:
+            n = len(data['parent'])
+            trie = cls(channel_names=data['channel_names'].tolist(), initial_capacity=n)
+            for name in ('parent', 'channel', 'depth', 'end_journeys', 'end_conversions', 'end_value'):
+                getattr(trie, name)[:n] = data[name]
+        trie._node_count = n
+        trie._children = {
+            (int(parent), int(channel)): node
+            for node, (parent, channel) in enumerate(zip(trie.parent[1:n], trie.channel[1:n]), start=1)
+        }
+        return trie
+    
+    def _child(self, parent: int, channel: int) -> int:
+        """Child of ``parent`` along ``channel``, created if missing."""
+        node = self._children.get((parent, channel))
+        if node is not None:
+            return node
+        
+        node = self._node_count
+        if node >= len(self.parent):
+            self._grow()
+        self.parent[node] = parent
+        self.channel[node] = channel
+        self.depth[node] = self.depth[parent] + 1
+        self._children[(parent, channel)] = node
+        self._node_count += 1
+        return node
+    
+    def _grow(self) -> None:
+        capacity = 2 * len(self.parent)
+        for name, fill in (('parent', -1), ('channel', -1), ('depth', 0),
+                           ('end_journeys', 0), ('end_conversions', 0), ('end_value', 0)):
+            array = getattr(self, name)
+            grown = np.full(capacity, fill, dtype=array.dtype)
+            grown[:len(array)] = array
+            setattr(self, name, grown)
+    
+    def _subtree_totals(self) -> Dict[str, np.ndarray]:
+        """Per-node totals over the node's subtree, rolled up leaf to root."""
+        if self._totals is None:
+            n = self._node_count
+            totals = {
+                'journeys': self.end_journeys[:n].copy(),
+                'conversions': self.end_conversions[:n].copy(),
+                'value': self.end_value[:n].copy()
+            }
+            depth = self.depth[:n]
+            parent = self.parent[:n]
+            for level in range(int(depth.max()), 0, -1):
+                nodes = np.flatnonzero(depth == level)
+                for array in totals.values():
+                    np.add.at(array, parent[nodes], array[nodes])
+            self._totals = totals
+        return self._totals
+    
+    def _subtree_nodes(self, prefix: Sequence[str]) -> np.ndarray:
+        """All nodes at or below the node of ``prefix``."""
+        root = self.find(prefix)
+        if root is None:
+            return np.zeros(0, dtype=np.int64)
+        n = self._node_count
+        depth = self.depth[:n]
+        inside = np.zeros(n, dtype=bool)
+        inside[root] = True
+        for level in range(int(depth[root]) + 1, int(depth.max()) + 1):
+            nodes = np.flatnonzero(depth == level)
+            inside[nodes] = inside[self.parent[nodes]]
+        return np.flatnonzero(inside)
+    
+    def _check_statistic(self, by: str) -> str:
+        if by not in self.STATISTICS:
+            raise ValueError(f"Unknown path statistic: {by}; expected one of {self.STATISTICS}")
+        return by
+    
+    def _terminal_statistic(self, by: str) -> np.ndarray:
+        by = self._check_statistic(by)
+        return {
+            'journeys': self.end_journeys,
+            'conversions': self.end_conversions,
+            'value': self.end_value
+        }[by][:self._node_count]
+    
+    def _describe(self, node: int, totals: Dict[str, np.ndarray]) -> Dict[str, Union[List[str], float]]:
+        journeys = float(totals['journeys'][node])
+        conversions = float(totals['conversions'][node])
+        return {
+            'path': self.path(node),
+            'journeys': journeys,
+            'conversions': conversions,
+            'value': float(totals['value'][node]),
+            'conversion_rate': conversions / journeys if journeys else 0.0
+        }
@@ -0,0 +1,265 @@
+"""
+Shapley-value attribution over channel coalitions.
+
+A journey's coalition is the set of channels it touched. The worth of a
+coalition S is the conversion rate of all journeys whose coalition is a
+subset of S. Shapley values are computed exactly from bitmask-indexed tables
+for small channel sets, and estimated by permutation sampling otherwise.
+"""
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+from backend.app.utils.logging import LoggerMixin
+
+
+class CoalitionStatistics:
+    """
+    Journey and conversion counts per distinct channel coalition.
+    
+    Statistics are aggregated once per dataset (optionally chunk by chunk)
+    and then reused for every Shapley computation and journey scored.
+    """
+    
+    def __init__(self, channel_names: Sequence[str]):
+        self.channel_names: List[str] = [str(name).lower() for name in channel_names]
+        self._row_bytes = max(1, (len(self.channel_names) + 7) // 8)
+        self._counts: Dict[bytes, List[float]] = {}
+    
+    @property
+    def channel_count(self) -> int:
+        return len(self.channel_names)
+    
+    @property
+    def coalition_count(self) -> int:
+        return len(self._counts)
+    
+    def partial_fit(
+        self,
+        offsets: np.ndarray,
+        channel_codes: np.ndarray,
+        converted: np.ndarray
+    ) -> "CoalitionStatistics":
+        """
+        Add one chunk of journeys to the coalition counts.
+        
+        Args:
+            offsets: Journey boundaries, length ``n_journeys + 1``, starting at 0
+            channel_codes: Channel code per touchpoint (order does not matter)
+            converted: Whether each journey ended in a conversion
+        
+        Raises:
+            ValueError: If a channel code is outside ``0 <= code < channel_count``
+        """
+        offsets = np.asarray(offsets, dtype=np.int64)
+        channel_codes = np.asarray(channel_codes, dtype=np.int64)
+        converted = np.asarray(converted, dtype=bool)
+        
+        unknown = (channel_codes < 0) | (channel_codes >= self.channel_count)
+        if unknown.any():
+            raise ValueError(
+                f"Channel code {int(channel_codes[unknown][0])} outside the "
+                f"{self.channel_count} registered channels"
+            )
+        
+        lengths = np.diff(offsets)
+        journey_index = np.repeat(np.arange(len(lengths)), lengths)
+        
+        # Packed membership bitset per journey
+        membership = np.zeros((len(lengths), self._row_bytes), dtype=np.uint8)
+        np.bitwise_or.at(
+            membership,
+            (journey_index, channel_codes // 8),
+            (1 << (channel_codes % 8)).astype(np.uint8)
+        )
+        
+        non_empty = lengths > 0
+        membership = membership[non_empty]
+        converted = converted[non_empty]
+        
+        coalitions, inverse = np.unique(membership, axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        journeys = np.bincount(inverse, minlength=len(coalitions))
+        conversions = np.bincount(inverse, weights=converted, minlength=len(coalitions))
+        
+        for row, journey_total, conversion_total in zip(coalitions, journeys, conversions):
+            key = row.tobytes()
+            counts = self._counts.setdefault(key, [0.0, 0.0])
+            counts[0] += journey_total
+            counts[1] += conversion_total
+        
+        return self
+    
+    def coalition_table(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Returns:
+            Tuple of (membership matrix coalitions x channels, journey counts,
+            conversion counts)
+        """
+        if not self._counts:
+            return (
+                np.zeros((0, self.channel_count), dtype=bool),
+                np.zeros(0),
+                np.zeros(0)
+            )
+        
+        packed = np.frombuffer(b''.join(self._counts.keys()), dtype=np.uint8)
+        packed = packed.reshape(-1, self._row_bytes)
+        members = np.unpackbits(packed, axis=1, bitorder='little')[:, :self.channel_count]
+        counts = np.array(list(self._counts.values()))
+        return members.astype(bool), counts[:, 0], counts[:, 1]
+
+
+class ShapleyValueEngine(LoggerMixin):
+    """Exact or permutation-sampled Shapley values over coalition statistics."""
+    
+    def __init__(
+        self,
+        exact_max_channels: int = 12,
+        error_tolerance: float = 0.001,
+        max_permutations: int = 10000,
+        permutation_batch_size: int = 64,
+        confidence_z: float = 1.96,
+        random_seed: int = 0
+    ):
+        self.exact_max_channels = exact_max_channels
+        self.error_tolerance = error_tolerance
+        self.max_permutations = max_permutations
+        self.permutation_batch_size = permutation_batch_size
+        self.confidence_z = confidence_z
+        self.random_seed = random_seed
+    
+    def calculate(self, statistics: CoalitionStatistics) -> np.ndarray:
+        """Shapley value per channel, choosing exact or sampled mode by channel count."""
+        if statistics.channel_count <= self.exact_max_channels:
+            return self.exact_values(statistics)
+        values, _, _ = self.sampled_values(statistics)
+        return values
+    
+    def exact_values(self, statistics: CoalitionStatistics) -> np.ndarray:
+        """Exact Shapley values from a bitmask-indexed table of every coalition's worth."""
+        members, journeys, conversions = statistics.coalition_table()
+        channel_count = statistics.channel_count
+        if channel_count == 0:
+            return np.zeros(0)
+        
+        table_size = 1 << channel_count
+        masks = members.astype(np.int64) @ (1 << np.arange(channel_count, dtype=np.int64))
+        
+        journey_table = np.bincount(masks, weights=journeys, minlength=table_size)
+        conversion_table = np.bincount(masks, weights=conversions, minlength=table_size)
+        
+        # Subset-sum (zeta) transform: table[S] = sum over T subset of S
+        for bit in range(channel_count):
+            for table in (journey_table, conversion_table):
+                blocks = table.reshape(-1, 2, 1 << bit)
+                blocks[:, 1, :] += blocks[:, 0, :]
+        
+        worth = np.divide(
+            conversion_table, journey_table,
+            out=np.zeros(table_size), where=journey_table > 0
+        )
+        
+        all_masks = np.arange(table_size, dtype=np.int64)
+        coalition_size = np.zeros(table_size, dtype=np.int64)
+        for bit in range(channel_count):
+            coalition_size += (all_masks >> bit) & 1
+        
+        factorial = [math.factorial(k) for k in range(channel_count + 1)]
+        size_weight = np.array([
+            factorial[k] * factorial[channel_count - k - 1] / factorial[channel_count]
+            for k in range(channel_count)
+        ])
+        
+        values = np.zeros(channel_count)
+        for bit in range(channel_count):
+            without = all_masks[((all_masks >> bit) & 1) == 0]
+            marginal = worth[without | (1 << bit)] - worth[without]
+            values[bit] = np.dot(size_weight[coalition_size[without]], marginal)
+        
+        self.logger.info(
+            "Exact Shapley values calculated",
+            channel_count=channel_count,
+            coalition_count=statistics.coalition_count
+        )
+        
+        return values
+    
+    def sampled_values(
+        self,
+        statistics: CoalitionStatistics
+    ) -> Tuple[np.ndarray, np.ndarray, int]:
+        """
+        Estimate Shapley values by sampling channel permutations.
+        
+        Sampling stops once every channel's confidence half-width
+        (``confidence_z`` standard errors) is within ``error_tolerance`` or
+        ``max_permutations`` is reached.
+        
+        Returns:
+            Tuple of (estimated values, standard errors, permutations drawn)
+        """
+        members, journeys, conversions = statistics.coalition_table()
+        channel_count = statistics.channel_count
+        if channel_count == 0:
+            return np.zeros(0), np.zeros(0), 0
+        
+        rng = np.random.default_rng(self.random_seed)
+        total = np.zeros(channel_count)
+        total_squares = np.zeros(channel_count)
+        drawn = 0
+        standard_error = np.full(channel_count, np.inf)
+        
+        while drawn < self.max_permutations:
+            batch = min(self.permutation_batch_size, self.max_permutations - drawn)
+            for _ in range(batch):
+                marginal = self._permutation_marginals(
+                    rng.permutation(channel_count), members, journeys, conversions
+                )
+                total += marginal
+                total_squares += marginal ** 2
+            drawn += batch
+            
+            if drawn > 1:
+                mean = total / drawn
+                variance = np.maximum(total_squares / drawn - mean ** 2, 0.0) * drawn / (drawn - 1)
+                standard_error = np.sqrt(variance / drawn)
+                if np.all(self.confidence_z * standard_error <= self.error_tolerance):
+                    break
+        
+        values = total / drawn
+        
+        self.logger.info(
+            "Sampled Shapley values calculated",
+            channel_count=channel_count,
+            permutations=drawn,
+            max_standard_error=float(standard_error.max())
+        )
+        
+        return values, standard_error, drawn
+    
+    def _permutation_marginals(
+        self,
+        permutation: np.ndarray,
+        members: np.ndarray,
+        journeys: np.ndarray,
+        conversions: np.ndarray
+    ) -> np.ndarray:
+        """Marginal contribution of every channel along one permutation."""
+        channel_count = len(permutation)
+        rank = np.empty(channel_count, dtype=np.int64)
+        rank[permutation] = np.arange(channel_count)
+        
+        # A coalition joins the growing prefix when its last member arrives
+        entry_step = np.where(members, rank, -1).max(axis=1)
+        
+        prefix_journeys = np.cumsum(np.bincount(entry_step, weights=journeys, minlength=channel_count))
+        prefix_conversions = np.cumsum(np.bincount(entry_step, weights=conversions, minlength=channel_count))
+        prefix_worth = np.divide(
+            prefix_conversions, prefix_journeys,
+            out=np.zeros(channel_count), where=prefix_journeys > 0
+        )
+        
+        marginal = np.empty(channel_count)
+        marginal[permutation] = np.diff(prefix_worth, prepend=0.0)
+        return marginal
@@ -0,0 +1,217 @@
+"""
+Process-pool B2B attribution sharded by account.
+
+Time decay, account-level and pipeline-velocity credit, and the attribution
+window, only ever relate a touchpoint to opportunities of its own account;
+lead quality and stage progression only read the touchpoint and its lead.
+Hash-partitioning opportunities and touchpoints by ``account_id`` - and
+giving each shard the leads its touchpoints reference - therefore lets every
+shard run the unmodified engine. Per-touchpoint results are merged by
+touchpoint ID; channel and alignment totals are summed in shard order.
+"""
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from backend.app.services.attribution_models import JourneyWindow
+from backend.app.services.b2b_attribution_engine import (
+    B2BAttributionAnalyzer,
+    B2BMarketingAttributionEngine,
+    LeadData,
+    OpportunityData,
+    TouchpointData
+)
+from backend.app.utils.logging import LoggerMixin
+from config.settings import get_attribution_settings
+
+
+ATTRIBUTION_KEYS = (
+    'time_weighted_attribution',
+    'quality_weighted_attribution',
+    'account_based_attribution',
+    'stage_progression_attribution',
+    'pipeline_velocity_attribution',
+    'combined_b2b_attribution'
+)
+
+
+def account_shard(account_id: Any, shard_count: int) -> int:
+    """Stable shard of an account; the same in every process and run."""
+    return zlib.crc32(str(account_id).encode('utf-8')) % shard_count
+
+
+@dataclass
+class B2BShard:
+    """Leads, opportunities and touchpoints of the accounts hashed to one shard."""
+    leads: List[LeadData] = field(default_factory=list)
+    opportunities: List[OpportunityData] = field(default_factory=list)
+    touchpoints: List[TouchpointData] = field(default_factory=list)
+
+
+def _attribute_b2b_shard(
+    engine: B2BMarketingAttributionEngine,
+    shard: B2BShard,
+    window: Optional[JourneyWindow],
+    fused: bool
+) -> Dict[str, Any]:
+    """Attribute one shard and reduce its analyzer outputs; runs inside a worker process."""
+    results = engine.b2b_specific_attribution(
+        shard.leads, shard.opportunities, shard.touchpoints, window=window, fused=fused
+    )
+    reports = B2BAttributionAnalyzer(engine).analyze_attribution(
+        results['combined_b2b_attribution'], shard.touchpoints
+    )
+    
+    return {
+        'attribution': {key: results[key] for key in ATTRIBUTION_KEYS},
+        **reports
+    }
+
+
+class ShardedB2BAttributionExecutor(LoggerMixin):
+    """
+    Run ``b2b_specific_attribution`` per account shard in a process pool.
+    
+    Per-touchpoint attribution is identical to a single-process run. Channel
+    performance and sales/marketing alignment are summed from per-shard
+    totals in shard order, so they are identical for any ``max_workers`` and
+    equal to a single-process run up to floating-point summation order. The
+    attribution summary needs a global ranking and is recomputed from the
+    merged combined attribution.
+    """
+    
+    def __init__(
+        self,
+        engine: Optional[B2BMarketingAttributionEngine] = None,
+        max_workers: Optional[int] = None,
+        shard_count: Optional[int] = None,
+        window: Optional[JourneyWindow] = None,
+        fused: bool = False
+    ):
+        settings = get_attribution_settings()
+        
+        self.engine = engine or B2BMarketingAttributionEngine()
+        self.analyzer = B2BAttributionAnalyzer(self.engine)
+        self.max_workers = max_workers or settings.parallel_max_workers or os.cpu_count() or 1
+        # Several shards per worker even out accounts of very different sizes
+        self.shard_count = shard_count or 4 * self.max_workers
+        if self.shard_count <= 0:
+            raise ValueError("shard_count must be positive")
+        self.window = window
+        self.fused = fused
+    
+    def partition(
+        self,
+        lead_data: List[LeadData],
+        opportunity_data: List[OpportunityData],
+        touchpoint_data: List[TouchpointData]
+    ) -> List[B2BShard]:
+        """
+        Hash-partition the inputs by account, keeping input order within each shard.
+        
+        A lead goes to every shard with a touchpoint that references it, so
+        touchpoints of one lead in several accounts all see the lead.
+        """
+        shards = [B2BShard() for _ in range(self.shard_count)]
+        lead_shards: Dict[str, set] = {}
+        
+        for opportunity in opportunity_data:
+            shards[account_shard(opportunity.account_id, self.shard_count)].opportunities.append(opportunity)
+        for touchpoint in touchpoint_data:
+            shard = account_shard(touchpoint.account_id, self.shard_count)
+            shards[shard].touchpoints.append(touchpoint)
+            lead_shards.setdefault(touchpoint.lead_id, set()).add(shard)
+        for lead in lead_data:
+            for shard in sorted(lead_shards.get(lead.lead_id, ())):
+                shards[shard].leads.append(lead)
+        
+        return [shard for shard in shards if shard.touchpoints]
+    
+    def run(
+        self,
+        lead_data: List[LeadData],
+        opportunity_data: List[OpportunityData],
+        touchpoint_data: List[TouchpointData]
+    ) -> Dict[str, Any]:
+        """
+        Sharded B2B attribution with channel and alignment analysis.
+        
+        Returns:
+            The ``b2b_specific_attribution`` layout plus ``channel_performance``
+            and ``sales_marketing_alignment`` as produced by
+            ``B2BAttributionAnalyzer`` on the combined attribution
+        """
+        shards = self.partition(lead_data, opportunity_data, touchpoint_data)
+        shard_results = self._execute(shards)
+        
+        merged: Dict[str, Any] = {key: {} for key in ATTRIBUTION_KEYS}
+        for result in shard_results:
+            for key in ATTRIBUTION_KEYS:
+                merged[key].update(result['attribution'][key])
+        
+        combined = merged['combined_b2b_attribution']
+        merged['attribution_summary'] = self.engine.generate_attribution_summary(combined)
+        merged['channel_performance'] = self._merge_channel_performance(
+            [result['channel_performance'] for result in shard_results]
+        )
+        merged['sales_marketing_alignment'] = self._merge_alignment(
+            [result['sales_marketing_alignment'] for result in shard_results]
+        )
+        
+        self.logger.info(
+            "Sharded B2B attribution completed",
+            shard_count=len(shards),
+            max_workers=self.max_workers,
+            leads_count=len(lead_data),
+            opportunities_count=len(opportunity_data),
+            touchpoints_count=len(touchpoint_data)
+        )
+        
+        return merged
+    
+    def _execute(self, shards: List[B2BShard]) -> List[Dict[str, Any]]:
+        """Run every shard, in-process for one worker or shard, else in a pool."""
+        args = (self.window, self.fused)
+        if self.max_workers == 1 or len(shards) <= 1:
+            return [_attribute_b2b_shard(self.engine, shard, *args) for shard in shards]
+        
+        with ProcessPoolExecutor(max_workers=min(self.max_workers, len(shards))) as pool:
+            futures = [
+                pool.submit(_attribute_b2b_shard, self.engine, shard, *args)
+                for shard in shards
+            ]
+            # Collect in submission order for a deterministic merge
+            return [future.result() for future in futures]
+    
+    def _merge_channel_performance(self, shard_channels: List[Dict[str, Dict[str, Any]]]) -> Dict[str, Any]:
+        """Sum per-shard channel totals and recompute the efficiency metrics."""
+        merged: Dict[str, Dict[str, Any]] = {}
+        for channels in shard_channels:
+            for channel, metrics in channels.items():
+                if channel not in merged:
+                    merged[channel] = {
+                        'total_attribution': 0,
+                        'touchpoint_count': 0,
+                        'total_cost': 0,
+                        'touchpoint_types': []
+                    }
+                totals = merged[channel]
+                totals['total_attribution'] += metrics['total_attribution']
+                totals['touchpoint_count'] += metrics['touchpoint_count']
+                totals['total_cost'] += metrics['total_cost']
+                for touchpoint_type in metrics['touchpoint_types']:
+                    if touchpoint_type not in totals['touchpoint_types']:
+                        totals['touchpoint_types'].append(touchpoint_type)
+        
+        for metrics in merged.values():
+            self.analyzer.add_efficiency_metrics(metrics)
+        return merged
+    
+    def _merge_alignment(self, shard_alignment: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Sum per-shard sales, marketing and joint attribution."""
+        return self.analyzer.alignment_report(*[
+            sum(alignment[f'{group}_attribution'] for alignment in shard_alignment)
+            for group in ('sales', 'marketing', 'joint')
+        ])
@@ -0,0 +1,226 @@
+"""
+Streaming attribution over customer-grouped touchpoint iterators.
+
+Touchpoints arrive grouped by customer (CSV readers, DB cursors, Parquet
+row groups). A journey closes when the customer changes; closed journeys
+are scored in columnar batches and folded into running per-channel and
+per-campaign aggregates, so memory depends on the batch size rather than
+on the size of the date range.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Optional
+import numpy as np
+import pandas as pd
+
+from backend.app.services.attribution_models import AttributionModelFactory, JourneyWindow
+from backend.app.utils.logging import LoggerMixin
+
+
+@dataclass
+class StreamingAttributionResult:
+    """Running totals produced by a streaming attribution run."""
+    model_name: str
+    journey_count: int = 0
+    touchpoint_count: int = 0
+    total_conversion_value: float = 0.0
+    channel_credit: Dict[Hashable, float] = field(default_factory=dict)
+    channel_touchpoints: Dict[Hashable, int] = field(default_factory=dict)
+    campaign_credit: Dict[Hashable, float] = field(default_factory=dict)
+    campaign_touchpoints: Dict[Hashable, int] = field(default_factory=dict)
+
+
+class _RunningAggregate:
+    """Dense credit and count arrays indexed by interned keys."""
+    
+    def __init__(self):
+        self.codes: Dict[Hashable, int] = {}
+        self.keys: List[Hashable] = []
+        self.credit = np.zeros(0)
+        self.counts = np.zeros(0, dtype=np.int64)
+    
+    def intern(self, values: np.ndarray, missing_key: Optional[Hashable] = None) -> np.ndarray:
+        """Map raw keys to stable codes, registering unseen keys."""
+        local_codes, uniques = pd.factorize(values, use_na_sentinel=True)
+        if missing_key is not None and (local_codes < 0).any():
+            # Missing keys count under ``missing_key`` instead of -1
+            local_codes = np.where(local_codes < 0, len(uniques), local_codes)
+            uniques = list(uniques) + [missing_key]
+        global_codes = np.empty(len(uniques), dtype=np.int64)
+        for i, key in enumerate(uniques):
+            if key not in self.codes:
+                self.codes[key] = len(self.keys)
+                self.keys.append(key)
+            global_codes[i] = self.codes[key]
+        
+        size = len(self.keys)
+        if len(self.credit) < size:
+            self.credit = np.concatenate([self.credit, np.zeros(size - len(self.credit))])
+            self.counts = np.concatenate([self.counts, np.zeros(size - len(self.counts), dtype=np.int64)])
+        
+        # Missing keys (e.g. no campaign) are factorized to -1 and stay -1
+        return np.append(global_codes, -1)[local_codes]
+    
+    def add(self, credit: np.ndarray, counts: np.ndarray) -> None:
+        """Fold per-key credit and touchpoint counts into the totals."""
+        self.credit[:len(credit)] += credit
+        self.counts[:len(counts)] += counts
+    
+    def credit_dict(self) -> Dict[Hashable, float]:
+        return dict(zip(self.keys, self.credit.tolist()))
+    
+    def count_dict(self) -> Dict[Hashable, int]:
+        return dict(zip(self.keys, self.counts.tolist()))
+
+
+class StreamingAttributionRunner(LoggerMixin):
+    """
+    Run any factory attribution model over a customer-grouped touchpoint stream.
+    
+    Each customer's touchpoints form one journey. Rows must be grouped by
+    customer; within a customer they may be in any order. An optional
+    JourneyWindow cuts every journey before it is scored, and only the
+    touchpoints it keeps are counted. Rows without a channel are attributed
+    to an ``'unknown'`` channel.
+    """
+    
+    def __init__(
+        self,
+        model_name: str = 'linear',
+        batch_size: int = 50000,
+        customer_field: str = 'customer_id',
+        channel_field: str = 'channel_id',
+        channel_name_field: str = 'channel_name',
+        campaign_field: str = 'campaign_id',
+        conversion_value_field: str = 'conversion_value',
+        default_conversion_value: float = 1.0,
+        window: Optional[JourneyWindow] = None,
+        **model_kwargs: Any
+    ):
+        self.model = AttributionModelFactory.create_model(model_name, **model_kwargs)
+        self.batch_size = batch_size
+        self.customer_field = customer_field
+        self.channel_field = channel_field
+        self.channel_name_field = channel_name_field
+        self.campaign_field = campaign_field
+        self.conversion_value_field = conversion_value_field
+        self.default_conversion_value = default_conversion_value
+        self.window = window
+    
+    def run(self, touchpoints: Iterable[Dict]) -> StreamingAttributionResult:
+        """
+        Attribute a stream of touchpoint dictionaries (CSV reader, DB cursor, ...).
+        
+        Rows are buffered ``batch_size`` at a time and scored as frames.
+        """
+        return self.run_frames(self._frames_from_rows(touchpoints))
+    
+    def run_frames(self, frames: Iterable[pd.DataFrame]) -> StreamingAttributionResult:
+        """
+        Attribute a stream of DataFrames, e.g. Parquet row groups or CSV chunks.
+        
+        A customer whose rows continue into the next frame is carried over
+        until its journey is complete.
+        """
+        result = StreamingAttributionResult(model_name=self.model.name)
+        channels = _RunningAggregate()
+        campaigns = _RunningAggregate()
+        channel_names: List[str] = []
+        
+        carry: Optional[pd.DataFrame] = None
+        for frame in frames:
+            if carry is not None and len(carry):
+                frame = pd.concat([carry, frame], ignore_index=True)
+            if not len(frame):
+                continue
+            
+            customers = frame[self.customer_field].to_numpy()
+            changes = np.flatnonzero(customers[1:] != customers[:-1]) + 1
+            open_start = changes[-1] if len(changes) else 0
+            
+            self._process(frame.iloc[:open_start], result, channels, campaigns, channel_names)
+            carry = frame.iloc[open_start:]
+        
+        if carry is not None and len(carry):
+            self._process(carry, result, channels, campaigns, channel_names)
+        
+        result.channel_credit = channels.credit_dict()
+        result.channel_touchpoints = channels.count_dict()
+        result.campaign_credit = campaigns.credit_dict()
+        result.campaign_touchpoints = campaigns.count_dict()
+        
+        self.logger.info(
+            "Streaming attribution completed",
+            model=self.model.name,
+            journey_count=result.journey_count,
+            touchpoint_count=result.touchpoint_count,
+            channel_count=len(result.channel_credit)
+        )
+        
+        return result
+    
+    def _frames_from_rows(self, touchpoints: Iterable[Dict]) -> Iterator[pd.DataFrame]:
+        buffer = []
+        for row in touchpoints:
+            buffer.append(row)
+            if len(buffer) >= self.batch_size:
+                yield pd.DataFrame.from_records(buffer)
+                buffer = []
+        if buffer:
+            yield pd.DataFrame.from_records(buffer)
+    
+    def _process(
+        self,
+        frame: pd.DataFrame,
+        result: StreamingAttributionResult,
+        channels: _RunningAggregate,
+        campaigns: _RunningAggregate,
+        channel_names: List[str]
+    ) -> None:
+        """Score the complete journeys in ``frame`` and fold them into the aggregates."""
+        if not len(frame):
+            return
+        
+        customers = frame[self.customer_field].to_numpy()
+        starts = np.concatenate([[0], np.flatnonzero(customers[1:] != customers[:-1]) + 1])
+        offsets = np.append(starts, len(frame))
+        
+        known_channels = len(channel_names)
+        channel_codes = channels.intern(frame[self.channel_field].to_numpy(), missing_key='unknown')
+        channel_names.extend(['unknown'] * (len(channels.keys) - known_channels))
+        if self.channel_name_field in frame:
+            # Name each newly seen channel after its first row
+            codes, first_rows = np.unique(channel_codes, return_index=True)
+            names = frame[self.channel_name_field].to_numpy()
+            for code, row in zip(codes, first_rows):
+                if code >= known_channels and isinstance(names[row], str):
+                    channel_names[code] = names[row]
+        
+        if self.conversion_value_field in frame:
+            row_values = frame[self.conversion_value_field].fillna(0).to_numpy(dtype=np.float64)
+            conversion_values = np.add.reduceat(row_values, starts)
+        else:
+            conversion_values = np.full(len(starts), self.default_conversion_value)
+        
+        campaign_codes = None
+        if self.campaign_field in frame:
+            campaign_codes = campaigns.intern(frame[self.campaign_field].to_numpy())
+        
+        timestamps = pd.to_datetime(frame['timestamp']).to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        aggregates = self.model.calculate_attribution_aggregates(
+            offsets=offsets,
+            timestamps=timestamps,
+            channel_codes=channel_codes,
+            conversion_values=conversion_values,
+            channel_names=channel_names,
+            campaign_codes=campaign_codes,
+            campaign_count=len(campaigns.keys),
+            window=self.window
+        )
+        
+        channels.add(aggregates['channel'], aggregates['channel_touchpoints'])
+        if campaign_codes is not None:
+            campaigns.add(aggregates['campaign'], aggregates['campaign_touchpoints'])
+        
+        result.journey_count += len(starts)
+        result.touchpoint_count += int(aggregates['channel_touchpoints'].sum())
+        result.total_conversion_value += float(conversion_values.sum())
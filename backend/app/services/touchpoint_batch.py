@@ -0,0 +1,187 @@
+"""
+Compact array-backed touchpoint storage for attribution.
+
+A TouchpointBatch keeps journeys in the flat columnar layout the attribution
+kernels work on: int64 epoch-nanosecond timestamps, int32 channel, campaign
+and touchpoint-ID codes, and per-journey conversion values. Channel,
+campaign and touchpoint IDs are interned once, so each touchpoint costs a
+handful of bytes instead of a dictionary holding a ``datetime``.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Dict, Hashable, Iterable, List, Optional
+import numpy as np
+import pandas as pd
+
+
+@dataclass
+class TouchpointBatch:
+    """
+    Journeys of touchpoints stored as a struct of arrays.
+    
+    Journey ``j`` occupies rows ``offsets[j]:offsets[j + 1]``. Rows within a
+    journey keep their source order; models sort by timestamp themselves.
+    Campaign code -1 means the touchpoint has no campaign.
+    """
+    offsets: np.ndarray
+    timestamps: np.ndarray
+    channel_codes: np.ndarray
+    campaign_codes: np.ndarray
+    id_codes: np.ndarray
+    conversion_values: np.ndarray
+    touchpoint_ids: np.ndarray
+    channel_keys: List[Hashable] = field(default_factory=list)
+    campaign_keys: List[Hashable] = field(default_factory=list)
+    channel_names: List[str] = field(default_factory=list)
+    
+    @property
+    def journey_count(self) -> int:
+        return len(self.offsets) - 1
+    
+    @property
+    def touchpoint_count(self) -> int:
+        return len(self.timestamps)
+    
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the per-touchpoint and per-journey arrays."""
+        return sum(
+            array.nbytes for array in (
+                self.offsets, self.timestamps, self.channel_codes,
+                self.campaign_codes, self.id_codes, self.conversion_values
+            )
+        )
+    
+    def ids(self) -> np.ndarray:
+        """Touchpoint ID of every row, decoded from the interned codes."""
+        return self.touchpoint_ids[self.id_codes]
+    
+    @classmethod
+    def from_dataframe(
+        cls,
+        df: pd.DataFrame,
+        customer_field: str = 'customer_id',
+        id_field: str = 'id',
+        timestamp_field: str = 'timestamp',
+        channel_field: str = 'channel_id',
+        channel_name_field: str = 'channel_name',
+        campaign_field: str = 'campaign_id',
+        conversion_value_field: str = 'conversion_value',
+        default_conversion_value: float = 1.0
+    ) -> "TouchpointBatch":
+        """
+        Build a batch from a touchpoint DataFrame, one journey per customer.
+        
+        Rows need not be grouped: journeys are formed with a stable sort on
+        customer in order of first appearance. A journey's conversion value is
+        the sum of its ``conversion_value_field`` column when present.
+        """
+        customer_codes, _ = pd.factorize(df[customer_field], use_na_sentinel=False)
+        rows = np.argsort(customer_codes, kind='stable')
+        grouped = df.iloc[rows]
+        customer_codes = customer_codes[rows]
+        
+        starts = np.flatnonzero(np.diff(customer_codes, prepend=-1)) if len(rows) else np.zeros(0, dtype=np.int64)
+        offsets = np.append(starts, len(rows)).astype(np.int64)
+        
+        if conversion_value_field in grouped:
+            row_values = grouped[conversion_value_field].fillna(0).to_numpy(dtype=np.float64)
+            conversion_values = np.add.reduceat(row_values, starts) if len(rows) else np.zeros(0)
+        else:
+            conversion_values = np.full(len(starts), float(default_conversion_value))
+        
+        channel_names = None
+        if channel_name_field in grouped:
+            channel_names = grouped[channel_name_field].to_numpy()
+        campaigns = grouped[campaign_field].to_numpy() if campaign_field in grouped else None
+        
+        return cls._from_columns(
+            offsets=offsets,
+            timestamps=pd.to_datetime(grouped[timestamp_field]).to_numpy(dtype='datetime64[ns]').astype(np.int64),
+            channels=grouped[channel_field].to_numpy(),
+            channel_name_values=channel_names,
+            campaigns=campaigns,
+            ids=grouped[id_field].to_numpy(),
+            conversion_values=conversion_values
+        )
+    
+    @classmethod
+    def from_orm(
+        cls,
+        touchpoints: Iterable[Any],
+        conversion_values: Optional[Dict[Hashable, float]] = None,
+        channel_names: Optional[Dict[Hashable, str]] = None,
+        default_conversion_value: float = 1.0
+    ) -> "TouchpointBatch":
+        """
+        Build a batch from ``Touchpoint`` ORM rows, one journey per customer.
+        
+        Args:
+            touchpoints: Touchpoint model instances (or any objects with the
+                same attributes), e.g. a streamed query result
+            conversion_values: Conversion value by customer ID
+            channel_names: Channel name by channel ID
+            default_conversion_value: Value for customers not in ``conversion_values``
+        """
+        frame = pd.DataFrame.from_records(
+            (
+                (tp.id, tp.customer_id, tp.touchpoint_timestamp, tp.channel_id, tp.campaign_id)
+                for tp in touchpoints
+            ),
+            columns=['id', 'customer_id', 'timestamp', 'channel_id', 'campaign_id']
+        )
+        frame['timestamp'] = pd.to_datetime(frame['timestamp'], utc=True)
+        if channel_names is not None:
+            frame['channel_name'] = frame['channel_id'].map(channel_names)
+        
+        batch = cls.from_dataframe(frame, default_conversion_value=default_conversion_value)
+        if conversion_values is not None and batch.journey_count:
+            # Journeys follow first appearance of each customer
+            journey_customers = pd.unique(frame['customer_id'].to_numpy())
+            batch.conversion_values = np.array([
+                conversion_values.get(customer, default_conversion_value)
+                for customer in journey_customers
+            ], dtype=np.float64)
+        return batch
+    
+    @classmethod
+    def _from_columns(
+        cls,
+        offsets: np.ndarray,
+        timestamps: np.ndarray,
+        channels: np.ndarray,
+        channel_name_values: Optional[np.ndarray],
+        campaigns: Optional[np.ndarray],
+        ids: np.ndarray,
+        conversion_values: np.ndarray
+    ) -> "TouchpointBatch":
+        """Intern raw key columns into int32 codes."""
+        channel_codes, channel_keys = pd.factorize(channels, use_na_sentinel=False)
+        id_codes, touchpoint_ids = pd.factorize(ids, use_na_sentinel=False)
+        
+        if campaigns is not None:
+            campaign_codes, campaign_keys = pd.factorize(campaigns, use_na_sentinel=True)
+        else:
+            campaign_codes, campaign_keys = np.full(len(channels), -1), []
+        
+        names: List[str] = ['unknown'] * len(channel_keys)
+        if channel_name_values is not None:
+            _, first_rows = np.unique(channel_codes, return_index=True)
+            for code, row in enumerate(first_rows):
+                if isinstance(channel_name_values[row], str):
+                    names[code] = channel_name_values[row]
+        
+        touchpoint_id_array = np.empty(len(touchpoint_ids), dtype=object)
+        touchpoint_id_array[:] = list(touchpoint_ids)
+        
+        return cls(
+            offsets=np.asarray(offsets, dtype=np.int64),
+            timestamps=np.asarray(timestamps, dtype=np.int64),
+            channel_codes=channel_codes.astype(np.int32),
+            campaign_codes=np.asarray(campaign_codes).astype(np.int32),
+            id_codes=id_codes.astype(np.int32),
+            conversion_values=np.asarray(conversion_values, dtype=np.float64),
+            touchpoint_ids=touchpoint_id_array,
+            channel_keys=list(channel_keys),
+            campaign_keys=list(campaign_keys),
+            channel_names=names
+        )
@@ -104,6 +104,44 @@ class AttributionSettings(BaseSettings):
     w_shaped_opportunity_creation_weight: float = 0.3
     w_shaped_middle_weight: float = 0.1
     
+    # Data-driven (Markov) model: fitted transition matrix saved as .npz
+    data_driven_model_path: Optional[str] = None
+    
+    # Shapley model: exact up to this many channels, permutation sampling above
+    shapley_exact_max_channels: int = 12
+    shapley_error_tolerance: float = 0.001
+    shapley_max_permutations: int = 10000
+    shapley_random_seed: int = 0
+    
+    # Score each distinct channel path once for path-only models and broadcast
+    # the credit to every journey sharing the path
+    path_deduplication: bool = True
+    
+    # Parallel execution: 0 workers means one per CPU; chunk size in touchpoints
+    parallel_max_workers: int = 0
+    parallel_chunk_size: int = 100000
+    
+    # Bootstrap confidence intervals: 'poisson' or 'multinomial' resampling
+    bootstrap_resample_count: int = 1000
+    bootstrap_method: str = "poisson"
+    bootstrap_confidence_level: float = 0.95
+    bootstrap_random_seed: int = 0
+    bootstrap_batch_size: int = 100
+    
+    # Attribution summaries: top touchpoints reported and top/bottom quantile shares
+    summary_top_k: int = 5
+    summary_quantiles: List[float] = [0.2]
+    
+    # B2B what-if reweighting: factor matrices kept per service for this many analyses
+    b2b_analysis_cache_size: int = 8
+    
+    # B2B multi-opportunity accounts: a touchpoint counts toward every
+    # opportunity of its account not yet closed at its time, created or not
+    # ("lifetime"), or only toward the next conversion ("next_conversion");
+    # a window limits either to conversions within this many days after it
+    b2b_opportunity_assignment: str = "lifetime"
+    b2b_opportunity_window_days: Optional[float] = None
+    
     # Data processing
     lookback_window_days: int = 90
     attribution_window_days: int = 30
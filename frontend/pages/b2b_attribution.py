@@ -142,6 +142,8 @@ class B2BAttributionDashboard:
         # Calculate attribution button
         if st.button("🚀 Calculate B2B Attribution", type="primary"):
             self._calculate_attribution()
+        elif self._weights_changed():
+            self._reweight_attribution()
         
         # Display results if available
         if hasattr(st.session_state, 'b2b_attribution_results'):
@@ -173,6 +175,42 @@ class B2BAttributionDashboard:
         except Exception as e:
             st.error(f"❌ Error: {str(e)}")
     
+    def _weights_changed(self) -> bool:
+        """Whether the sidebar weights differ from those of the shown results."""
+        results = st.session_state.get('b2b_attribution_results')
+        if not results:
+            return False
+        metadata = results.get('metadata', {})
+        return (
+            metadata.get('analysis_id') is not None and
+            metadata.get('attribution_weights') != st.session_state.get('attribution_weights')
+        )
+    
+    def _reweight_attribution(self):
+        """Re-combine the current results with the sidebar weights, without recalculating."""
+        results = st.session_state.b2b_attribution_results
+        metadata = results['metadata']
+        try:
+            payload = {
+                "analysis_id": metadata['analysis_id'],
+                "attribution_weights": st.session_state.get('attribution_weights')
+            }
+            response = self.api_client.post("/attribution/b2b/reweight", json=payload)
+            
+            if response.status_code == 200:
+                reweighted = response.json()['data']
+                results.update({key: value for key, value in reweighted.items() if key != 'metadata'})
+                metadata['attribution_weights'] = payload['attribution_weights']
+            elif response.status_code == 404:
+                # The cached analysis expired; the next calculation refreshes it
+                metadata['analysis_id'] = None
+                st.warning("⚠️ Weights changed - recalculate attribution to apply them.")
+            else:
+                st.error(f"❌ Invalid attribution weights: {response.json().get('detail', response.text)}")
+                
+        except Exception as e:
+            st.error(f"❌ Error: {str(e)}")
+    
     def _display_attribution_results(self):
         """Display comprehensive attribution results."""
         results = st.session_state.b2b_attribution_results
@@ -2,6 +2,7 @@
 Unit tests for attribution models.
 """
 import pytest
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 from unittest.mock import patch
@@ -16,7 +17,13 @@ from backend.app.services.attribution_models import (
     WShapedAttribution,
     DataDrivenAttribution,
     AttributionModelFactory,
-    compare_attribution_models
+    JourneyWindow,
+    MultiModelAttributionEngine,
+    PathSignatureIndex,
+    build_journey_view,
+    parameter_grid,
+    compare_attribution_models,
+    weight_template_cache_info
 )
 
 
@@ -581,6 +588,83 @@ class TestCompareAttributionModels:
             assert df[col].iloc[0] == 100.0
 
 
+class TestWeightTemplates:
+    """Test memoized position weight templates."""
+    
+    @pytest.mark.parametrize('model_name', ['first_touch', 'last_touch', 'linear', 'u_shaped', 'w_shaped'])
+    @pytest.mark.parametrize('length', [1, 2, 3, 4, 7, 15])
+    def test_template_matches_per_journey(self, model_name, length):
+        """Test that a template equals the per-journey weights for unit value."""
+        model = AttributionModelFactory.create_model(model_name)
+        touchpoints = [
+            {'id': f'tp_{i}', 'timestamp': datetime(2024, 1, 1) + timedelta(hours=i), 'channel_id': 'ch_1'}
+            for i in range(length)
+        ]
+        expected = model.calculate_attribution(touchpoints, 1.0)
+        
+        template = model.weight_template(length)
+        
+        np.testing.assert_allclose(template, [expected[f'tp_{i}'] for i in range(length)], rtol=1e-12)
+        assert not template.flags.writeable
+    
+    def test_templates_are_cached(self):
+        """Test that repeated lengths are served from the cache."""
+        model = UShapedAttribution(first_touch_weight=0.35, last_touch_weight=0.45, middle_weight=0.2)
+        before = weight_template_cache_info()
+        
+        first = model.weight_template(9)
+        second = UShapedAttribution(
+            first_touch_weight=0.35, last_touch_weight=0.45, middle_weight=0.2
+        ).weight_template(9)
+        
+        assert first is second
+        assert weight_template_cache_info().hits > before.hits
+    
+    def test_parameters_are_part_of_key(self):
+        """Test that different model parameters get different templates."""
+        default = UShapedAttribution().weight_template(5)
+        custom = UShapedAttribution(first_touch_weight=0.5, last_touch_weight=0.3).weight_template(5)
+        
+        assert default[0] != custom[0]
+
+
+class TestMultiModelAttributionEngine:
+    """Test the shared sort-once multi-model engine."""
+    
+    def test_matches_individual_models(self, sample_touchpoints):
+        """Test that each column equals the model's own per-journey result."""
+        shuffled = [sample_touchpoints[2], sample_touchpoints[0], sample_touchpoints[1]]
+        engine = MultiModelAttributionEngine()
+        df = engine.compare(shuffled, 250.0)
+        
+        for model_name, model in engine.models.items():
+            expected = model.calculate_attribution(shuffled, 250.0)
+            for tp_id, weight in expected.items():
+                assert df.loc[tp_id, model_name] == pytest.approx(weight, rel=1e-12)
+    
+    def test_unknown_model_skipped(self, sample_touchpoints):
+        """Test that unknown model names are skipped rather than failing the comparison."""
+        df = compare_attribution_models(sample_touchpoints, 100.0, ['linear', 'not_a_model'])
+        
+        assert list(df.columns) == ['linear']
+    
+    def test_calculate_view_batch(self):
+        """Test that one view feeds every model across several journeys."""
+        engine = MultiModelAttributionEngine(['first_touch', 'linear'])
+        view = build_journey_view(
+            offsets=np.array([0, 2, 5]),
+            ids=np.arange(5),
+            timestamps=np.array([20, 10, 3, 1, 2]),
+            channel_codes=np.zeros(5, dtype=int)
+        )
+        
+        credit, model_names = engine.calculate_view(view)
+        
+        assert model_names == ['first_touch', 'linear']
+        np.testing.assert_allclose(credit[:, 0], [0, 1, 0, 1, 0])
+        np.testing.assert_allclose(credit[:, 1], [0.5, 0.5, 1/3, 1/3, 1/3])
+
+
 class TestAttributionEdgeCases:
     """Test edge cases and error handling."""
     
@@ -664,4 +748,345 @@ class TestPerformance:
         
         # Should complete within reasonable time
         assert execution_time < 10.0  # 10 seconds
-        assert not df.empty
\ No newline at end of file
+        assert not df.empty
+
+class TestBatchAttribution:
+    """Test the columnar batch attribution path."""
+    
+    CHANNEL_NAMES = ['organic_search', 'paid_search', 'social', 'email', 'direct', 'display']
+    
+    @pytest.fixture
+    def columnar_journeys(self):
+        """Random journeys in flat columnar layout, including ties and an empty journey."""
+        rng = np.random.default_rng(42)
+        lengths = np.concatenate([rng.integers(1, 12, size=60), [0, 3]])
+        offsets = np.concatenate([[0], np.cumsum(lengths)])
+        total = int(offsets[-1])
+        base = pd.Timestamp('2024-01-01').value
+        timestamps = base + rng.integers(0, 30, size=total) * 3600 * 10**9 * 6
+        return {
+            'offsets': offsets,
+            'ids': np.array([f'tp_{i}' for i in range(total)]),
+            'timestamps': timestamps,
+            'channel_codes': rng.integers(0, len(self.CHANNEL_NAMES), size=total),
+            'conversion_values': rng.uniform(10, 500, size=len(lengths)),
+            'channel_names': self.CHANNEL_NAMES
+        }
+    
+    @pytest.mark.parametrize('model_name', AttributionModelFactory.get_available_models())
+    def test_matches_per_journey_path(self, model_name, columnar_journeys):
+        """Test that batch credit equals the per-journey result for every model."""
+        model = AttributionModelFactory.create_model(model_name)
+        credit = model.calculate_attribution_batch(**columnar_journeys)
+        
+        offsets = columnar_journeys['offsets']
+        assert credit.shape == columnar_journeys['ids'].shape
+        
+        for j in range(len(offsets) - 1):
+            start, end = offsets[j], offsets[j + 1]
+            touchpoints = [
+                {
+                    'id': columnar_journeys['ids'][k],
+                    'timestamp': pd.Timestamp(int(columnar_journeys['timestamps'][k])),
+                    'channel_id': int(columnar_journeys['channel_codes'][k]),
+                    'channel_name': self.CHANNEL_NAMES[columnar_journeys['channel_codes'][k]]
+                }
+                for k in range(start, end)
+            ]
+            expected = model.calculate_attribution(
+                touchpoints, columnar_journeys['conversion_values'][j]
+            )
+            for k in range(start, end):
+                assert credit[k] == pytest.approx(expected[columnar_journeys['ids'][k]], rel=1e-12)
+    
+    def test_default_fallback_matches_override(self, columnar_journeys):
+        """Test that the generic per-journey fallback agrees with a vectorized kernel."""
+        model = TimeDecayAttribution()
+        vectorized = model.calculate_attribution_batch(**columnar_journeys)
+        
+        view = build_journey_view(**columnar_journeys)
+        fallback = view.scatter(AttributionModel._calculate_view_credit(model, view))
+        np.testing.assert_allclose(fallback, vectorized, rtol=1e-12)
+    
+    def test_mismatched_lengths(self):
+        """Test that inconsistent columnar inputs are rejected."""
+        model = LinearAttribution()
+        with pytest.raises(ValueError):
+            model.calculate_attribution_batch(
+                offsets=np.array([0, 3]),
+                ids=np.array(['a', 'b']),
+                timestamps=np.array([1, 2]),
+                channel_codes=np.array([0, 0])
+            )
+    
+    def test_aggregates_match_scattered_credit(self, columnar_journeys):
+        """Test that channel and campaign aggregates equal bincounts of batch credit."""
+        model = TimeDecayAttribution()
+        campaign_codes = np.where(columnar_journeys['channel_codes'] % 2 == 0, columnar_journeys['channel_codes'] // 2, -1)
+        
+        credit = model.calculate_attribution_batch(**columnar_journeys)
+        aggregates = model.calculate_attribution_aggregates(
+            offsets=columnar_journeys['offsets'],
+            timestamps=columnar_journeys['timestamps'],
+            channel_codes=columnar_journeys['channel_codes'],
+            conversion_values=columnar_journeys['conversion_values'],
+            channel_names=columnar_journeys['channel_names'],
+            campaign_codes=campaign_codes
+        )
+        
+        np.testing.assert_allclose(
+            aggregates['channel'],
+            np.bincount(columnar_journeys['channel_codes'], weights=credit, minlength=len(self.CHANNEL_NAMES))
+        )
+        present = campaign_codes >= 0
+        np.testing.assert_allclose(
+            aggregates['campaign'],
+            np.bincount(campaign_codes[present], weights=credit[present])
+        )
+
+
+
+class TestJourneyWindow:
+    """Test window and touchpoint-cap enforcement before scoring."""
+    
+    DAY = 24 * 3600 * 10**9
+    
+    @staticmethod
+    def expected_kept(days, conversion_day, lookback, min_touchpoints, max_touchpoints, truncation):
+        """Brute-force kept positions of one journey, in time order."""
+        order = sorted(range(len(days)), key=lambda i: days[i])
+        kept = [i for i in order if conversion_day - lookback <= days[i] <= conversion_day]
+        if len(kept) < min_touchpoints:
+            return []
+        if len(kept) > max_touchpoints:
+            if truncation == 'keep_last':
+                kept = kept[-max_touchpoints:]
+            elif truncation == 'keep_first':
+                kept = kept[:max_touchpoints]
+            elif truncation == 'keep_first_and_last':
+                kept = kept[:1] + kept[len(kept) - max_touchpoints + 1:]
+            else:
+                kept = []
+        return kept
+    
+    @pytest.mark.parametrize('truncation', ['keep_last', 'keep_first', 'keep_first_and_last', 'drop'])
+    def test_matches_brute_force(self, truncation):
+        """Test binary-search windows and truncation against a per-journey reference."""
+        rng = np.random.default_rng(17)
+        lengths = rng.integers(0, 12, size=200)
+        offsets = np.concatenate([[0], np.cumsum(lengths)])
+        days = rng.integers(0, 120, size=int(offsets[-1]))
+        conversion_days = rng.integers(60, 130, size=len(lengths))
+        window = JourneyWindow(
+            lookback_window_days=45, min_touchpoints=2, max_touchpoints=4, truncation=truncation
+        )
+        
+        view = build_journey_view(
+            offsets, np.arange(len(days)), days * self.DAY, np.zeros(len(days), dtype=np.int64)
+        )
+        windowed = window.apply(view, conversion_days * self.DAY)
+        
+        for j in range(len(lengths)):
+            start, end = offsets[j], offsets[j + 1]
+            expected = self.expected_kept(
+                days[start:end].tolist(), conversion_days[j], 45, 2, 4, truncation
+            )
+            actual = windowed.ids[windowed.offsets[j]:windowed.offsets[j + 1]] - start
+            assert actual.tolist() == expected
+    
+    def test_windowed_batch_credit(self):
+        """Test that cut touchpoints get zero credit and the rest match the per-journey model."""
+        model = LinearAttribution()
+        days = np.array([0, 50, 80, 85, 90])
+        window = JourneyWindow(lookback_window_days=30)
+        
+        credit = model.calculate_attribution_batch(
+            offsets=np.array([0, 5]),
+            ids=np.arange(5),
+            timestamps=days * self.DAY,
+            channel_codes=np.zeros(5, dtype=np.int64),
+            conversion_values=90.0,
+            window=window
+        )
+        
+        np.testing.assert_allclose(credit, [0.0, 0.0, 30.0, 30.0, 30.0])
+    
+    def test_attribution_window_drops_stale_journeys(self):
+        """Test that journeys quiet for longer than the attribution window are dropped."""
+        view = build_journey_view(
+            offsets=np.array([0, 2, 4]),
+            ids=np.arange(4),
+            timestamps=np.array([0, 10, 0, 40]) * self.DAY,
+            channel_codes=np.zeros(4, dtype=np.int64)
+        )
+        window = JourneyWindow(attribution_window_days=30)
+        
+        windowed = window.apply(view, conversion_times=np.array([50, 45]) * self.DAY)
+        
+        assert windowed.lengths.tolist() == [0, 2]
+    
+    def test_from_settings(self):
+        """Test that settings limits are picked up."""
+        window = JourneyWindow.from_settings(truncation='keep_first_and_last')
+        
+        assert window.lookback_window_days == 90
+        assert window.max_touchpoints == 50
+        assert window.truncation == 'keep_first_and_last'
+    
+    def test_invalid_truncation_policy(self):
+        """Test that unknown truncation policies are rejected."""
+        with pytest.raises(ValueError):
+            JourneyWindow(truncation='keep_middle')
+
+
+
+class TestPathSignatureIndex:
+    """Test scoring each distinct channel path once."""
+    
+    @pytest.fixture
+    def repeated_paths(self):
+        """Many journeys drawn from a handful of channel paths, with varied timing."""
+        rng = np.random.default_rng(23)
+        paths = [[0], [0, 1], [1, 0], [2, 1, 0], [0, 1, 2, 3], [3, 3, 1]]
+        choice = rng.integers(0, len(paths), size=500)
+        codes = np.concatenate([paths[c] for c in choice])
+        lengths = np.array([len(paths[c]) for c in choice])
+        offsets = np.concatenate([[0], np.cumsum(lengths)])
+        # Increasing timestamps inside each journey keep the path order
+        position = np.arange(offsets[-1]) - np.repeat(offsets[:-1], lengths)
+        timestamps = position * 10**12 + rng.integers(0, 10**9, size=offsets[-1])
+        return {
+            'offsets': offsets,
+            'ids': np.arange(offsets[-1]),
+            'timestamps': timestamps,
+            'channel_codes': codes,
+            'conversion_values': rng.uniform(1.0, 100.0, size=len(lengths)),
+            'channel_names': ['search', 'email', 'social', 'direct']
+        }
+    
+    def test_index_groups_identical_paths(self, repeated_paths):
+        """Test that journeys group by ordered channel path, not by channel set."""
+        view = build_journey_view(**repeated_paths)
+        
+        index = PathSignatureIndex.build(view)
+        
+        assert index.path_count == 6
+        assert index.hit_rate == pytest.approx(1 - 6 / 500)
+        statistics = index.statistics()
+        assert statistics['scored_touchpoint_count'] == 1 + 2 + 2 + 3 + 4 + 3
+        assert statistics['touchpoint_count'] == view.touchpoint_count
+    
+    @pytest.mark.parametrize('model_name', ['w_shaped', 'data_driven', 'linear'])
+    def test_deduplicated_credit_matches_direct(self, repeated_paths, model_name, monkeypatch):
+        """Test that broadcast credit equals scoring every journey."""
+        model = AttributionModelFactory.create_model(model_name)
+        assert model.deduplicates_paths
+        deduplicated = model.calculate_attribution_batch(**repeated_paths)
+        
+        monkeypatch.setattr(model.settings, 'path_deduplication', False)
+        direct = model.calculate_attribution_batch(**repeated_paths)
+        
+        np.testing.assert_array_equal(deduplicated, direct)
+    
+    def test_per_journey_model_scores_each_path_once(self, repeated_paths):
+        """Test that a path-only model without a vectorized kernel runs once per path."""
+        class CountingAttribution(LinearAttribution):
+            path_only = True
+            calls = 0
+            
+            def calculate_attribution(self, touchpoints, conversion_value=1.0):
+                CountingAttribution.calls += 1
+                return super().calculate_attribution(touchpoints, conversion_value)
+            
+            _calculate_view_credit = AttributionModel._calculate_view_credit
+        
+        model = CountingAttribution()
+        
+        credit = model.calculate_attribution_batch(**repeated_paths)
+        
+        assert CountingAttribution.calls == 6
+        assert credit.sum() == pytest.approx(repeated_paths['conversion_values'].sum())
+
+
+class TestParameterSweep:
+    """Test scoring a whole parameter grid in one pass."""
+    
+    @pytest.fixture
+    def journeys(self):
+        """Random journeys with unsorted timestamps and a window-sized spread."""
+        rng = np.random.default_rng(41)
+        lengths = rng.integers(1, 9, size=300)
+        offsets = np.concatenate([[0], np.cumsum(lengths)])
+        return {
+            'offsets': offsets,
+            'timestamps': rng.integers(0, 60 * 24 * 3600 * 10**9, size=offsets[-1]),
+            'channel_codes': rng.integers(0, 5, size=offsets[-1]),
+            'conversion_values': rng.uniform(1.0, 100.0, size=len(lengths)),
+            'channel_names': ['search', 'email', 'social', 'direct', 'display']
+        }
+    
+    def test_parameter_grid_is_cartesian_product(self):
+        """Test that grid points cover every combination in axis order."""
+        grid = parameter_grid(first_touch_weight=[0.3, 0.4], last_touch_weight=[0.4, 0.5])
+        
+        assert grid == [
+            {'first_touch_weight': 0.3, 'last_touch_weight': 0.4},
+            {'first_touch_weight': 0.3, 'last_touch_weight': 0.5},
+            {'first_touch_weight': 0.4, 'last_touch_weight': 0.4},
+            {'first_touch_weight': 0.4, 'last_touch_weight': 0.5}
+        ]
+    
+    @pytest.mark.parametrize('model_class,grid', [
+        (TimeDecayAttribution, parameter_grid(half_life_days=[1, 3.5, 7, 30])),
+        (UShapedAttribution, parameter_grid(
+            first_touch_weight=[0.3, 0.4], last_touch_weight=[0.4, 0.5], middle_weight=[0.2]
+        )),
+        (WShapedAttribution, parameter_grid(
+            first_touch_weight=[0.2, 0.3], lead_creation_weight=[0.3], opportunity_creation_weight=[0.3, 0.4]
+        ))
+    ])
+    def test_sweep_rows_match_separate_runs(self, journeys, model_class, grid):
+        """Test that every grid row equals a batch run of a model built with those parameters."""
+        sweep = model_class().sweep(grid=grid, **journeys)
+        
+        assert sweep.credit.shape == (len(grid), len(journeys['timestamps']))
+        assert sweep.channel_credit.shape == (len(grid), 5)
+        for row, point in enumerate(grid):
+            model = model_class(**point)
+            expected = model.calculate_attribution_batch(ids=np.arange(len(journeys['timestamps'])), **journeys)
+            aggregates = model.calculate_attribution_aggregates(**journeys)
+            np.testing.assert_allclose(sweep.credit[row], expected, rtol=1e-12)
+            np.testing.assert_allclose(sweep.channel_credit[row], aggregates['channel'], rtol=1e-10)
+    
+    def test_sweep_applies_window(self, journeys):
+        """Test that windowed touchpoints get zero credit in every grid row."""
+        window = JourneyWindow(max_touchpoints=3)
+        grid = parameter_grid(half_life_days=[2, 14])
+        
+        sweep = TimeDecayAttribution().sweep(grid=grid, window=window, **journeys)
+        
+        for row, point in enumerate(grid):
+            expected = TimeDecayAttribution(**point).calculate_attribution_batch(
+                ids=np.arange(len(journeys['timestamps'])), window=window, **journeys
+            )
+            np.testing.assert_allclose(sweep.credit[row], expected, rtol=1e-12)
+    
+    def test_channel_summary_lists_parameters_and_channels(self, journeys):
+        """Test the per-grid-point channel summary frame."""
+        grid = parameter_grid(half_life_days=[3, 7, 14])
+        
+        summary = TimeDecayAttribution().sweep(grid=grid, **journeys).channel_summary()
+        
+        assert list(summary.columns) == ['half_life_days'] + journeys['channel_names']
+        assert list(summary['half_life_days']) == [3, 7, 14]
+        np.testing.assert_allclose(
+            summary[journeys['channel_names']].sum(axis=1),
+            journeys['conversion_values'].sum()
+        )
+    
+    def test_sweep_rejects_unknown_parameters(self, journeys):
+        """Test that only a model's sweepable parameters are accepted."""
+        with pytest.raises(ValueError, match="Cannot sweep"):
+            UShapedAttribution().sweep(grid=[{'half_life_days': 7}], **journeys)
+        with pytest.raises(ValueError, match="Cannot sweep"):
+            LinearAttribution().sweep(grid=[{'middle_weight': 0.5}], **journeys)
@@ -0,0 +1,89 @@
+"""
+Unit tests for partial-selection attribution summaries.
+"""
+import pytest
+import numpy as np
+
+from backend.app.services.attribution_summary import (
+    extreme_sums,
+    quantile_count,
+    summarize_attribution,
+    top_k_indices
+)
+
+
+def sorted_summary(attribution_results, top_k, quantile):
+    """Reference summary built by fully sorting the touchpoints."""
+    ranked = sorted(attribution_results.items(), key=lambda x: x[1], reverse=True)
+    count = max(1, int(len(ranked) * quantile))
+    return {
+        'top': ranked[:top_k],
+        'top_sum': sum(value for _, value in ranked[:count]),
+        'bottom_sum': sum(value for _, value in ranked[-count:])
+    }
+
+
+class TestAttributionSummary:
+    """Test top-K and quantile sums against a full sort."""
+    
+    @pytest.mark.parametrize('top_k,quantile', [(5, 0.2), (1, 0.05), (40, 0.5), (500, 1.0)])
+    def test_matches_full_sort(self, top_k, quantile):
+        """Test that partial selection reproduces the sorted summary, ties included."""
+        rng = np.random.default_rng(3)
+        # Rounded credits produce many ties
+        credit = np.round(rng.exponential(100.0, size=300), -1)
+        results = {f"tp_{i}": value for i, value in enumerate(credit.tolist())}
+        
+        summary = summarize_attribution(list(results), credit, top_k=top_k, quantiles=[quantile])
+        expected = sorted_summary(results, top_k, quantile)
+        
+        top = [(tp['touchpoint_id'], tp['attribution_value']) for tp in summary['top_contributing_touchpoints']]
+        assert top == expected['top']
+        label = f"{quantile * 100:g}"
+        distribution = summary['attribution_distribution']
+        assert distribution[f'top_{label}_percent'] == pytest.approx(expected['top_sum'])
+        assert distribution[f'bottom_{label}_percent'] == pytest.approx(expected['bottom_sum'])
+        assert summary['quantile_shares'][label]['top'] == pytest.approx(expected['top_sum'] / credit.sum())
+    
+    def test_default_keys_of_engine_summary(self):
+        """Test that the default quantile keeps the top/bottom 20% keys."""
+        summary = summarize_attribution(['a', 'b', 'c', 'd', 'e'], np.array([1000.0, 500.0, 300.0, 200.0, 100.0]))
+        
+        assert summary['attribution_distribution'] == {'top_20_percent': 1000.0, 'bottom_20_percent': 100.0}
+        assert summary['top_contributing_touchpoints'][0]['percentage'] == pytest.approx(1000.0 / 2100.0 * 100)
+    
+    def test_concentration_index(self):
+        """Test the Herfindahl index at both extremes."""
+        even = summarize_attribution(list('abcd'), np.full(4, 25.0))
+        single = summarize_attribution(list('abcd'), np.array([0.0, 0.0, 10.0, 0.0]))
+        
+        assert even['concentration_index'] == pytest.approx(0.25)
+        assert single['concentration_index'] == pytest.approx(1.0)
+    
+    def test_selection_helpers(self):
+        """Test top_k_indices and extreme_sums on small inputs."""
+        values = np.array([3.0, 7.0, 7.0, 1.0, 5.0])
+        
+        assert top_k_indices(values, 3).tolist() == [1, 2, 4]
+        assert top_k_indices(values, 0).tolist() == []
+        assert extreme_sums(values, 2) == {'top': 14.0, 'bottom': 4.0}
+    
+    def test_quantile_count_tolerates_float_error(self):
+        """Test that quantile counts are not rounded down by float error."""
+        assert 100 * 0.29 < 29
+        assert quantile_count(100, 0.29) == 29
+        assert quantile_count(100, 0.2) == 20
+        assert quantile_count(3, 0.1) == 1
+        
+        summary = summarize_attribution([f"tp_{i}" for i in range(100)], np.arange(100.0), quantiles=[0.29])
+        assert summary['attribution_distribution']['bottom_29_percent'] == sum(range(29))
+    
+    def test_invalid_arguments(self):
+        """Test that bad quantiles, negative K and misaligned inputs are rejected."""
+        with pytest.raises(ValueError):
+            summarize_attribution(['a'], np.ones(1), quantiles=[1.5])
+        with pytest.raises(ValueError):
+            summarize_attribution(['a'], np.ones(1), top_k=-1)
+        with pytest.raises(ValueError):
+            summarize_attribution(['a', 'b'], np.ones(1))
+        assert summarize_attribution([], np.zeros(0)) == {}
@@ -0,0 +1,96 @@
+"""
+Unit tests for bootstrap confidence intervals on channel credit.
+"""
+import pytest
+import numpy as np
+
+from backend.app.services.attribution_models import AttributionModelFactory
+from backend.app.services.bootstrap_attribution import BootstrapAttributionEngine, journey_channel_credit
+
+
+@pytest.fixture
+def columnar_batch():
+    """Random journeys in columnar layout."""
+    rng = np.random.default_rng(17)
+    lengths = rng.integers(1, 7, size=400)
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    touchpoint_count = int(offsets[-1])
+    return {
+        'offsets': offsets,
+        'timestamps': rng.integers(0, 30 * 86400, size=touchpoint_count) * 10**9,
+        'channel_codes': rng.integers(0, 4, size=touchpoint_count),
+        'conversion_values': rng.uniform(10.0, 500.0, size=len(lengths)),
+        'channel_names': ['search', 'email', 'social', 'direct']
+    }
+
+
+class TestJourneyChannelCredit:
+    """Test folding model credit into per-journey channel rows."""
+    
+    @pytest.mark.parametrize('model_name', ['linear', 'time_decay', 'u_shaped'])
+    def test_rows_sum_to_channel_aggregates(self, columnar_batch, model_name):
+        """Test that column sums equal the model's channel aggregates."""
+        model = AttributionModelFactory.create_model(model_name)
+        
+        journey_credit = journey_channel_credit(model, **columnar_batch)
+        
+        assert journey_credit.shape == (400, 4)
+        np.testing.assert_allclose(journey_credit.sum(axis=1), columnar_batch['conversion_values'])
+        np.testing.assert_allclose(
+            journey_credit.sum(axis=0),
+            model.calculate_attribution_aggregates(**columnar_batch)['channel']
+        )
+
+
+class TestBootstrapAttributionEngine:
+    """Test resampled channel credit intervals."""
+    
+    @pytest.fixture
+    def journey_credit(self, columnar_batch):
+        return journey_channel_credit(AttributionModelFactory.create_model('linear'), **columnar_batch)
+    
+    @pytest.mark.parametrize('method', ['poisson', 'multinomial'])
+    def test_intervals_bracket_estimate(self, journey_credit, method):
+        """Test that percentile intervals contain the full-sample estimate."""
+        engine = BootstrapAttributionEngine(resample_count=400, method=method, random_seed=3)
+        
+        result = engine.confidence_intervals(journey_credit)
+        
+        assert result.replicates.shape == (400, 4)
+        assert np.all(result.lower < result.estimate)
+        assert np.all(result.estimate < result.upper)
+        np.testing.assert_allclose(result.estimate, journey_credit.sum(axis=0))
+    
+    def test_multinomial_keeps_journey_count(self, journey_credit):
+        """Test that multinomial weights always resample exactly n journeys."""
+        engine = BootstrapAttributionEngine(resample_count=50, method='multinomial')
+        
+        weights = engine.resample_weights(400, 50, np.random.default_rng(0))
+        
+        np.testing.assert_array_equal(weights.sum(axis=1), 400)
+    
+    def test_seed_fixes_replicates_across_worker_counts(self, journey_credit):
+        """Test that results depend on the seed only, not on parallelism."""
+        serial = BootstrapAttributionEngine(resample_count=250, batch_size=40, random_seed=11)
+        threaded = BootstrapAttributionEngine(resample_count=250, batch_size=40, random_seed=11, max_workers=4)
+        reseeded = BootstrapAttributionEngine(resample_count=250, batch_size=40, random_seed=12)
+        
+        replicates = serial.replicates(journey_credit)
+        
+        np.testing.assert_array_equal(threaded.replicates(journey_credit), replicates)
+        assert not np.array_equal(reseeded.replicates(journey_credit), replicates)
+    
+    def test_run_reports_named_channels(self, columnar_batch):
+        """Test the end-to-end run and its per-channel frame."""
+        engine = BootstrapAttributionEngine(resample_count=100)
+        
+        frame = engine.run(AttributionModelFactory.create_model('u_shaped'), **columnar_batch).to_dataframe()
+        
+        assert list(frame.index) == columnar_batch['channel_names']
+        assert list(frame.columns) == ['estimate', 'lower', 'upper', 'standard_error']
+        assert (frame['standard_error'] > 0).all()
+    
+    def test_rejects_unknown_method(self):
+        """Test validation of the resampling method."""
+        with pytest.raises(ValueError, match="Unknown resampling method"):
+            BootstrapAttributionEngine(method='jackknife')
@@ -0,0 +1,412 @@
+"""
+Parity tests for the columnar B2B attribution engine.
+"""
+import pytest
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from backend.app.services.attribution_models import JourneyWindow
+from backend.app.services.b2b_attribution_engine import (
+    B2BAttributionAnalyzer,
+    B2BMarketingAttributionEngine,
+    B2BStageType,
+    LeadData,
+    OpportunityData,
+    TouchpointData,
+    TouchpointType
+)
+from backend.app.services.columnar_b2b_attribution import (
+    ALIGNMENT_GROUPS,
+    FACTOR_NAMES,
+    ColumnarB2BAttributionEngine,
+    LeadColumns,
+    OpportunityColumns,
+    OpportunityPairs,
+    TouchpointColumns,
+    factor_weight_matrix
+)
+
+
+FACTOR_KEYS = [
+    'time_weighted_attribution',
+    'quality_weighted_attribution',
+    'account_based_attribution',
+    'stage_progression_attribution',
+    'pipeline_velocity_attribution',
+    'combined_b2b_attribution'
+]
+
+
+@pytest.fixture
+def b2b_data():
+    """Random B2B data with repeat opportunities, unknown leads and zero engagement."""
+    rng = np.random.default_rng(13)
+    start = datetime(2023, 1, 1)
+    accounts = [f"account_{i}" for i in range(40)]
+    
+    leads = [
+        LeadData(
+            lead_id=f"lead_{i % 70}",  # some lead IDs repeat; the later record wins
+            account_id=accounts[i % 40],
+            lead_score=int(rng.integers(0, 250)),
+            demographic_score=int(rng.integers(0, 100)),
+            behavioral_score=int(rng.integers(0, 100)),
+            firmographic_score=int(rng.integers(0, 100)),
+            created_date=start,
+            stage=B2BStageType.INTEREST,
+            source="organic_search",
+            lead_quality_tier=str(rng.choice(['A', 'B', 'C', 'D', 'E']))
+        )
+        for i in range(80)
+    ]
+    
+    opportunities = [
+        OpportunityData(
+            opportunity_id=f"opp_{i}",
+            # account_35+ have no opportunity; some accounts have several
+            account_id=accounts[int(rng.integers(0, 35))],
+            lead_ids=[],
+            stage="Closed Won",
+            probability=1.0,
+            amount=float(rng.uniform(1000, 200000)),
+            created_date=start + timedelta(days=int(rng.integers(0, 200))),
+            close_date=None if i % 7 == 0 else start + timedelta(days=int(rng.integers(200, 600))),
+            sales_cycle_days=int(rng.choice([0, 45, 120, 200, 400])),
+            deal_size_tier=str(rng.choice(['enterprise', 'mid-market', 'smb', 'other'])),
+            decision_makers_count=int(rng.integers(0, 5)),
+            influencers_count=int(rng.integers(0, 5))
+        )
+        for i in range(50)
+    ]
+    
+    types = list(TouchpointType)
+    stages = list(B2BStageType)
+    touchpoints = [
+        TouchpointData(
+            touchpoint_id=f"tp_{i}",
+            lead_id=f"lead_{int(rng.integers(0, 90))}",
+            account_id=accounts[int(rng.integers(0, 40))],
+            timestamp=start + timedelta(days=int(rng.integers(0, 700)), hours=int(rng.integers(0, 24))),
+            touchpoint_type=types[int(rng.integers(0, len(types)))],
+            channel=str(rng.choice(['email', 'search', 'events'])),
+            campaign_id=None,
+            content_id=None,
+            engagement_score=0.0 if i % 11 == 0 else float(rng.uniform(0, 100)),
+            stage_influence=stages[int(rng.integers(0, len(stages)))],
+            cost=float(rng.uniform(0, 500)),
+            is_sales_touch=bool(rng.random() < 0.4),
+            is_marketing_touch=bool(rng.random() < 0.8),
+            sales_rep_id=None
+        )
+        for i in range(600)
+    ]
+    return leads, opportunities, touchpoints
+
+
+def assert_same_scores(columnar, rowwise):
+    assert set(columnar) == set(rowwise)
+    for tp_id, value in rowwise.items():
+        assert columnar[tp_id] == pytest.approx(value, rel=1e-12, abs=1e-12)
+
+
+class TestColumnarParity:
+    """Test that every factor matches the row-wise engine."""
+    
+    @pytest.mark.parametrize('window', [None, JourneyWindow(lookback_window_days=120, max_touchpoints=6)])
+    def test_all_factors_match(self, b2b_data, window):
+        """Test factor-by-factor parity of b2b_specific_attribution."""
+        leads, opportunities, touchpoints = b2b_data
+        
+        expected = B2BMarketingAttributionEngine().b2b_specific_attribution(
+            leads, opportunities, touchpoints, window=window
+        )
+        result = ColumnarB2BAttributionEngine().b2b_specific_attribution(
+            leads, opportunities, touchpoints, window=window
+        )
+        
+        for key in FACTOR_KEYS:
+            assert_same_scores(result[key], expected[key])
+        assert result['attribution_summary']['total_attribution_value'] == pytest.approx(
+            expected['attribution_summary']['total_attribution_value']
+        )
+    
+    def test_split_by_factor_method(self, b2b_data):
+        """Test each columnar factor method against its row-wise counterpart."""
+        leads, opportunities, touchpoints = b2b_data
+        rowwise = B2BMarketingAttributionEngine()
+        columnar = ColumnarB2BAttributionEngine(rowwise)
+        lead_columns = LeadColumns.from_records(leads)
+        opportunity_columns = OpportunityColumns.from_records(opportunities)
+        touchpoint_columns = TouchpointColumns.from_records(touchpoints)
+        
+        matrix = columnar.factor_matrix(lead_columns, opportunity_columns, touchpoint_columns)
+        
+        def as_dict(scores):
+            return matrix.to_dict(scores)
+        
+        assert_same_scores(
+            as_dict(columnar.calculate_b2b_time_decay(touchpoint_columns, opportunity_columns, avg_sales_cycle_days=90)),
+            rowwise.calculate_b2b_time_decay(touchpoints, opportunities, avg_sales_cycle_days=90)
+        )
+        assert_same_scores(
+            as_dict(columnar.calculate_lead_quality_impact(lead_columns, touchpoint_columns)),
+            rowwise.calculate_lead_quality_impact(leads, touchpoints)
+        )
+        assert_same_scores(
+            as_dict(columnar.calculate_account_level_attribution(opportunity_columns, touchpoint_columns)),
+            rowwise.calculate_account_level_attribution(opportunities, touchpoints)
+        )
+        assert_same_scores(
+            as_dict(columnar.calculate_stage_progression_attribution(touchpoint_columns)),
+            rowwise.calculate_stage_progression_attribution(touchpoints)
+        )
+        assert_same_scores(
+            as_dict(columnar.calculate_pipeline_velocity_impact(opportunity_columns, touchpoint_columns)),
+            rowwise.calculate_pipeline_velocity_impact(opportunities, touchpoints)
+        )
+    
+    def test_custom_weight_tables_are_shared(self, b2b_data):
+        """Test that edits to the wrapped engine's weight tables apply to the columnar engine."""
+        leads, opportunities, touchpoints = b2b_data
+        rowwise = B2BMarketingAttributionEngine()
+        rowwise.touchpoint_type_weights[TouchpointType.WEBSITE_VISIT] = 2.5
+        rowwise.lead_quality_multipliers['E'] = 3.0
+        
+        expected = rowwise.b2b_specific_attribution(leads, opportunities, touchpoints)
+        result = ColumnarB2BAttributionEngine(rowwise).b2b_specific_attribution(leads, opportunities, touchpoints)
+        
+        for key in FACTOR_KEYS:
+            assert_same_scores(result[key], expected[key])
+    
+    def test_empty_inputs(self):
+        """Test that empty inputs give empty results like the row-wise engine."""
+        result = ColumnarB2BAttributionEngine().b2b_specific_attribution([], [], [])
+        
+        for key in FACTOR_KEYS:
+            assert result[key] == {}
+        assert result['attribution_summary'] == {}
+
+
+class TestColumnTables:
+    """Test building column tables from frames and records."""
+    
+    def test_dataframe_accepts_enum_values(self, b2b_data):
+        """Test that string enum values and enum members produce the same codes."""
+        _, _, touchpoints = b2b_data
+        frame = pd.DataFrame([vars(tp) for tp in touchpoints])
+        frame['touchpoint_type'] = [tp.touchpoint_type.value for tp in touchpoints]
+        frame['stage_influence'] = [tp.stage_influence.value for tp in touchpoints]
+        
+        from_frame = TouchpointColumns.from_dataframe(frame)
+        from_records = TouchpointColumns.from_records(touchpoints)
+        
+        np.testing.assert_array_equal(from_frame.type_codes, from_records.type_codes)
+        np.testing.assert_array_equal(from_frame.stage_codes, from_records.stage_codes)
+        np.testing.assert_array_equal(from_frame.timestamps, from_records.timestamps)
+    
+    def test_unknown_enum_value_rejected(self, b2b_data):
+        """Test validation of touchpoint type values."""
+        _, _, touchpoints = b2b_data
+        frame = pd.DataFrame([vars(tp) for tp in touchpoints[:3]])
+        frame.loc[1, 'touchpoint_type'] = 'carrier_pigeon'
+        
+        with pytest.raises(ValueError, match="Unknown TouchpointType"):
+            TouchpointColumns.from_dataframe(frame)
+    
+    def test_open_opportunity_converts_at_creation(self, b2b_data):
+        """Test that opportunities without a close date convert at their creation date."""
+        _, opportunities, _ = b2b_data
+        
+        columns = OpportunityColumns.from_records(opportunities)
+        
+        open_opportunity = opportunities[0]
+        assert open_opportunity.close_date is None
+        assert columns.conversion_times[0] == pd.Timestamp(open_opportunity.created_date).value
+
+
+class TestFusedFactorMatrix:
+    """Test the fused (touchpoints x 5) factor matrix."""
+    
+    def test_matrix_columns_match_factor_dicts(self, b2b_data):
+        """Test that each column reproduces the row-wise factor dictionary."""
+        leads, opportunities, touchpoints = b2b_data
+        expected = B2BMarketingAttributionEngine().b2b_specific_attribution(leads, opportunities, touchpoints)
+        
+        matrix = ColumnarB2BAttributionEngine().factor_matrix(
+            LeadColumns.from_records(leads),
+            OpportunityColumns.from_records(opportunities),
+            TouchpointColumns.from_records(touchpoints)
+        )
+        
+        assert matrix.scores.shape == (len(touchpoints), 5)
+        assert not np.isnan(matrix.scores).any()
+        for name, key in zip(FACTOR_NAMES, FACTOR_KEYS):
+            assert_same_scores(matrix.to_dict(matrix.factor(name)), expected[key])
+    
+    def test_pairs_built_once(self, b2b_data):
+        """Test that the matrix builds the assigned pairs once and builds no other pairs."""
+        leads, opportunities, touchpoints = b2b_data
+        
+        with patch.object(
+            OpportunityPairs, 'build_assigned', wraps=OpportunityPairs.build_assigned
+        ) as build_assigned, patch.object(OpportunityPairs, 'build', wraps=OpportunityPairs.build) as build:
+            ColumnarB2BAttributionEngine().factor_matrix(
+                LeadColumns.from_records(leads),
+                OpportunityColumns.from_records(opportunities),
+                TouchpointColumns.from_records(touchpoints)
+            )
+        
+        assert build_assigned.call_count == 1
+        assert build.call_count == 0
+    
+    def test_combine_is_matrix_vector_product(self, b2b_data):
+        """Test custom weights against combine_b2b_attribution_factors."""
+        leads, opportunities, touchpoints = b2b_data
+        rowwise = B2BMarketingAttributionEngine()
+        factors = rowwise.b2b_specific_attribution(leads, opportunities, touchpoints)
+        weights = {'time': 0.1, 'quality': 0.4, 'account': 0.2, 'stage': 0.2, 'velocity': 0.1}
+        
+        matrix = ColumnarB2BAttributionEngine(rowwise).factor_matrix(
+            LeadColumns.from_records(leads),
+            OpportunityColumns.from_records(opportunities),
+            TouchpointColumns.from_records(touchpoints)
+        )
+        
+        expected = rowwise.combine_b2b_attribution_factors(
+            time_weighted=factors['time_weighted_attribution'],
+            quality_weighted=factors['quality_weighted_attribution'],
+            account_based=factors['account_based_attribution'],
+            stage_weighted=factors['stage_progression_attribution'],
+            velocity_impact=factors['pipeline_velocity_attribution'],
+            weights=weights
+        )
+        assert_same_scores(matrix.to_dict(matrix.combine(weights)), expected)
+        with pytest.raises(ValueError, match="Missing factor weights"):
+            matrix.combine({'time': 1.0})
+        with pytest.raises(ValueError, match="Unknown factor weights: \\['timing'\\]"):
+            matrix.combine({**weights, 'timing': 0.5})
+    
+    def test_fused_mode_of_rowwise_engine(self, b2b_data):
+        """Test that fused=True gives the same results as the per-factor walks."""
+        leads, opportunities, touchpoints = b2b_data
+        engine = B2BMarketingAttributionEngine()
+        
+        expected = engine.b2b_specific_attribution(leads, opportunities, touchpoints)
+        fused = engine.b2b_specific_attribution(leads, opportunities, touchpoints, fused=True)
+        
+        for key in FACTOR_KEYS:
+            assert_same_scores(fused[key], expected[key])
+
+
+class TestReweighting:
+    """Test reweighting a cached factor analysis."""
+    
+    WEIGHTS = {'time': 0.1, 'quality': 0.4, 'account': 0.2, 'stage': 0.2, 'velocity': 0.1}
+    
+    def test_reweight_matches_analyzer(self, b2b_data):
+        """Test combined attribution, channel performance and alignment for new weights."""
+        leads, opportunities, touchpoints = b2b_data
+        rowwise = B2BMarketingAttributionEngine()
+        analyzer = B2BAttributionAnalyzer(rowwise)
+        factors = rowwise.b2b_specific_attribution(leads, opportunities, touchpoints)
+        combined = rowwise.combine_b2b_attribution_factors(
+            time_weighted=factors['time_weighted_attribution'],
+            quality_weighted=factors['quality_weighted_attribution'],
+            account_based=factors['account_based_attribution'],
+            stage_weighted=factors['stage_progression_attribution'],
+            velocity_impact=factors['pipeline_velocity_attribution'],
+            weights=self.WEIGHTS
+        )
+        
+        engine = ColumnarB2BAttributionEngine(rowwise)
+        analysis = engine.analyze(leads, opportunities, touchpoints)
+        result = engine.reweight(analysis, self.WEIGHTS)
+        
+        assert_same_scores(result['combined_b2b_attribution'], combined)
+        expected_channels = analyzer.analyze_channel_performance(combined, touchpoints)
+        assert set(result['channel_performance']) == set(expected_channels)
+        for channel, expected in expected_channels.items():
+            metrics = result['channel_performance'][channel]
+            assert metrics['touchpoint_count'] == expected['touchpoint_count']
+            assert set(metrics['touchpoint_types']) == set(expected['touchpoint_types'])
+            for key in ('total_attribution', 'total_cost', 'roi', 'cost_per_attribution'):
+                assert metrics[key] == pytest.approx(expected[key], rel=1e-9)
+        
+        expected_alignment = analyzer.analyze_sales_marketing_alignment(combined, touchpoints)
+        for key, value in expected_alignment.items():
+            assert result['sales_marketing_alignment'][key] == pytest.approx(value, rel=1e-9)
+    
+    def test_batch_rows_match_single_reweights(self, b2b_data):
+        """Test that each row of a batch equals reweighting with that weight set alone."""
+        leads, opportunities, touchpoints = b2b_data
+        engine = ColumnarB2BAttributionEngine()
+        analysis = engine.analyze(leads, opportunities, touchpoints)
+        weight_sets = [None, self.WEIGHTS, dict(zip(FACTOR_NAMES, [1.0, 0, 0, 0, 0]))]
+        
+        batch = analysis.reweight_batch(weight_sets, include_touchpoints=True)
+        assert batch['channel_attribution'].shape == (3, len(batch['channels']))
+        
+        for row, weights in enumerate(weight_sets):
+            single = engine.reweight(analysis, weights)
+            np.testing.assert_allclose(
+                batch['combined_attribution'][row], analysis.matrix.combine(weights), rtol=1e-12
+            )
+            for code, channel in enumerate(batch['channels']):
+                assert batch['channel_attribution'][row, code] == pytest.approx(
+                    single['channel_performance'][channel]['total_attribution']
+                )
+            for column, group in enumerate(ALIGNMENT_GROUPS):
+                assert batch['alignment_attribution'][row, column] == pytest.approx(
+                    single['sales_marketing_alignment'][f'{group}_attribution']
+                )
+        
+        as_array = analysis.reweight_batch(batch['weights'])
+        np.testing.assert_allclose(as_array['channel_attribution'], batch['channel_attribution'])
+    
+    def test_specific_attribution_uses_weights(self, b2b_data):
+        """Test that b2b_specific_attribution combines with the given weights."""
+        leads, opportunities, touchpoints = b2b_data
+        engine = ColumnarB2BAttributionEngine()
+        analysis = engine.analyze(leads, opportunities, touchpoints)
+        
+        result = engine.b2b_specific_attribution(leads, opportunities, touchpoints, weights=self.WEIGHTS)
+        
+        assert_same_scores(
+            result['combined_b2b_attribution'],
+            analysis.matrix.to_dict(analysis.matrix.combine(self.WEIGHTS))
+        )
+    
+    def test_grouped_report_of_credit_array(self, b2b_data):
+        """Test analyze_attribution on a credit array against the row-wise analyzer."""
+        leads, opportunities, touchpoints = b2b_data
+        engine = ColumnarB2BAttributionEngine()
+        analyzer = B2BAttributionAnalyzer(engine.engine)
+        columns = TouchpointColumns.from_records(touchpoints)
+        matrix = engine.factor_matrix(
+            LeadColumns.from_records(leads), OpportunityColumns.from_records(opportunities), columns
+        )
+        # Time-decay credit leaves touchpoints without opportunities unattributed
+        credit = matrix.factor('time')
+        
+        report = engine.analyze_attribution(credit, columns)
+        
+        attribution_results = matrix.to_dict(credit)
+        expected = analyzer.analyze_channel_performance(attribution_results, touchpoints)
+        assert set(report['channel_performance']) == set(expected)
+        for channel, metrics in expected.items():
+            grouped = report['channel_performance'][channel]
+            assert grouped['touchpoint_count'] == metrics['touchpoint_count']
+            assert set(grouped['touchpoint_types']) == set(metrics['touchpoint_types'])
+            assert grouped['total_attribution'] == pytest.approx(metrics['total_attribution'], rel=1e-12)
+        expected_alignment = analyzer.analyze_sales_marketing_alignment(attribution_results, touchpoints)
+        for key, value in expected_alignment.items():
+            assert report['sales_marketing_alignment'][key] == pytest.approx(value, rel=1e-12)
+    
+    def test_weight_matrix_shape_checked(self):
+        """Test that weight arrays must have one column per factor."""
+        assert factor_weight_matrix(None).shape == (1, 5)
+        assert factor_weight_matrix(np.ones(5)).shape == (1, 5)
+        with pytest.raises(ValueError, match="5 columns"):
+            factor_weight_matrix(np.ones((2, 4)))
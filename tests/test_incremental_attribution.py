@@ -0,0 +1,86 @@
+"""
+Unit tests for incremental time-decay attribution.
+"""
+import pytest
+import numpy as np
+import pandas as pd
+
+from backend.app.services.attribution_models import TimeDecayAttribution
+from backend.app.services.incremental_attribution import IncrementalTimeDecayScorer
+
+
+HOUR = 3600 * 10**9
+
+
+def recomputed_credit(timestamps, conversion_value, half_life_days=7):
+    """Credit from a full TimeDecayAttribution pass over one journey."""
+    model = TimeDecayAttribution(half_life_days=half_life_days)
+    touchpoints = [
+        {'id': i, 'timestamp': pd.Timestamp(int(t)), 'channel_id': 1}
+        for i, t in enumerate(timestamps)
+    ]
+    attribution = model.calculate_attribution(touchpoints, conversion_value)
+    return np.array([attribution[i] for i in range(len(timestamps))])
+
+
+class TestIncrementalTimeDecayScorer:
+    """Test O(1) appends against full recomputation."""
+    
+    def test_appends_match_recomputation(self):
+        """Test credit after every append, including out-of-order touches."""
+        scorer = IncrementalTimeDecayScorer(half_life_days=7)
+        timestamps = np.array([0, 30, 12, 200, 199, 500]) * HOUR
+        
+        for n, timestamp in enumerate(timestamps, start=1):
+            scorer.append('customer_1', timestamp)
+            credit = scorer.credit(['customer_1'] * n, timestamps[:n], 100.0)
+            np.testing.assert_allclose(credit, recomputed_credit(timestamps[:n], 100.0), rtol=1e-12)
+        
+        assert scorer.journey_state('customer_1')['anchor'] == 500 * HOUR
+        assert scorer.journey_state('customer_1')['touch_count'] == 6
+    
+    def test_batch_append_matches_single_appends(self):
+        """Test that a vectorized ingest batch equals one-by-one appends."""
+        rng = np.random.default_rng(3)
+        keys = rng.choice(['a', 'b', 'c', 'd'], size=200).tolist()
+        timestamps = rng.integers(0, 2000, size=200) * HOUR
+        
+        single = IncrementalTimeDecayScorer(half_life_days=7, initial_capacity=1)
+        for key, timestamp in zip(keys, timestamps):
+            single.append(key, timestamp)
+        
+        batched = IncrementalTimeDecayScorer(half_life_days=7, initial_capacity=1)
+        batched.append_batch(keys[:120], timestamps[:120])
+        batched.append_batch(keys[120:], timestamps[120:])
+        
+        np.testing.assert_allclose(
+            batched.credit(keys, timestamps), single.credit(keys, timestamps), rtol=1e-12
+        )
+        for key in 'abcd':
+            mask = np.array(keys) == key
+            total = batched.credit(np.array(keys)[mask], timestamps[mask]).sum()
+            assert total == pytest.approx(1.0)
+    
+    def test_unknown_journey_gets_zero(self):
+        """Test that touches of unseen journeys receive no credit."""
+        scorer = IncrementalTimeDecayScorer()
+        
+        assert scorer.credit(['missing'], np.array([0])).tolist() == [0.0]
+    
+    def test_save_and_load(self, tmp_path):
+        """Test that persisted state reproduces credit and accepts new touches."""
+        scorer = IncrementalTimeDecayScorer(half_life_days=3)
+        scorer.append_batch(['a', 'b', 'a'], np.array([0, 5, 10]) * HOUR)
+        path = tmp_path / 'decay_state.npz'
+        
+        scorer.save(str(path))
+        loaded = IncrementalTimeDecayScorer.load(str(path))
+        
+        assert loaded.half_life_days == 3
+        assert loaded.journey_keys == ['a', 'b']
+        loaded.append('a', 20 * HOUR)
+        scorer.append('a', 20 * HOUR)
+        timestamps = np.array([0, 10, 20]) * HOUR
+        np.testing.assert_allclose(
+            loaded.credit(['a'] * 3, timestamps), scorer.credit(['a'] * 3, timestamps)
+        )
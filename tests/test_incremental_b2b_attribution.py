@@ -0,0 +1,174 @@
+"""
+Unit tests for incremental per-account B2B attribution.
+"""
+import pytest
+import numpy as np
+from dataclasses import replace
+from datetime import datetime, timedelta
+
+from backend.app.services.attribution_models import JourneyWindow
+from backend.app.services.b2b_attribution_engine import (
+    B2BAttributionAnalyzer,
+    B2BMarketingAttributionEngine,
+    B2BStageType,
+    LeadData,
+    OpportunityData,
+    TouchpointData,
+    TouchpointType
+)
+from backend.app.services.incremental_b2b_attribution import IncrementalB2BAttribution
+from backend.app.services.sharded_b2b_attribution import ATTRIBUTION_KEYS
+
+
+@pytest.fixture
+def b2b_data():
+    """Random B2B data where leads are referenced from several accounts."""
+    rng = np.random.default_rng(23)
+    start = datetime(2023, 1, 1)
+    accounts = [f"account_{i}" for i in range(20)]
+    types = list(TouchpointType)
+    stages = list(B2BStageType)
+    
+    leads = [
+        LeadData(
+            lead_id=f"lead_{i}",
+            account_id=accounts[i % 20],
+            lead_score=int(rng.integers(0, 250)),
+            demographic_score=int(rng.integers(0, 100)),
+            behavioral_score=int(rng.integers(0, 100)),
+            firmographic_score=int(rng.integers(0, 100)),
+            created_date=start,
+            stage=B2BStageType.INTEREST,
+            source="organic_search",
+            lead_quality_tier=str(rng.choice(['A', 'B', 'C', 'D']))
+        )
+        for i in range(40)
+    ]
+    opportunities = [
+        OpportunityData(
+            opportunity_id=f"opp_{i}",
+            account_id=accounts[int(rng.integers(0, 18))],
+            lead_ids=[],
+            stage="Closed Won",
+            probability=1.0,
+            amount=float(rng.uniform(1000, 200000)),
+            created_date=start + timedelta(days=int(rng.integers(0, 200))),
+            close_date=start + timedelta(days=int(rng.integers(200, 600))),
+            sales_cycle_days=int(rng.choice([45, 120, 200, 400])),
+            deal_size_tier=str(rng.choice(['enterprise', 'mid-market', 'smb'])),
+            decision_makers_count=int(rng.integers(0, 5)),
+            influencers_count=int(rng.integers(0, 5))
+        )
+        for i in range(30)
+    ]
+    touchpoints = [
+        TouchpointData(
+            touchpoint_id=f"tp_{i}",
+            lead_id=f"lead_{int(rng.integers(0, 45))}",
+            account_id=accounts[int(rng.integers(0, 20))],
+            timestamp=start + timedelta(days=int(rng.integers(0, 600)), hours=int(rng.integers(0, 24))),
+            touchpoint_type=types[int(rng.integers(0, len(types)))],
+            channel=str(rng.choice(['email', 'search', 'events'])),
+            campaign_id=None,
+            content_id=None,
+            engagement_score=float(rng.uniform(1, 100)),
+            stage_influence=stages[int(rng.integers(0, len(stages)))],
+            cost=float(rng.uniform(0, 500)),
+            is_sales_touch=bool(rng.random() < 0.4),
+            is_marketing_touch=bool(rng.random() < 0.8),
+            sales_rep_id=None
+        )
+        for i in range(400)
+    ]
+    return leads, opportunities, touchpoints
+
+
+def assert_matches_full_run(state, window=None):
+    """Compare the incremental state with a full engine run over its records."""
+    leads, opportunities, touchpoints = state.records()
+    engine = B2BMarketingAttributionEngine()
+    analyzer = B2BAttributionAnalyzer(engine)
+    expected = engine.b2b_specific_attribution(leads, opportunities, touchpoints, window=window)
+    result = state.results()
+    
+    for key in ATTRIBUTION_KEYS:
+        assert set(result[key]) == set(expected[key])
+        for tp_id, value in expected[key].items():
+            assert result[key][tp_id] == pytest.approx(value, rel=1e-9)
+    
+    combined = expected['combined_b2b_attribution']
+    expected_channels = analyzer.analyze_channel_performance(combined, touchpoints)
+    assert set(result['channel_performance']) == set(expected_channels)
+    for channel, metrics in expected_channels.items():
+        merged = result['channel_performance'][channel]
+        assert merged['touchpoint_count'] == metrics['touchpoint_count']
+        assert set(merged['touchpoint_types']) == set(metrics['touchpoint_types'])
+        for key in ('total_attribution', 'total_cost', 'roi'):
+            assert merged[key] == pytest.approx(metrics[key], rel=1e-9)
+    
+    expected_alignment = analyzer.analyze_sales_marketing_alignment(combined, touchpoints)
+    for key, value in expected_alignment.items():
+        assert result['sales_marketing_alignment'][key] == pytest.approx(value, rel=1e-9, abs=1e-9)
+
+
+class TestIncrementalB2BAttribution:
+    """Test incremental updates against full recomputation."""
+    
+    @pytest.mark.parametrize('window', [None, JourneyWindow(lookback_window_days=150, max_touchpoints=5)])
+    def test_initial_load_matches_full_run(self, b2b_data, window):
+        """Test that loading everything at once equals a full run."""
+        state = IncrementalB2BAttribution(window=window)
+        state.update(*b2b_data, watermark=datetime(2024, 1, 1))
+        
+        assert state.watermark == datetime(2024, 1, 1)
+        assert_matches_full_run(state, window)
+    
+    def test_sync_recomputes_only_changed_accounts(self, b2b_data):
+        """Test patched results after upserts, moves and deletions."""
+        leads, opportunities, touchpoints = b2b_data
+        state = IncrementalB2BAttribution()
+        state.update(leads, opportunities, touchpoints)
+        
+        changed_opportunity = replace(opportunities[3], amount=opportunities[3].amount * 2)
+        moved_touchpoint = replace(touchpoints[10], account_id='account_19')
+        new_touchpoint = replace(touchpoints[0], touchpoint_id='tp_new', account_id=opportunities[5].account_id)
+        changed_lead = replace(leads[7], lead_score=5)
+        
+        recomputed = state.update(
+            lead_data=[changed_lead],
+            opportunity_data=[changed_opportunity],
+            touchpoint_data=[moved_touchpoint, new_touchpoint],
+            removed_touchpoint_ids=[touchpoints[20].touchpoint_id]
+        )
+        
+        expected_accounts = {
+            changed_opportunity.account_id,
+            touchpoints[10].account_id,
+            'account_19',
+            new_touchpoint.account_id,
+            touchpoints[20].account_id
+        } | {tp.account_id for tp in touchpoints[1:] if tp.lead_id == 'lead_7'}
+        assert recomputed == expected_accounts
+        assert len(recomputed) < 20
+        assert_matches_full_run(state)
+    
+    def test_opportunity_moved_between_accounts(self, b2b_data):
+        """Test that moving and deleting opportunities keeps both accounts right."""
+        leads, opportunities, touchpoints = b2b_data
+        state = IncrementalB2BAttribution()
+        state.update(leads, opportunities, touchpoints)
+        
+        state.update(opportunity_data=[replace(opportunities[0], account_id='account_18')])
+        assert_matches_full_run(state)
+        
+        state.update(removed_opportunity_ids=[opportunities[1].opportunity_id], removed_lead_ids=['lead_3'])
+        assert_matches_full_run(state)
+    
+    def test_empty_update_is_noop(self, b2b_data):
+        """Test that a sync without changes recomputes nothing."""
+        state = IncrementalB2BAttribution()
+        state.update(*b2b_data)
+        before = state.results()
+        
+        assert state.update() == set()
+        assert state.results()['combined_b2b_attribution'] == before['combined_b2b_attribution']
@@ -0,0 +1,87 @@
+"""
+Unit tests for multi-conversion journey splitting.
+"""
+import pytest
+import numpy as np
+
+from backend.app.services.attribution_models import LinearAttribution, TimeDecayAttribution
+from backend.app.services.journey_segmentation import split_journeys_by_conversion
+
+
+DAY = 24 * 3600 * 10**9
+
+
+def nested_loop_assignment(touch_customers, touch_days, conversion_customers, conversion_days, window):
+    """Reference join: the next conversion of the same customer, if within the window."""
+    assigned = []
+    for customer, day in zip(touch_customers, touch_days):
+        following = [
+            (conversion_day, j)
+            for j, (conversion_customer, conversion_day) in enumerate(zip(conversion_customers, conversion_days))
+            if conversion_customer == customer and conversion_day >= day
+        ]
+        if following and min(following)[0] - day <= window:
+            assigned.append(min(following)[1])
+        else:
+            assigned.append(-1)
+    return assigned
+
+
+class TestSplitJourneysByConversion:
+    """Test the as-of join of touchpoints to following conversions."""
+    
+    def test_matches_nested_loop_join(self):
+        """Test assignment against a brute-force nested loop."""
+        rng = np.random.default_rng(8)
+        touch_customers = rng.choice(['a', 'b', 'c', 'd'], size=300)
+        touch_days = rng.integers(0, 365, size=300)
+        conversion_customers = rng.choice(['a', 'b', 'c', 'e'], size=40)
+        conversion_days = rng.choice(365, size=40, replace=False)
+        
+        journeys = split_journeys_by_conversion(
+            touch_customers, touch_days * DAY,
+            conversion_customers, conversion_days * DAY,
+            attribution_window_days=30
+        )
+        
+        expected = nested_loop_assignment(
+            touch_customers.tolist(), touch_days.tolist(),
+            conversion_customers.tolist(), conversion_days.tolist(), 30
+        )
+        assert journeys.assigned_conversion().tolist() == expected
+        assert journeys.journey_count == 40
+    
+    def test_journeys_sorted_by_time(self):
+        """Test that each conversion's touchpoints are laid out in time order."""
+        journeys = split_journeys_by_conversion(
+            touchpoint_customers=['a', 'a', 'a', 'a'],
+            touchpoint_times=np.array([5, 1, 12, 11]) * DAY,
+            conversion_customers=['a', 'a'],
+            conversion_times=np.array([20, 10]) * DAY
+        )
+        
+        assert journeys.offsets.tolist() == [0, 2, 4]
+        assert journeys.touchpoint_rows.tolist() == [3, 2, 1, 0]
+    
+    def test_attribute_each_conversion(self):
+        """Test that each conversion's value is spread over its own touchpoints only."""
+        journeys = split_journeys_by_conversion(
+            touchpoint_customers=['a', 'a', 'a', 'b', 'b'],
+            touchpoint_times=np.array([0, 1, 3, 0, 9]) * DAY,
+            conversion_customers=['a', 'a', 'b'],
+            conversion_times=np.array([2, 4, 5]) * DAY,
+            conversion_values=np.array([100.0, 50.0, 10.0])
+        )
+        
+        timestamps = np.array([0, 1, 3, 0, 9]) * DAY
+        
+        credit = journeys.attribute(LinearAttribution(), timestamps, np.zeros(5))
+        
+        np.testing.assert_allclose(credit, [50.0, 50.0, 50.0, 10.0, 0.0])
+        decay = journeys.attribute(TimeDecayAttribution(), timestamps, np.zeros(5))
+        assert decay.sum() == pytest.approx(160.0)
+    
+    def test_length_mismatch(self):
+        """Test that misaligned inputs are rejected."""
+        with pytest.raises(ValueError):
+            split_journeys_by_conversion(['a'], np.array([0, 1]), ['a'], np.array([2]))
@@ -0,0 +1,152 @@
+"""
+Unit tests for Markov-chain removal-effect attribution.
+"""
+import pytest
+import numpy as np
+import pandas as pd
+
+from backend.app.services.markov_attribution import MarkovChainAttributionEngine
+from backend.app.services.attribution_models import DataDrivenAttribution
+from config.settings import get_attribution_settings
+
+
+class TestMarkovChainAttributionEngine:
+    """Test the Markov transition matrix and removal effects."""
+    
+    @pytest.fixture
+    def engine(self):
+        """Engine with three channels: a -> b converts, a alone and c alone do not."""
+        engine = MarkovChainAttributionEngine(['a', 'b', 'c'])
+        engine.partial_fit(
+            offsets=np.array([0, 2, 3, 4]),
+            channel_codes=np.array([0, 1, 0, 2]),
+            converted=np.array([True, False, False])
+        )
+        return engine
+    
+    def test_transition_counts(self, engine):
+        """Test that start, inner and terminal transitions are counted."""
+        counts = engine.transition_counts.toarray()
+        
+        # start -> a twice, start -> c once
+        assert counts[0, 3] == 2
+        assert counts[0, 5] == 1
+        # a -> b, b -> conversion, a -> null, c -> null
+        assert counts[3, 4] == 1
+        assert counts[4, 1] == 1
+        assert counts[3, 2] == 1
+        assert counts[5, 2] == 1
+        assert engine.journey_count == 3
+        assert engine.conversion_count == 1
+    
+    def test_removal_effects(self, engine):
+        """Test removal effects of essential and irrelevant channels."""
+        removal_effects = engine.solve()
+        
+        assert engine.conversion_probability == pytest.approx(1 / 3)
+        np.testing.assert_allclose(removal_effects, [1.0, 1.0, 0.0], atol=1e-12)
+    
+    def test_chunked_fit_matches_single_pass(self):
+        """Test that accumulating chunks gives the same counts as one pass."""
+        rng = np.random.default_rng(7)
+        lengths = rng.integers(1, 8, size=500)
+        offsets = np.concatenate([[0], np.cumsum(lengths)])
+        codes = rng.integers(0, 4, size=offsets[-1])
+        converted = rng.random(500) < 0.3
+        
+        single = MarkovChainAttributionEngine(['a', 'b', 'c', 'd'])
+        single.partial_fit(offsets, codes, converted)
+        
+        chunked = MarkovChainAttributionEngine(['a', 'b', 'c', 'd'])
+        for start in range(0, 500, 128):
+            stop = min(start + 128, 500)
+            chunk_offsets = offsets[start:stop + 1] - offsets[start]
+            chunked.partial_fit(
+                chunk_offsets, codes[offsets[start]:offsets[stop]], converted[start:stop]
+            )
+        
+        assert (single.transition_counts != chunked.transition_counts).nnz == 0
+        np.testing.assert_allclose(single.solve(), chunked.solve())
+    
+    def test_save_and_load(self, engine, tmp_path):
+        """Test that a persisted engine reloads with the same removal effects."""
+        engine.solve()
+        path = tmp_path / 'markov.npz'
+        engine.save(str(path))
+        
+        loaded = MarkovChainAttributionEngine.load(str(path))
+        
+        assert loaded.channel_names == engine.channel_names
+        assert loaded.is_fitted
+        np.testing.assert_allclose(loaded.removal_effects, engine.removal_effects)
+        assert loaded.channel_weights() == engine.channel_weights()
+    
+    def test_save_without_npz_suffix(self, engine, tmp_path):
+        """Test that a path without the .npz suffix is written and read back as given."""
+        engine.solve()
+        path = tmp_path / 'markov_model'
+        engine.save(str(path))
+        
+        assert path.exists()
+        loaded = MarkovChainAttributionEngine.load(str(path))
+        np.testing.assert_allclose(loaded.removal_effects, engine.removal_effects)
+    
+    def test_unfitted_channel_weights(self):
+        """Test that channel weights require a fitted engine."""
+        with pytest.raises(ValueError):
+            MarkovChainAttributionEngine(['a']).channel_weights()
+
+
+class TestDataDrivenMarkovFit:
+    """Test fitting DataDrivenAttribution from historical journeys."""
+    
+    def test_fit_replaces_prior_weights(self):
+        """Test that fitted removal effects drive per-journey scoring."""
+        base = pd.Timestamp('2024-01-01').value
+        day = 24 * 3600 * 10**9
+        # Journeys are given out of time order to exercise sorting
+        chunk = (
+            np.array([0, 2, 3, 4]),
+            np.array([base + day, base, base, base]),
+            np.array([1, 0, 0, 2]),
+            np.array([True, False, False])
+        )
+        model = DataDrivenAttribution().fit([chunk], channel_names=['email', 'social', 'display'])
+        
+        assert model.channel_weights['display'] == 0.0
+        assert model.channel_weights['email'] == pytest.approx(1.0)
+        
+        touchpoints = [
+            {'id': 'tp_1', 'timestamp': pd.Timestamp(base), 'channel_id': 'ch_1', 'channel_name': 'email'},
+            {'id': 'tp_2', 'timestamp': pd.Timestamp(base + day), 'channel_id': 'ch_2', 'channel_name': 'display'}
+        ]
+        attribution = model.calculate_attribution(touchpoints, 100.0)
+        
+        assert attribution['tp_1'] == pytest.approx(100.0)
+        assert attribution['tp_2'] == 0.0
+    
+    def test_unfitted_model_uses_priors(self):
+        """Test that an unfitted model keeps the prior channel weights."""
+        model = DataDrivenAttribution()
+        
+        assert model.markov_engine is None
+        assert model.channel_weights['direct'] == 1.3
+    
+    def test_configured_model_loaded_once(self, tmp_path, monkeypatch):
+        """Test that models built from the configured path share one loaded engine."""
+        engine = MarkovChainAttributionEngine(['email', 'social'])
+        engine.partial_fit(np.array([0, 2, 3]), np.array([0, 1, 1]), np.array([True, False]))
+        engine.solve()
+        path = tmp_path / 'markov_model'
+        engine.save(str(path))
+        monkeypatch.setattr(get_attribution_settings(), 'data_driven_model_path', str(path))
+        
+        first = DataDrivenAttribution()
+        second = DataDrivenAttribution()
+        
+        assert first.markov_engine is second.markov_engine
+        assert first.channel_weights == engine.channel_weights()
+        
+        fitted = first.fit([(np.array([0, 1]), np.array([0]), np.array([0]), np.array([True]))], ['social'])
+        assert fitted.markov_engine is not second.markov_engine
+        assert second.markov_engine.journey_count == engine.journey_count
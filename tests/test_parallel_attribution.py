@@ -0,0 +1,85 @@
+"""
+Unit tests for process-pool parallel attribution.
+"""
+import pytest
+import numpy as np
+
+from backend.app.services.attribution_models import AttributionModelFactory, JourneyWindow
+from backend.app.services.parallel_attribution import ParallelAttributionExecutor
+
+
+@pytest.fixture
+def columnar_batch():
+    """Random journeys in columnar layout with campaigns on some touchpoints."""
+    rng = np.random.default_rng(5)
+    lengths = rng.integers(1, 9, size=300)
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    touchpoint_count = int(offsets[-1])
+    return {
+        'offsets': offsets,
+        'timestamps': rng.integers(0, 30 * 86400, size=touchpoint_count) * 10**9,
+        'channel_codes': rng.integers(0, 5, size=touchpoint_count),
+        'conversion_values': rng.uniform(10.0, 500.0, size=len(lengths)),
+        'campaign_codes': np.where(rng.random(touchpoint_count) < 0.3, -1, rng.integers(0, 7, size=touchpoint_count))
+    }
+
+
+class TestParallelAttributionExecutor:
+    """Test sharded attribution against a single-process run."""
+    
+    MODELS = ['linear', 'time_decay', 'u_shaped', 'w_shaped']
+    
+    def test_shards_cover_all_journeys(self, columnar_batch):
+        """Test that shards are contiguous, whole-journey and non-empty."""
+        executor = ParallelAttributionExecutor(models=['linear'], max_workers=1, chunk_size=100)
+        
+        shards = executor.plan_shards(columnar_batch['offsets'])
+        
+        assert shards[0].journey_start == 0
+        assert shards[-1].journey_end == len(columnar_batch['offsets']) - 1
+        for previous, shard in zip(shards[:-1], shards[1:]):
+            assert previous.journey_end == shard.journey_start
+        assert all(shard.journey_end > shard.journey_start for shard in shards)
+        assert len(shards) > 1
+    
+    @pytest.mark.parametrize('chunk_size', [37, 200, 5000])
+    def test_matches_single_process(self, columnar_batch, chunk_size):
+        """Test that pooled results are bit-identical to whole-batch aggregates for any chunking."""
+        executor = ParallelAttributionExecutor(models=self.MODELS, max_workers=2, chunk_size=chunk_size)
+        
+        results = executor.run(**columnar_batch)
+        
+        for model_name in self.MODELS:
+            expected = AttributionModelFactory.create_model(model_name).calculate_attribution_aggregates(
+                **columnar_batch, channel_count=5, campaign_count=7
+            )
+            np.testing.assert_array_equal(results[model_name]['channel'], expected['channel'])
+            np.testing.assert_array_equal(results[model_name]['campaign'], expected['campaign'])
+    
+    def test_windowed_matches_single_process(self, columnar_batch):
+        """Test that windows cutting journeys inside shards still match a single-process run."""
+        window = JourneyWindow(lookback_window_days=10, max_touchpoints=4)
+        executor = ParallelAttributionExecutor(models=self.MODELS, max_workers=2, chunk_size=120, window=window)
+        
+        results = executor.run(**columnar_batch)
+        
+        for model_name in self.MODELS:
+            expected = AttributionModelFactory.create_model(model_name).calculate_attribution_aggregates(
+                **columnar_batch, channel_count=5, campaign_count=7, window=window
+            )
+            np.testing.assert_array_equal(results[model_name]['channel'], expected['channel'])
+            np.testing.assert_array_equal(results[model_name]['campaign'], expected['campaign'])
+    
+    def test_deterministic_across_worker_counts(self, columnar_batch):
+        """Test bit-identical results for any number of workers."""
+        serial = ParallelAttributionExecutor(models=self.MODELS, max_workers=1, chunk_size=150).run(**columnar_batch)
+        pooled = ParallelAttributionExecutor(models=self.MODELS, max_workers=3, chunk_size=150).run(**columnar_batch)
+        
+        for model_name in self.MODELS:
+            assert np.array_equal(serial[model_name]['channel'], pooled[model_name]['channel'])
+            assert np.array_equal(serial[model_name]['campaign'], pooled[model_name]['campaign'])
+    
+    def test_invalid_chunk_size(self):
+        """Test that a non-positive chunk size is rejected."""
+        with pytest.raises(ValueError):
+            ParallelAttributionExecutor(models=['linear'], chunk_size=-1)
@@ -0,0 +1,121 @@
+"""
+Unit tests for the conversion-path trie.
+"""
+import pytest
+import numpy as np
+
+from backend.app.services.path_trie import ConversionPathTrie
+
+
+CHANNELS = ['search', 'email', 'social', 'direct']
+
+
+def columnar(paths):
+    """Offsets and channel codes for a list of channel-name paths."""
+    offsets = np.concatenate([[0], np.cumsum([len(p) for p in paths])])
+    codes = np.array([CHANNELS.index(c) for p in paths for c in p], dtype=np.int64)
+    return offsets, codes
+
+
+@pytest.fixture
+def paths():
+    return [
+        ['search', 'email', 'direct'],
+        ['search', 'email', 'direct'],
+        ['search', 'email'],
+        ['search', 'social'],
+        ['email', 'direct'],
+        ['search', 'email', 'direct'],
+        ['social']
+    ]
+
+
+@pytest.fixture
+def trie(paths):
+    offsets, codes = columnar(paths)
+    trie = ConversionPathTrie()
+    trie.add_journeys(
+        offsets, codes, CHANNELS,
+        converted=np.array([1, 1, 0, 1, 0, 0, 1]),
+        conversion_values=np.array([100.0, 50.0, 0.0, 20.0, 0.0, 0.0, 10.0])
+    )
+    return trie
+
+
+class TestConversionPathTrie:
+    """Test trie construction and path queries."""
+    
+    def test_prefix_statistics(self, trie):
+        """Test totals for a prefix and for the whole tree."""
+        search_email = trie.prefix_statistics(['search', 'email'])
+        
+        assert search_email['journeys'] == 4
+        assert search_email['conversions'] == 2
+        assert search_email['value'] == 150.0
+        assert search_email['conversion_rate'] == pytest.approx(0.5)
+        assert trie.prefix_statistics()['journeys'] == 7
+        assert trie.prefix_statistics(['direct'])['journeys'] == 0
+    
+    def test_top_paths(self, trie):
+        """Test the most frequent and most valuable complete paths."""
+        by_journeys = trie.top_paths(k=2)
+        by_value = trie.top_paths(k=1, by='value')
+        
+        assert by_journeys[0]['path'] == ['search', 'email', 'direct']
+        assert by_journeys[0]['journeys'] == 3
+        assert len(by_journeys) == 2
+        assert by_value[0]['value'] == 150.0
+        assert [p['path'] for p in trie.top_paths(k=10, prefix=['search'])] == [
+            ['search', 'email', 'direct'], ['search', 'email'], ['search', 'social']
+        ]
+    
+    def test_drill_down(self, trie):
+        """Test one-step extensions of a prefix ordered by journeys."""
+        children = trie.drill_down(['search'])
+        
+        assert [c['path'] for c in children] == [['search', 'email'], ['search', 'social']]
+        assert [c['journeys'] for c in children] == [4, 1]
+    
+    def test_length_distribution(self, trie):
+        """Test journey counts by path length, overall and under a prefix."""
+        assert trie.length_distribution().tolist() == [0, 1, 3, 3]
+        assert trie.length_distribution(['search']).tolist() == [0, 0, 2, 3]
+    
+    def test_streaming_chunks_and_unsorted_input(self, paths):
+        """Test that chunked inserts with timestamps equal one sorted insert."""
+        offsets, codes = columnar(paths)
+        whole = ConversionPathTrie().add_journeys(offsets, codes, CHANNELS)
+        
+        chunked = ConversionPathTrie()
+        for chunk in (paths[:3], paths[3:]):
+            chunk_offsets, chunk_codes = columnar(chunk)
+            # Reverse each journey and let the timestamps restore time order
+            lengths = np.diff(chunk_offsets)
+            timestamps = np.concatenate([np.arange(n)[::-1] for n in lengths])
+            reversed_codes = np.concatenate([
+                chunk_codes[s:e][::-1] for s, e in zip(chunk_offsets[:-1], chunk_offsets[1:])
+            ])
+            chunked.add_journeys(chunk_offsets, reversed_codes, CHANNELS, timestamps=timestamps)
+        
+        def by_path(trie):
+            return {tuple(p['path']): p for p in trie.top_paths(k=10)}
+        
+        assert by_path(chunked) == by_path(whole)
+        assert chunked.node_count == whole.node_count
+    
+    def test_save_and_load(self, trie, tmp_path):
+        """Test that a persisted trie answers the same queries."""
+        path = tmp_path / 'paths.npz'
+        
+        trie.save(str(path))
+        loaded = ConversionPathTrie.load(str(path))
+        
+        assert loaded.top_paths(k=5, by='conversions') == trie.top_paths(k=5, by='conversions')
+        assert loaded.drill_down(['search']) == trie.drill_down(['search'])
+        loaded.add_journeys(*columnar([['search', 'email']]), CHANNELS)
+        assert loaded.prefix_statistics(['search', 'email'])['journeys'] == 5
+    
+    def test_unknown_statistic(self, trie):
+        """Test that unsupported ranking statistics are rejected."""
+        with pytest.raises(ValueError):
+            trie.top_paths(by='revenue')
@@ -0,0 +1,158 @@
+"""
+Unit tests for Shapley-value attribution.
+"""
+import pytest
+import numpy as np
+from datetime import datetime
+
+from backend.app.services.shapley_attribution import CoalitionStatistics, ShapleyValueEngine
+from backend.app.services.attribution_models import (
+    AttributionModelFactory,
+    MultiModelAttributionEngine,
+    ShapleyAttribution
+)
+
+
+def random_journeys(channel_count, journey_count=2000, seed=3):
+    """Random journeys where conversion probability grows with channel 0 and 1."""
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(1, 5, size=journey_count)
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    codes = rng.integers(0, channel_count, size=offsets[-1])
+    journey_index = np.repeat(np.arange(journey_count), lengths)
+    boost = np.bincount(journey_index, weights=(codes < 2).astype(float), minlength=journey_count)
+    converted = rng.random(journey_count) < 0.1 + 0.2 * np.minimum(boost, 2)
+    return offsets, codes, converted
+
+
+class TestCoalitionStatistics:
+    """Test aggregation of coalition counts."""
+    
+    def test_duplicate_channels_form_one_coalition(self):
+        """Test that repeated channels in a journey collapse into a set."""
+        statistics = CoalitionStatistics(['a', 'b'])
+        statistics.partial_fit(
+            offsets=np.array([0, 3, 4]),
+            channel_codes=np.array([0, 0, 1, 1]),
+            converted=np.array([True, False])
+        )
+        
+        members, journeys, conversions = statistics.coalition_table()
+        
+        assert statistics.coalition_count == 2
+        table = {tuple(row): (j, c) for row, j, c in zip(members.tolist(), journeys, conversions)}
+        assert table[(True, True)] == (1, 1)
+        assert table[(False, True)] == (1, 0)
+    
+    def test_chunks_accumulate(self):
+        """Test that the same coalition from two chunks is merged."""
+        statistics = CoalitionStatistics(['a'])
+        for converted in (True, False):
+            statistics.partial_fit(np.array([0, 1]), np.array([0]), np.array([converted]))
+        
+        _, journeys, conversions = statistics.coalition_table()
+        
+        assert journeys.tolist() == [2]
+        assert conversions.tolist() == [1]
+    
+    @pytest.mark.parametrize('code', [-1, 2, 7])
+    def test_unregistered_channel_rejected(self, code):
+        """Test that codes outside the registered channels raise instead of shrinking the coalition."""
+        statistics = CoalitionStatistics(['a', 'b'])
+        
+        with pytest.raises(ValueError, match="outside the 2 registered channels"):
+            statistics.partial_fit(np.array([0, 2]), np.array([0, code]), np.array([True]))
+        assert statistics.coalition_count == 0
+
+
+class TestShapleyValueEngine:
+    """Test exact and sampled Shapley computation."""
+    
+    def test_exact_two_channels(self):
+        """Test exact values against a hand-computed two-channel game."""
+        statistics = CoalitionStatistics(['a', 'b'])
+        # {a}: 1/4 convert, {b}: 2/4 convert, {a, b}: 2/2 convert
+        statistics.partial_fit(
+            offsets=np.array([0, 1, 2, 3, 4, 5, 6, 7, 8, 10, 12]),
+            channel_codes=np.array([0, 0, 0, 0, 1, 1, 1, 1, 0, 1, 0, 1]),
+            converted=np.array([1, 0, 0, 0, 1, 1, 0, 0, 1, 1], dtype=bool)
+        )
+        engine = ShapleyValueEngine()
+        
+        values = engine.exact_values(statistics)
+        
+        worth_a = 1 / 4
+        worth_b = 2 / 4
+        worth_ab = 5 / 10
+        expected_a = 0.5 * worth_a + 0.5 * (worth_ab - worth_b)
+        expected_b = 0.5 * worth_b + 0.5 * (worth_ab - worth_a)
+        np.testing.assert_allclose(values, [expected_a, expected_b])
+        assert values.sum() == pytest.approx(worth_ab)
+    
+    def test_sampled_matches_exact(self):
+        """Test that permutation sampling lands within the error bound of exact values."""
+        statistics = CoalitionStatistics([f'ch_{i}' for i in range(6)])
+        statistics.partial_fit(*random_journeys(6))
+        engine = ShapleyValueEngine(error_tolerance=0.002, max_permutations=20000)
+        
+        exact = engine.exact_values(statistics)
+        sampled, standard_error, drawn = engine.sampled_values(statistics)
+        
+        assert drawn <= 20000
+        assert np.all(np.abs(sampled - exact) <= 0.004)
+        # Every permutation telescopes to the grand coalition's worth
+        assert sampled.sum() == pytest.approx(exact.sum())
+    
+    def test_sampling_is_reproducible(self):
+        """Test that a fixed seed gives identical estimates."""
+        statistics = CoalitionStatistics([f'ch_{i}' for i in range(20)])
+        statistics.partial_fit(*random_journeys(20, journey_count=500))
+        
+        first, _, _ = ShapleyValueEngine(max_permutations=200).sampled_values(statistics)
+        second, _, _ = ShapleyValueEngine(max_permutations=200).sampled_values(statistics)
+        
+        np.testing.assert_array_equal(first, second)
+    
+    def test_mode_selection(self):
+        """Test that large channel sets switch to sampling."""
+        statistics = CoalitionStatistics([f'ch_{i}' for i in range(20)])
+        statistics.partial_fit(*random_journeys(20, journey_count=500))
+        engine = ShapleyValueEngine(exact_max_channels=12, max_permutations=128)
+        
+        values = engine.calculate(statistics)
+        
+        assert values.shape == (20,)
+
+
+class TestShapleyAttribution:
+    """Test the shapley factory model."""
+    
+    def test_registered_in_factory(self):
+        """Test that the factory creates the Shapley model."""
+        model = AttributionModelFactory.create_model('shapley')
+        
+        assert isinstance(model, ShapleyAttribution)
+        assert model.name == 'shapley'
+    
+    def test_excluded_from_default_models(self):
+        """Test that the unfitted model is not created or compared by default."""
+        assert 'shapley' in AttributionModelFactory.get_available_models()
+        assert 'shapley' not in AttributionModelFactory.get_default_models()
+        assert 'shapley' not in AttributionModelFactory.create_all_models()
+        assert 'shapley' not in MultiModelAttributionEngine().models
+    
+    def test_fitted_weights_drive_credit(self):
+        """Test that channels with higher Shapley value receive more credit."""
+        names = ['paid_search', 'email', 'display', 'social']
+        model = ShapleyAttribution().fit([random_journeys(4)], channel_names=names)
+        
+        assert model.shapley_values['paid_search'] > model.shapley_values['display']
+        
+        touchpoints = [
+            {'id': 'tp_1', 'timestamp': datetime(2024, 1, 1), 'channel_id': 'ch_1', 'channel_name': 'paid_search'},
+            {'id': 'tp_2', 'timestamp': datetime(2024, 1, 2), 'channel_id': 'ch_2', 'channel_name': 'display'}
+        ]
+        attribution = model.calculate_attribution(touchpoints, 100.0)
+        
+        assert attribution['tp_1'] > attribution['tp_2']
+        assert sum(attribution.values()) == pytest.approx(100.0)
@@ -0,0 +1,152 @@
+"""
+Unit tests for account-sharded B2B attribution.
+"""
+import pytest
+import numpy as np
+from datetime import datetime, timedelta
+
+from backend.app.services.attribution_models import JourneyWindow
+from backend.app.services.b2b_attribution_engine import (
+    B2BAttributionAnalyzer,
+    B2BMarketingAttributionEngine,
+    B2BStageType,
+    LeadData,
+    OpportunityData,
+    TouchpointData,
+    TouchpointType
+)
+from backend.app.services.sharded_b2b_attribution import (
+    ATTRIBUTION_KEYS,
+    ShardedB2BAttributionExecutor,
+    account_shard
+)
+
+
+@pytest.fixture
+def b2b_data():
+    """Random B2B data where leads are referenced from several accounts."""
+    rng = np.random.default_rng(21)
+    start = datetime(2023, 1, 1)
+    accounts = [f"account_{i}" for i in range(30)]
+    types = list(TouchpointType)
+    stages = list(B2BStageType)
+    
+    leads = [
+        LeadData(
+            lead_id=f"lead_{i % 50}",
+            account_id=accounts[i % 30],
+            lead_score=int(rng.integers(0, 250)),
+            demographic_score=int(rng.integers(0, 100)),
+            behavioral_score=int(rng.integers(0, 100)),
+            firmographic_score=int(rng.integers(0, 100)),
+            created_date=start,
+            stage=B2BStageType.INTEREST,
+            source="organic_search",
+            lead_quality_tier=str(rng.choice(['A', 'B', 'C', 'D']))
+        )
+        for i in range(60)
+    ]
+    opportunities = [
+        OpportunityData(
+            opportunity_id=f"opp_{i}",
+            account_id=accounts[int(rng.integers(0, 25))],
+            lead_ids=[],
+            stage="Closed Won",
+            probability=1.0,
+            amount=float(rng.uniform(1000, 200000)),
+            created_date=start + timedelta(days=int(rng.integers(0, 200))),
+            close_date=start + timedelta(days=int(rng.integers(200, 600))),
+            sales_cycle_days=int(rng.choice([45, 120, 200, 400])),
+            deal_size_tier=str(rng.choice(['enterprise', 'mid-market', 'smb'])),
+            decision_makers_count=int(rng.integers(0, 5)),
+            influencers_count=int(rng.integers(0, 5))
+        )
+        for i in range(40)
+    ]
+    touchpoints = [
+        TouchpointData(
+            touchpoint_id=f"tp_{i}",
+            lead_id=f"lead_{int(rng.integers(0, 55))}",
+            account_id=accounts[int(rng.integers(0, 30))],
+            timestamp=start + timedelta(days=int(rng.integers(0, 600)), hours=int(rng.integers(0, 24))),
+            touchpoint_type=types[int(rng.integers(0, len(types)))],
+            channel=str(rng.choice(['email', 'search', 'events'])),
+            campaign_id=None,
+            content_id=None,
+            engagement_score=float(rng.uniform(1, 100)),
+            stage_influence=stages[int(rng.integers(0, len(stages)))],
+            cost=float(rng.uniform(0, 500)),
+            is_sales_touch=bool(rng.random() < 0.4),
+            is_marketing_touch=bool(rng.random() < 0.8),
+            sales_rep_id=None
+        )
+        for i in range(500)
+    ]
+    return leads, opportunities, touchpoints
+
+
+class TestShardedB2BAttributionExecutor:
+    """Test account-sharded attribution against the single-process engine."""
+    
+    def test_partition_keeps_accounts_together(self, b2b_data):
+        """Test that each account lands in exactly one shard with the leads it needs."""
+        leads, opportunities, touchpoints = b2b_data
+        executor = ShardedB2BAttributionExecutor(max_workers=1, shard_count=7)
+        
+        shards = executor.partition(leads, opportunities, touchpoints)
+        
+        assert sum(len(shard.touchpoints) for shard in shards) == len(touchpoints)
+        for shard in shards:
+            shard_index = account_shard(shard.touchpoints[0].account_id, 7)
+            assert all(account_shard(tp.account_id, 7) == shard_index for tp in shard.touchpoints)
+            assert all(account_shard(opp.account_id, 7) == shard_index for opp in shard.opportunities)
+            lead_ids = {lead.lead_id for lead in shard.leads}
+            referenced = {tp.lead_id for tp in shard.touchpoints}
+            assert lead_ids <= referenced
+    
+    @pytest.mark.parametrize('window', [None, JourneyWindow(lookback_window_days=150, max_touchpoints=5)])
+    def test_matches_single_process(self, b2b_data, window):
+        """Test per-touchpoint attribution is identical and totals match."""
+        leads, opportunities, touchpoints = b2b_data
+        engine = B2BMarketingAttributionEngine()
+        analyzer = B2BAttributionAnalyzer(engine)
+        
+        expected = engine.b2b_specific_attribution(leads, opportunities, touchpoints, window=window)
+        result = ShardedB2BAttributionExecutor(engine, max_workers=2, shard_count=5, window=window).run(
+            leads, opportunities, touchpoints
+        )
+        
+        for key in ATTRIBUTION_KEYS:
+            assert result[key] == expected[key]
+        assert result['attribution_summary']['total_attribution_value'] == pytest.approx(
+            expected['attribution_summary']['total_attribution_value'], rel=1e-12
+        )
+        
+        combined = expected['combined_b2b_attribution']
+        kept = [tp for tp in touchpoints if tp.touchpoint_id in combined]
+        expected_channels = analyzer.analyze_channel_performance(combined, kept)
+        assert set(result['channel_performance']) == set(expected_channels)
+        for channel, metrics in expected_channels.items():
+            merged = result['channel_performance'][channel]
+            assert merged['touchpoint_count'] == metrics['touchpoint_count']
+            assert set(merged['touchpoint_types']) == set(metrics['touchpoint_types'])
+            assert merged['total_attribution'] == pytest.approx(metrics['total_attribution'], rel=1e-12)
+            assert merged['roi'] == pytest.approx(metrics['roi'], rel=1e-9)
+        
+        expected_alignment = analyzer.analyze_sales_marketing_alignment(combined, kept)
+        for key, value in expected_alignment.items():
+            assert result['sales_marketing_alignment'][key] == pytest.approx(value, rel=1e-9)
+    
+    def test_deterministic_across_worker_counts(self, b2b_data):
+        """Test identical merged output for any number of workers."""
+        serial = ShardedB2BAttributionExecutor(max_workers=1, shard_count=6).run(*b2b_data)
+        pooled = ShardedB2BAttributionExecutor(max_workers=3, shard_count=6).run(*b2b_data)
+        
+        assert serial['combined_b2b_attribution'] == pooled['combined_b2b_attribution']
+        assert serial['channel_performance'] == pooled['channel_performance']
+        assert serial['sales_marketing_alignment'] == pooled['sales_marketing_alignment']
+    
+    def test_invalid_shard_count(self):
+        """Test that a non-positive shard count is rejected."""
+        with pytest.raises(ValueError):
+            ShardedB2BAttributionExecutor(max_workers=1, shard_count=-1)
@@ -0,0 +1,103 @@
+"""
+Unit tests for the streaming attribution runner.
+"""
+import pytest
+import numpy as np
+import pandas as pd
+
+from backend.app.services.attribution_models import AttributionModelFactory, JourneyWindow
+from backend.app.services.streaming_attribution import StreamingAttributionRunner
+
+
+@pytest.fixture
+def grouped_touchpoints():
+    """Touchpoint rows grouped by customer, with conversion value on the last row."""
+    rng = np.random.default_rng(11)
+    rows = []
+    for c in range(40):
+        length = int(rng.integers(1, 7))
+        for i in range(length):
+            rows.append({
+                'id': f'tp_{c}_{i}',
+                'customer_id': f'cust_{c}',
+                'timestamp': pd.Timestamp('2024-01-01') + pd.Timedelta(hours=int(rng.integers(0, 500))),
+                'channel_id': f'ch_{int(rng.integers(0, 4))}',
+                'campaign_id': None if i % 3 == 0 else f'camp_{c % 5}',
+                'conversion_value': 100.0 if i == length - 1 else 0.0
+            })
+    return rows
+
+
+def expected_channel_credit(rows, model_name):
+    """Channel totals computed through the per-journey API."""
+    model = AttributionModelFactory.create_model(model_name)
+    df = pd.DataFrame(rows)
+    totals = {}
+    for _, journey in df.groupby('customer_id', sort=False):
+        touchpoints = journey.to_dict('records')
+        attribution = model.calculate_attribution(touchpoints, journey['conversion_value'].sum())
+        for tp in touchpoints:
+            totals[tp['channel_id']] = totals.get(tp['channel_id'], 0.0) + attribution[tp['id']]
+    return totals
+
+
+class TestStreamingAttributionRunner:
+    """Test streaming attribution with bounded batches."""
+    
+    @pytest.mark.parametrize('batch_size', [1, 7, 1000])
+    @pytest.mark.parametrize('model_name', ['linear', 'time_decay', 'u_shaped'])
+    def test_matches_per_journey_totals(self, grouped_touchpoints, batch_size, model_name):
+        """Test that journeys split across batches are scored as one journey."""
+        runner = StreamingAttributionRunner(model_name=model_name, batch_size=batch_size)
+        
+        result = runner.run(iter(grouped_touchpoints))
+        
+        expected = expected_channel_credit(grouped_touchpoints, model_name)
+        assert result.journey_count == 40
+        assert result.touchpoint_count == len(grouped_touchpoints)
+        assert result.total_conversion_value == pytest.approx(4000.0)
+        for channel, credit in expected.items():
+            assert result.channel_credit[channel] == pytest.approx(credit)
+    
+    def test_campaign_aggregates_skip_missing(self, grouped_touchpoints):
+        """Test that rows without a campaign are left out of campaign totals."""
+        result = StreamingAttributionRunner(batch_size=16).run(iter(grouped_touchpoints))
+        
+        assert None not in result.campaign_credit
+        assert sum(result.campaign_touchpoints.values()) == sum(
+            1 for row in grouped_touchpoints if row['campaign_id'] is not None
+        )
+    
+    def test_run_frames(self, grouped_touchpoints):
+        """Test that DataFrame chunks give the same totals as row streaming."""
+        df = pd.DataFrame(grouped_touchpoints)
+        frames = (df.iloc[i:i + 9] for i in range(0, len(df), 9))
+        
+        from_frames = StreamingAttributionRunner().run_frames(frames)
+        from_rows = StreamingAttributionRunner().run(iter(grouped_touchpoints))
+        
+        assert from_frames.channel_credit == pytest.approx(from_rows.channel_credit)
+    
+    def test_missing_channel_counts_as_unknown(self, grouped_touchpoints):
+        """Test that rows without a channel are scored under an 'unknown' channel."""
+        rows = [dict(row) for row in grouped_touchpoints]
+        rows[0]['channel_id'] = None
+        
+        result = StreamingAttributionRunner(batch_size=16).run(iter(rows))
+        
+        assert None not in result.channel_credit
+        assert result.channel_touchpoints['unknown'] == 1
+        assert sum(result.channel_credit.values()) == pytest.approx(4000.0)
+    
+    def test_counts_only_windowed_touchpoints(self):
+        """Test that touchpoints cut by the journey window are not counted."""
+        rows = [
+            {'customer_id': 'cust_1', 'timestamp': '2024-01-01', 'channel_id': 'email', 'campaign_id': 'camp_1'},
+            {'customer_id': 'cust_1', 'timestamp': '2024-01-02', 'channel_id': 'email', 'campaign_id': 'camp_1'}
+        ]
+        
+        result = StreamingAttributionRunner(window=JourneyWindow(max_touchpoints=1)).run(iter(rows))
+        
+        assert result.touchpoint_count == 1
+        assert result.channel_touchpoints == {'email': 1}
+        assert result.campaign_touchpoints == {'camp_1': 1}
@@ -0,0 +1,95 @@
+"""
+Unit tests for the array-backed touchpoint batch.
+"""
+import pytest
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+import numpy as np
+import pandas as pd
+
+from backend.app.services.attribution_models import AttributionModelFactory
+from backend.app.services.touchpoint_batch import TouchpointBatch
+
+
+@pytest.fixture
+def touchpoint_frame():
+    """Interleaved touchpoints of three customers."""
+    base = datetime(2024, 1, 1)
+    return pd.DataFrame([
+        {'id': 'tp_1', 'customer_id': 'a', 'timestamp': base, 'channel_id': 1, 'channel_name': 'Email', 'campaign_id': 'c1', 'conversion_value': 0.0},
+        {'id': 'tp_2', 'customer_id': 'b', 'timestamp': base + timedelta(days=1), 'channel_id': 2, 'channel_name': 'Social', 'campaign_id': None, 'conversion_value': 50.0},
+        {'id': 'tp_3', 'customer_id': 'a', 'timestamp': base + timedelta(days=3), 'channel_id': 2, 'channel_name': 'Social', 'campaign_id': 'c2', 'conversion_value': 100.0},
+        {'id': 'tp_4', 'customer_id': 'c', 'timestamp': base + timedelta(days=2), 'channel_id': 3, 'channel_name': 'Direct', 'campaign_id': 'c1', 'conversion_value': 0.0},
+        {'id': 'tp_5', 'customer_id': 'a', 'timestamp': base + timedelta(days=1), 'channel_id': 1, 'channel_name': 'Email', 'campaign_id': 'c1', 'conversion_value': 0.0},
+    ])
+
+
+class TestTouchpointBatch:
+    """Test TouchpointBatch loaders and model integration."""
+    
+    def test_from_dataframe_groups_journeys(self, touchpoint_frame):
+        """Test that interleaved rows become one journey per customer."""
+        batch = TouchpointBatch.from_dataframe(touchpoint_frame)
+        
+        assert batch.journey_count == 3
+        assert batch.offsets.tolist() == [0, 3, 4, 5]
+        assert batch.ids().tolist() == ['tp_1', 'tp_3', 'tp_5', 'tp_2', 'tp_4']
+        assert batch.conversion_values.tolist() == [100.0, 50.0, 0.0]
+        assert batch.channel_names == ['Email', 'Social', 'Direct']
+        assert batch.campaign_codes.tolist() == [0, 1, 0, -1, 0]
+        assert batch.timestamps.dtype == np.int64
+        assert batch.channel_codes.dtype == np.int32
+        assert batch.nbytes == 5 * (8 + 4 + 4 + 4) + 4 * 8 + 3 * 8
+    
+    @pytest.mark.parametrize('model_name', ['linear', 'time_decay', 'w_shaped'])
+    def test_models_match_dict_path(self, touchpoint_frame, model_name):
+        """Test that batch credit matches the per-journey dictionary API."""
+        model = AttributionModelFactory.create_model(model_name)
+        batch = TouchpointBatch.from_dataframe(touchpoint_frame)
+        
+        credit = dict(zip(batch.ids(), model.calculate_touchpoint_batch(batch)))
+        
+        for _, journey in touchpoint_frame.groupby('customer_id'):
+            expected = model.calculate_attribution(
+                journey.to_dict('records'), journey['conversion_value'].sum()
+            )
+            for tp_id, value in expected.items():
+                assert credit[tp_id] == pytest.approx(value)
+    
+    def test_aggregates_align_with_keys(self, touchpoint_frame):
+        """Test that batch aggregates are indexed by the interned keys."""
+        model = AttributionModelFactory.create_model('linear')
+        batch = TouchpointBatch.from_dataframe(touchpoint_frame)
+        
+        aggregates = model.aggregate_touchpoint_batch(batch)
+        
+        channel_credit = dict(zip(batch.channel_keys, aggregates['channel']))
+        assert channel_credit[1] == pytest.approx(200.0 / 3)
+        assert channel_credit[2] == pytest.approx(100.0 / 3 + 50.0)
+        assert channel_credit[3] == pytest.approx(0.0)
+        campaign_credit = dict(zip(batch.campaign_keys, aggregates['campaign']))
+        assert campaign_credit == pytest.approx({'c1': 200.0 / 3, 'c2': 100.0 / 3})
+    
+    def test_from_orm_rows(self):
+        """Test loading Touchpoint-like ORM rows with per-customer values."""
+        customer_a, customer_b = uuid.uuid4(), uuid.uuid4()
+        channel = uuid.uuid4()
+        base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        rows = [
+            SimpleNamespace(id=uuid.uuid4(), customer_id=customer_a, touchpoint_timestamp=base, channel_id=channel, campaign_id=None),
+            SimpleNamespace(id=uuid.uuid4(), customer_id=customer_b, touchpoint_timestamp=base, channel_id=channel, campaign_id=None),
+            SimpleNamespace(id=uuid.uuid4(), customer_id=customer_a, touchpoint_timestamp=base + timedelta(hours=1), channel_id=channel, campaign_id=None),
+        ]
+        
+        batch = TouchpointBatch.from_orm(
+            iter(rows),
+            conversion_values={customer_b: 25.0},
+            channel_names={channel: 'Email'}
+        )
+        
+        assert batch.offsets.tolist() == [0, 2, 3]
+        assert batch.conversion_values.tolist() == [1.0, 25.0]
+        assert batch.channel_names == ['Email']
+        assert batch.timestamps[1] - batch.timestamps[0] == 3600 * 10**9
+        assert (batch.campaign_codes == -1).all()